@@ -0,0 +1,87 @@
+"""
+Pool of pre-initialized research pipelines for the Llama Search research assistant.
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional
+from contextlib import contextmanager
+import logging
+import queue
+
+from .agents import QUERY_REFERENCE, init_agents
+from .pipeline import ResearchPipeline, StepCallback
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+AgentFactory = Callable[[], Dict[str, Any]]
+
+def default_agent_factory() -> Dict[str, Any]:
+    """Build agents that refer to the query instead of containing it."""
+    return init_agents(QUERY_REFERENCE)
+
+class AgentPool:
+    """
+    Keeps a fixed number of warm pipelines, each with its own set of agents.
+
+    Agents are built once, without a query baked into their role or backstory;
+    each run injects its query through the task descriptions. A pipeline is
+    lent to one query at a time, so queries never share an agent's state.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        agent_factory: AgentFactory = default_agent_factory,
+        step_callback: Optional[StepCallback] = None
+    ):
+        """
+        Initialize the pool, building every pipeline up front.
+
+        Args:
+            size: Number of pipelines, and so of queries that can run at once
+            agent_factory: Returns a fresh set of agents by ID
+            step_callback: Passed to every pipeline
+        """
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        for i in range(size):
+            pipeline = ResearchPipeline(agent_factory(), step_callback=step_callback)
+            self._idle.put(pipeline)
+            logger.info(f"Warmed pipeline {i + 1}/{size}")
+
+    @property
+    def available(self) -> int:
+        """Number of idle pipelines."""
+        return self._idle.qsize()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[ResearchPipeline]:
+        """
+        Borrow an idle pipeline, waiting up to timeout seconds for one.
+
+        Raises queue.Empty if none becomes idle in time.
+        """
+        pipeline = self._idle.get(timeout=timeout)
+        try:
+            yield pipeline
+        finally:
+            self._idle.put(pipeline)
+
+    def run(self, query: str, timeout: Optional[float] = None) -> str:
+        """
+        Answer a query with the next idle pipeline.
+
+        Raises queue.Empty if no pipeline becomes idle within timeout seconds.
+        """
+        with self.acquire(timeout) as pipeline:
+            return pipeline.run(query)
+
+    def stream(self, query: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Stream the answer to a query from the next idle pipeline.
+
+        The pipeline goes back to the pool when the stream ends or is closed.
+        Raises queue.Empty if no pipeline becomes idle within timeout seconds.
+        """
+        with self.acquire(timeout) as pipeline:
+            yield from pipeline.stream(query)
@@ -2,34 +2,64 @@
 Agent definitions for the Llama Search research assistant.
 """
 
-from typing import Dict, List, Optional
-from pathlib import Path
-import yaml
+from typing import Callable, Dict, List, Optional
+from functools import lru_cache
 import logging
 import os
 from dotenv import load_dotenv
-import json
 
 from crewai import Agent, LLM
-from langchain_community.tools import DuckDuckGoSearchRun
+from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
 from langchain.tools import Tool
 
+from .config_registry import AgentConfig, LLMConfig, get_config_registry
+from .instrumentation import get_metrics_recorder, timed_tool
+from .llm_fallback import FallbackChain
+from .recording import get_call_recorder
+from .results import SearchResult, render_results
+from .run_context import record_results, take_searches
+from .search_cache import get_search_cache
+from .search_client import RawSearch, SearchClient, SearchUnavailableError
+from .semantic_index import get_semantic_index
+from .tools.search_tools import SEARCH_BUDGET_SPENT, BatchSearchTool
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+AGENT_IDS = (
+    'intent_analyzer',
+    'query_planner',
+    'search_agent',
+    'content_evaluator',
+    'synthesis_agent'
+)
+SEARCH_MAX_RESULTS = 5
+
+_search_backend: Optional[RawSearch] = None
+# Stands in for {query} in agents built before the query is known; the task
+# descriptions carry the actual query
+QUERY_REFERENCE = "the query given in your task"
+
 # Initialize LLM
+@lru_cache(maxsize=None)
 def init_llm() -> LLM:
     """Initialize and return LLM based on environment configuration."""
     try:
         llm_provider = os.getenv("LLM_PROVIDER", "openai")
         if llm_provider == "ollama":
-            return LLM(
-                provider="ollama",
-                model=os.getenv("OLLAMA_MODEL_NAME", "llama2")
-            )
+            model = os.getenv("OLLAMA_MODEL_NAME")
+            if not model:
+                raise ValueError(
+                    "OLLAMA_MODEL_NAME must be set when LLM_PROVIDER is 'ollama'"
+                )
+            if not model.startswith("ollama/"):
+                raise ValueError(
+                    f"OLLAMA_MODEL_NAME must start with 'ollama/': {model}"
+                )
+            return LLM(provider="ollama", model=model)
         elif llm_provider == "openai":
             return LLM(
                 provider="openai",
@@ -43,77 +73,237 @@ def init_llm() -> LLM:
         logger.error(f"Failed to initialize LLM: {e}")
         raise
 
+def build_llm(config: LLMConfig) -> LLM:
+    """Create an LLM from an agent's model settings."""
+    settings = {'model': config.model}
+    if config.max_tokens is not None:
+        settings['max_tokens'] = config.max_tokens
+    if config.temperature is not None:
+        settings['temperature'] = config.temperature
+    if config.provider == "openai":
+        settings['api_key'] = os.getenv("OPENAI_API_KEY")
+        settings['api_base'] = config.base_url or os.getenv(
+            "OPENAI_API_BASE", "https://api.openai.com/v1"
+        )
+    elif config.base_url:
+        settings['base_url'] = config.base_url
+    return LLM(provider=config.provider, **settings)
+
+@lru_cache(maxsize=None)
+def init_agent_llm(config: LLMConfig) -> LLM:
+    """
+    Return the LLM for an agent's model settings, shared by agents with equal settings.
+
+    Fallbacks listed in the settings take over while the model is saturated.
+    """
+    if config.is_default:
+        return init_llm()
+    try:
+        llm = build_llm(config)
+        if config.fallbacks:
+            chain = [llm] + [init_agent_llm(f) for f in config.fallbacks]
+            FallbackChain(
+                chain,
+                cooldown=float(os.getenv("LLM_FALLBACK_COOLDOWN", 30))
+            ).attach(llm)
+        logger.info(
+            f"Initialized LLM {config.model} with {len(config.fallbacks)} fallbacks"
+        )
+        return llm
+    except Exception as e:
+        logger.error(f"Failed to initialize LLM {config.model}: {e}")
+        raise
+
 # Initialize tools
+def duckduckgo_search() -> RawSearch:
+    """Return a function fetching raw DuckDuckGo results for a query."""
+    wrapper = DuckDuckGoSearchAPIWrapper()
+
+    def raw_search(query: str) -> List[Dict]:
+        results = wrapper.results(query, max_results=SEARCH_MAX_RESULTS)
+        return [result for result in results if 'link' in result]
+
+    return raw_search
+
+def fixture_search() -> RawSearch:
+    """Return a function serving the recorded search results."""
+    from .fixture_search import FixtureSearch
+
+    return FixtureSearch()
+
+SEARCH_BACKENDS: Dict[str, Callable[[], RawSearch]] = {
+    'duckduckgo': duckduckgo_search,
+    'fixtures': fixture_search
+}
+
+def register_search_backend(name: str, factory: Callable[[], RawSearch]):
+    """Make a search provider available to SEARCH_BACKENDS under a name."""
+    SEARCH_BACKENDS[name] = factory
+    init_search_client.cache_clear()
+
+def set_search_backend(backend: Optional[RawSearch]):
+    """
+    Replace the configured backends as the source of raw search results.
+
+    Used to run against recorded fixtures instead of the web.
+
+    Takes effect for agents created afterwards; None restores SEARCH_BACKENDS.
+    """
+    global _search_backend
+    _search_backend = backend
+    for factory in (
+        init_search_client, init_search_fn, init_search_tool, init_batch_search_tool
+    ):
+        factory.cache_clear()
+
+@lru_cache(maxsize=None)
+def init_search_client() -> SearchClient:
+    """Return the rate-limited search client over the configured backends."""
+    if _search_backend is not None:
+        backends = [('custom', _search_backend)]
+    else:
+        setting = os.getenv("SEARCH_BACKENDS", "duckduckgo")
+        names = [name.strip() for name in setting.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SEARCH_BACKENDS]
+        if unknown:
+            raise ValueError(
+                f"Unknown search backends {', '.join(unknown)}; "
+                f"available: {', '.join(SEARCH_BACKENDS)}"
+            )
+        backends = [(name, SEARCH_BACKENDS[name]()) for name in names]
+    client = SearchClient(
+        backends,
+        rate=float(os.getenv("SEARCH_RATE", 1.0)),
+        burst=int(os.getenv("SEARCH_BURST", 3)),
+        retries=int(os.getenv("SEARCH_RETRIES", 2)),
+        backoff_base=float(os.getenv("SEARCH_BACKOFF_BASE", 0.5)),
+        backoff_max=float(os.getenv("SEARCH_BACKOFF_MAX", 8)),
+        breaker_threshold=int(os.getenv("SEARCH_BREAKER_THRESHOLD", 5)),
+        breaker_reset=float(os.getenv("SEARCH_BREAKER_RESET", 60))
+    )
+    get_metrics_recorder().set_exporter('search', client.prometheus_lines)
+    return client
+
+@lru_cache(maxsize=None)
+def init_search_fn() -> Callable[[str], List[SearchResult]]:
+    """
+    Return the cached single-query search function shared by all search tools.
+
+    Searches already covered by the semantic index are answered from it. When
+    calls are recorded or replayed, the recorder wraps the indexed search, so a
+    recording holds what the tools received whether or not the index answered.
+    """
+    cached_search = get_search_cache().wrap(init_search_client(), namespace="results")
+
+    def search(query: str) -> List[SearchResult]:
+        return [
+            SearchResult.from_raw(raw, rank, query)
+            for rank, raw in enumerate(cached_search(query), 1)
+        ]
+
+    index = get_semantic_index("searches")
+    if index is not None:
+        search = index.wrap_search(
+            search,
+            min_score=float(os.getenv("SEMANTIC_SKIP_SCORE", 0.8)),
+            max_age=float(os.getenv("SEMANTIC_SKIP_MAX_AGE", 7 * 24 * 60 * 60))
+        )
+    recorder = get_call_recorder()
+    if recorder:
+        return recorder.wrap_search(search)
+    return search
+
+def search_and_record(query: str) -> str:
+    """Run one search, record its results for the current run and render them."""
+    if not take_searches(1):
+        return SEARCH_BUDGET_SPENT
+    try:
+        results = init_search_fn()(query)
+    except SearchUnavailableError as e:
+        logger.error(f"Search failed for '{query}': {e}")
+        return str(e)
+    return render_results(record_results(results))
+
+@lru_cache(maxsize=None)
 def init_search_tool() -> Tool:
     """Initialize and return the web search tool."""
     try:
-        search = DuckDuckGoSearchRun()
         return Tool(
             name="web_search",
-            func=search.run,
-            description="Search the web for recent information. Provide a simple text query."
+            func=timed_tool("web_search", search_and_record),
+            description=(
+                "Search the web for recent information. Provide a simple text query."
+            )
         )
     except Exception as e:
         logger.error(f"Failed to initialize search tool: {e}", exc_info=True)
         raise
 
-def load_agent_configs() -> Dict:
-    """Load agent configurations from YAML file."""
-    config_path = Path(__file__).parent / "config" / "agents.yaml"
+@lru_cache(maxsize=None)
+def init_batch_search_tool() -> Tool:
+    """Initialize and return the concurrent multi-query search tool."""
     try:
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)['agents']
+        batch = BatchSearchTool(
+            init_search_fn(),
+            max_workers=int(os.getenv("SEARCH_CONCURRENCY", 4)),
+            timeout=float(os.getenv("SEARCH_QUERY_TIMEOUT", 20)),
+            max_queries=int(os.getenv("SEARCH_MAX_QUERIES", 8))
+        )
+        return Tool(
+            name=batch.name,
+            func=timed_tool(batch.name, batch.func),
+            description=batch.description
+        )
     except Exception as e:
-        logger.error(f"Failed to load agent configurations: {e}")
+        logger.error(f"Failed to initialize batch search tool: {e}", exc_info=True)
         raise
 
-def create_agents(query: str = "") -> Dict[str, Agent]:
+def load_agent_configs() -> Dict[str, AgentConfig]:
+    """Return parsed agent configurations from the config registry."""
+    return get_config_registry().agents()
+
+def create_agents(query: str = "", llm: Optional[LLM] = None) -> Dict[str, Agent]:
     """
     Create and return all agents based on YAML configurations.
 
     Args:
         query: The user's query to inject into agent configurations
+        llm: LLM for every agent; by default each agent uses its llm block from
+            agents.yaml, or the LLM configured by the environment
     """
-    logger.info(f"Creating agents for query: {query}")
-    llm = init_llm()
-    search_tool = init_search_tool()
-    tool_map = {'web_search': search_tool}
+    logger.info("Creating agents for query: %s", query)
+    recorder = get_call_recorder()
+    tool_map = {
+        'web_search': init_search_tool(),
+        'web_search_batch': init_batch_search_tool()
+    }
 
     agents = {}
     configs = load_agent_configs()
-    logger.debug(f"Loaded {len(configs)} agent configurations")
+    logger.debug("Loaded %d agent configurations", len(configs))
 
     for agent_id, config in configs.items():
         try:
-            logger.debug(f"\nCreating agent: {agent_id}")
-            logger.debug(f"Original config: {json.dumps(config, indent=2)}")
-
-            # Get tool names from config and map to actual tools
-            tool_names = config.get('tools', [])
-            tools = [tool_map[name] for name in tool_names if name in tool_map]
-            logger.debug(f"Assigned tools: {[t.name for t in tools]}")
-
-            # Format the configuration with the query
-            formatted_config = {
-                'role': config['role'].format(query=query) if query else config['role'],
-                'goal': config['goal'].format(query=query) if query else config['goal'],
-                'backstory': config['backstory'].format(query=query) if query else config['backstory']
-            }
-            logger.debug(f"Formatted config: {json.dumps(formatted_config, indent=2)}")
-
-            # Create agent with configuration
+            tools = [tool_map[name] for name in config.tools if name in tool_map]
+            formatted_config = config.render(query)
+            if llm:
+                agent_llm = llm
+            else:
+                agent_llm = init_agent_llm(config.llm) if config.llm else init_llm()
+            if recorder:
+                agent_llm = recorder.wrap_llm(agent_llm)
+
             agent = Agent(
                 role=formatted_config['role'],
                 goal=formatted_config['goal'],
                 backstory=formatted_config['backstory'],
                 tools=tools,
-                llm=llm,
-                verbose=config.get('verbose', True),
-                allow_delegation=config.get('allow_delegation', False)
+                llm=agent_llm,
+                verbose=config.verbose,
+                allow_delegation=config.allow_delegation,
+                max_iter=int(os.getenv("CREW_MAX_LOOPS", 20))
             )
-            logger.debug(f"Created agent: {agent_id}")
-            logger.debug(f"Agent role: {agent.role}")
-            logger.debug(f"Agent goal: {agent.goal}")
+            logger.debug("Created agent %s with tools %s", agent_id, config.tools)
 
             agents[agent_id] = agent
 
@@ -121,72 +311,51 @@ def create_agents(query: str = "") -> Dict[str, Agent]:
             logger.error(f"Failed to create agent {agent_id}: {e}", exc_info=True)
             raise
 
-    logger.info(f"Successfully created {len(agents)} agents")
+    logger.info("Successfully created %d agents", len(agents))
     return agents
 
 # Create all agents function
-def init_agents(query: str = "") -> Dict[str, Agent]:
-    """Initialize all agents with the given query context."""
+def init_agents(query: str = "", llm: Optional[LLM] = None) -> Dict[str, Agent]:
+    """Initialize all agents with the given query context and optional LLM."""
     try:
-        agents = create_agents(query)
+        agents = create_agents(query, llm)
         logger.info("All agents initialized successfully")
         return agents
     except Exception as e:
         logger.error(f"Failed to initialize agents: {e}")
         raise
 
-# Initialize agents with empty query first (will be updated per request)
-try:
-    agents = init_agents()
-    # Export individual agents
-    intent_analyzer = agents['intent_analyzer']
-    query_planner = agents['query_planner']
-    search_agent = agents['search_agent']
-    content_evaluator = agents['content_evaluator']
-    synthesis_agent = agents['synthesis_agent']
-
-    # Export the search tool for direct access if needed
-    search_tool = init_search_tool()
-
-    __all__ = [
-        'init_agents',  # Export the initialization function
-        'intent_analyzer',
-        'query_planner',
-        'search_agent',
-        'content_evaluator',
-        'synthesis_agent',
-        'search_tool'
-    ]
-
-except Exception as e:
-    logger.error(f"Failed to initialize agents: {e}")
-    raise
+@lru_cache(maxsize=None)
+def get_default_agents() -> Dict[str, Agent]:
+    """Return the shared agents built without query context, creating them once."""
+    return init_agents()
+
+def __getattr__(name: str):
+    """Build the module-level agents and search tool on first access only."""
+    if name in AGENT_IDS:
+        return get_default_agents()[name]
+    if name == 'search_tool':
+        return init_search_tool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = [  # noqa: F822 - the agents and search tool are built by __getattr__
+    'init_agents',
+    'get_default_agents',
+    'intent_analyzer',
+    'query_planner',
+    'search_agent',
+    'content_evaluator',
+    'synthesis_agent',
+    'search_tool'
+]
 
 def web_search(query: str) -> str:
     """Search the web for information about a specific topic."""
     try:
-        search = DuckDuckGoSearchRun()
-        results = search.run(query)
-
-        if not results:
-            return "No results found for the query."
-
-        # Format results to include URLs on separate lines
-        formatted_results = []
-        for i, result in enumerate(results.split('\n\n'), 1):
-            if not result.strip():
-                continue
-            # Extract title and URL if present
-            lines = result.split('\n')
-            if len(lines) >= 2:
-                title = lines[0]
-                url = lines[1] if 'http' in lines[1] else 'URL not available'
-                formatted_results.append(f"[{i}] {title}\n{url}\n")
-            else:
-                formatted_results.append(f"[{i}] {result}\n")
-
-        return "\n".join(formatted_results) if formatted_results else "No valid results found."
+        return render_results(init_search_fn()(query))
+    except SearchUnavailableError as e:
+        logger.error(f"Search failed: {e}")
+        return str(e)
     except Exception as e:
         logger.error(f"Search failed: {e}", exc_info=True)
         return f"Error: Search failed - {str(e)}"
-
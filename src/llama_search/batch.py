@@ -0,0 +1,170 @@
+"""
+Non-interactive batch processing of research queries.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Set, TextIO, Tuple
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed
+)
+from pathlib import Path
+import json
+import logging
+import os
+import sys
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+QUERY_KEYS = ('query', 'title')
+ID_KEYS = ('id', 'request_id')
+
+def parse_query_line(line: str, line_number: int) -> Tuple[str, str]:
+    """
+    Parse one input line into an (id, query) pair.
+
+    JSON objects use their "query" (or "title") and "id" (or "request_id")
+    fields; any other line is taken as the query itself.
+    """
+    text = line.strip()
+    try:
+        record = json.loads(text)
+    except json.JSONDecodeError:
+        record = None
+    if not isinstance(record, dict):
+        return str(line_number), text
+
+    query = next((record[key] for key in QUERY_KEYS if record.get(key)), "")
+    query_id = next((record[key] for key in ID_KEYS if record.get(key)), line_number)
+    return str(query_id), str(query).strip()
+
+def read_queries(source: TextIO) -> List[Tuple[str, str]]:
+    """Read (id, query) pairs from JSONL or plain text, skipping blank lines."""
+    queries = []
+    for line_number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        query_id, query = parse_query_line(line, line_number)
+        if query:
+            queries.append((query_id, query))
+    return queries
+
+def completed_ids(output_path: Path) -> Set[str]:
+    """IDs already answered successfully in an earlier run's output."""
+    if not output_path.exists():
+        return set()
+    done = set()
+    with open(output_path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from a crash mid-write
+            if 'result' in record:
+                done.add(str(record['id']))
+    return done
+
+def ends_with_newline(path: Path) -> bool:
+    """Whether a non-empty file's last byte is a newline."""
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+def run_one(
+    process_fn: Callable[[str], Any],
+    query_id: str,
+    query: str
+) -> Dict[str, Any]:
+    """Process one query, capturing its result or error and elapsed time."""
+    start = time.perf_counter()
+    record: Dict[str, Any] = {'id': query_id, 'query': query}
+    try:
+        record['result'] = str(process_fn(query))
+    except Exception as e:
+        logger.error(f"Query {query_id} failed: {e}")
+        record['error'] = str(e)
+    record['elapsed'] = round(time.perf_counter() - start, 3)
+    return record
+
+class BatchRunner:
+    """Runs many queries with bounded concurrency and streams results to JSONL."""
+
+    def __init__(
+        self,
+        process_fn: Callable[[str], Any],
+        workers: int = 4,
+        use_processes: bool = False
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            process_fn: Function answering one query; must be picklable for processes
+            workers: Number of queries processed at once
+            use_processes: Use a process pool instead of a thread pool
+        """
+        self.process_fn = process_fn
+        self.workers = workers
+        self.use_processes = use_processes
+
+    def make_executor(self) -> Executor:
+        """Create the worker pool."""
+        if self.use_processes:
+            return ProcessPoolExecutor(self.workers)
+        return ThreadPoolExecutor(self.workers, thread_name_prefix="batch")
+
+    def run(
+        self,
+        queries: Iterable[Tuple[str, str]],
+        output_path: Path,
+        resume: bool = False
+    ) -> Dict[str, int]:
+        """
+        Process queries, appending each record to output_path as it finishes.
+
+        Args:
+            queries: (id, query) pairs
+            output_path: JSONL file receiving one record per query
+            resume: Skip queries that already have a result in output_path
+
+        Returns:
+            Counts of succeeded, failed and skipped queries
+        """
+        queries = list(queries)
+        done = completed_ids(output_path) if resume else set()
+        pending = [
+            (query_id, query) for query_id, query in queries if query_id not in done
+        ]
+        # Only queries of this input count; the output may hold answers to others
+        counts = {'succeeded': 0, 'failed': 0, 'skipped': len(queries) - len(pending)}
+        logger.info(f"Processing {len(pending)} queries with {self.workers} workers")
+
+        mode = 'a' if resume else 'w'
+        with self.make_executor() as executor, open(output_path, mode) as output:
+            if resume and output.tell() and not ends_with_newline(output_path):
+                output.write("\n")  # End the partial line left by a crash
+            futures = [
+                executor.submit(run_one, self.process_fn, query_id, query)
+                for query_id, query in pending
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                self.write_record(output, record)
+                counts['failed' if 'error' in record else 'succeeded'] += 1
+        return counts
+
+    @staticmethod
+    def write_record(output: TextIO, record: Dict[str, Any]):
+        """Append a record and flush it to disk so it survives a crash."""
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        os.fsync(output.fileno())
+
+def open_source(path: str) -> TextIO:
+    """Open a query file, or stdin for '-'."""
+    if path == '-':
+        return sys.stdin
+    return open(path, 'r')
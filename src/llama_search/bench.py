@@ -0,0 +1,355 @@
+"""
+Benchmarks for the Llama Search research assistant.
+
+Run with:
+    python -m llama_search.bench startup --runs 5 --baseline bench_baseline.json
+    python -m llama_search.bench pipeline --concurrency 1 2 4 \
+        --baseline bench_baseline.json
+    python -m llama_search.bench steps --render-latency 0.01 \
+        --baseline bench_baseline.json
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .fixture_search import FixtureSearch
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STARTUP_MODULES = ("llama_search.agents", "llama_search.main")
+
+# Keeps the pipeline benchmark cold, offline and free of stray output files
+OFFLINE_ENV = {
+    'LLM_CACHE': 'false',
+    'SEARCH_CACHE_TTL': '0',
+    'FETCH_TOP_RESULTS': '0',
+    'SEMANTIC_INDEX': 'false',
+    'SEARCH_RATE': '0',
+    'STREAM_OUTPUT': 'false',
+    'OTEL_SDK_DISABLED': 'true',
+    'LITELLM_LOCAL_MODEL_COST_MAP': 'True'
+}
+
+def time_import(module: str) -> float:
+    """Import a module in a fresh interpreter and return the wall time in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+    return time.perf_counter() - start
+
+def measure_startup(modules: List[str], runs: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Measure cold import time for each module.
+
+    Args:
+        modules: Dotted module names to import
+        runs: Fresh interpreters to start per module
+
+    Returns:
+        Dict mapping each module to its min/median/max import time in seconds
+    """
+    results = {}
+    for module in modules:
+        timings = [time_import(module) for _ in range(runs)]
+        results[module] = {
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'max': max(timings)
+        }
+    return results
+
+def load_baseline(path: Path) -> Dict:
+    """Load saved benchmark results, or an empty dict if none exist yet."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+def save_baseline(path: Path, name: str, results: Dict):
+    """Store results for one benchmark in the baseline file."""
+    baseline = load_baseline(path)
+    baseline[name] = results
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+
+def compare(results: Dict, baseline: Dict, metric: str = 'median') -> List[str]:
+    """Describe how each entry's metric changed relative to the baseline."""
+    lines = []
+    for key, values in results.items():
+        current = values[metric]
+        previous = baseline.get(key, {}).get(metric)
+        if previous is None:
+            lines.append(f"{key}: {current:.3f} (no baseline)")
+            continue
+        change = (current - previous) / previous * 100 if previous else 0.0
+        lines.append(f"{key}: {current:.3f} vs {previous:.3f} ({change:+.1f}%)")
+    return lines
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Median, p95 and max of a non-empty sequence."""
+    return {
+        'median': statistics.median(values),
+        'p95': percentile(values, 0.95),
+        'max': max(values)
+    }
+
+def run_queries(process: Any, queries: List[str], concurrency: int) -> float:
+    """Answer every query with the given concurrency and return the wall time."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="bench") as executor:
+        list(executor.map(process, queries))
+    return time.perf_counter() - start
+
+def read_metrics(path: Path) -> List[Dict[str, Any]]:
+    """Read the per-query metrics records written since the file was created."""
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def measure_pipeline(
+    queries: List[str],
+    concurrency: Sequence[int],
+    llm_latency: float = 0.0,
+    search_latency: float = 0.0
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run the full pipeline offline against the stub LLM and search fixtures.
+
+    Each query builds its own agents and runs every stage, as process_query
+    does, without the terminal display. Latency and token figures come from
+    the metrics recorded while running at concurrency 1.
+
+    Args:
+        queries: Research queries, run once per concurrency level
+        concurrency: Numbers of queries run at the same time
+        llm_latency: Seconds each stub LLM call takes
+        search_latency: Seconds each fixture search takes
+
+    Returns:
+        Dict mapping each measurement to its summary statistics
+    """
+    from .agents import init_agents, init_search_client, set_search_backend
+    from .instrumentation import get_metrics_recorder
+    from .pipeline import ResearchPipeline
+    from .stub_llm import StubLLM
+
+    set_search_backend(FixtureSearch(latency=search_latency))
+    metrics_path = get_metrics_recorder().log_path
+    if metrics_path is None:
+        raise ValueError("METRICS_LOG must be set to measure the pipeline")
+
+    def process(query: str) -> str:
+        llm = StubLLM(latency=llm_latency)
+        return ResearchPipeline(init_agents(query, llm=llm)).run(query)
+
+    results: Dict[str, Dict[str, float]] = {}
+    process(queries[0])  # Warm imports and parsed configuration
+    for level in concurrency:
+        before = len(read_metrics(metrics_path))
+        elapsed = run_queries(process, queries, level)
+        results[f"throughput_c{level}"] = {'median': len(queries) / elapsed}
+        records = read_metrics(metrics_path)[before:]
+        if level != concurrency[0]:
+            continue
+        results['total_seconds'] = summarize([r['total_time'] for r in records])
+        results['total_tokens'] = summarize(
+            [r['prompt_tokens'] + r['completion_tokens'] for r in records]
+        )
+        stages: Dict[str, List[float]] = {}
+        for record in records:
+            for stage in record['stages']:
+                stages.setdefault(stage['stage'], []).append(stage['wall_time'])
+        for stage, timings in stages.items():
+            results[f"stage_seconds:{stage}"] = summarize(timings)
+    latency = init_search_client().percentiles()
+    results['search_seconds'] = {
+        'median': latency['p50'], 'p95': latency['p95'], 'p99': latency['p99']
+    }
+
+    tracemalloc.start()
+    try:
+        process(queries[0])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    results['memory_peak_mb'] = {'median': peak / 1024 / 1024}
+    set_search_backend(None)
+    return results
+
+class SlowTerminal(io.StringIO):
+    """Console output that takes a fixed time per write, like a slow terminal."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def write(self, text: str) -> int:
+        time.sleep(self.latency)
+        return super().write(text)
+
+def measure_step_display(
+    steps: int,
+    render_latency: float
+) -> Dict[str, Dict[str, float]]:
+    """
+    Measure how long the step callback holds up an agent step.
+
+    'inline' renders each step's panels on the calling thread, as the callback
+    used to; 'rich' and 'quiet' are the display modes.
+
+    Args:
+        steps: Agent steps sent through the callback per mode
+        render_latency: Seconds each write to the terminal takes
+
+    Returns:
+        Dict mapping each mode to its per-step overhead in microseconds
+    """
+    from rich.console import Console
+
+    from .config_registry import get_config_registry
+    from .display import StepDisplay
+
+    agent = SimpleNamespace(role="Research Analyst")
+    descriptions = [
+        config.render_description("latest fusion energy results")
+        for config in get_config_registry().tasks().values()
+    ]
+    thought = "Thought: " + "I should compare the sources before answering. " * 20
+
+    results: Dict[str, Dict[str, float]] = {}
+    for mode in ('inline', 'rich', 'quiet'):
+        console = Console(file=SlowTerminal(render_latency))
+        display = StepDisplay(console, quiet=mode == 'quiet')
+        if mode == 'inline':
+            def callback(agent, task, step, input_):
+                display.render(agent.role, task.description, step)
+        else:
+            callback = display.step_callback
+        timings = []
+        for i in range(steps):
+            description = descriptions[i * len(descriptions) // steps]
+            task = SimpleNamespace(description=description)
+            start = time.perf_counter()
+            if callback:
+                callback(agent, task, thought, None)
+            timings.append(time.perf_counter() - start)
+        display.drain(timeout=0)
+        results[f"step_callback_us:{mode}"] = summarize([t * 1e6 for t in timings])
+    return results
+
+def run_steps(args: argparse.Namespace):
+    """Run the step display benchmark and report against the baseline."""
+    results = measure_step_display(args.steps, args.render_latency)
+    baseline_path = Path(args.baseline) if args.baseline else None
+    baseline = load_baseline(baseline_path).get('steps', {}) if baseline_path else {}
+    for line in compare(results, baseline):
+        print(line)
+    if baseline_path and args.save:
+        save_baseline(baseline_path, 'steps', results)
+
+def run_pipeline(args: argparse.Namespace):
+    """Run the offline pipeline benchmark and report against the baseline."""
+    workdir = Path(tempfile.mkdtemp(prefix="llama-search-bench-"))
+    os.environ.update(OFFLINE_ENV)
+    os.environ['CREW_CACHE_DIR'] = str(workdir)
+    os.environ['METRICS_LOG'] = str(workdir / "metrics.jsonl")
+    os.environ.pop('METRICS_PROM_FILE', None)
+
+    queries = (args.queries or FixtureSearch().queries) * args.repeat
+    output = sys.stdout if args.verbose else io.StringIO()
+    with redirect_stdout(output):
+        results = measure_pipeline(
+            queries, args.concurrency, args.llm_latency, args.search_latency
+        )
+
+    baseline_path = Path(args.baseline) if args.baseline else None
+    baseline = load_baseline(baseline_path).get('pipeline', {}) if baseline_path else {}
+    for line in compare(results, baseline):
+        print(line)
+    if baseline_path and args.save:
+        save_baseline(baseline_path, 'pipeline', results)
+
+def run_startup(args: argparse.Namespace):
+    """Run the startup benchmark and report against the baseline."""
+    results = measure_startup(list(args.modules), args.runs)
+    baseline_path = Path(args.baseline) if args.baseline else None
+    baseline = load_baseline(baseline_path).get('startup', {}) if baseline_path else {}
+    for line in compare(results, baseline):
+        print(line)
+    if baseline_path and args.save:
+        save_baseline(baseline_path, 'startup', results)
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser for the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Llama Search benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser("startup", help="Cold import time")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--modules", nargs="+", default=STARTUP_MODULES)
+    startup.add_argument("--baseline", help="JSON file holding previous results")
+    startup.add_argument("--save", action="store_true", help="Update the baseline")
+    startup.set_defaults(handler=run_startup)
+
+    pipeline = commands.add_parser(
+        "pipeline", help="End-to-end latency, tokens, memory and throughput, offline"
+    )
+    pipeline.add_argument(
+        "--queries", nargs="+",
+        help="Queries to run (default: those in the search fixtures)"
+    )
+    pipeline.add_argument(
+        "--repeat", type=int, default=2, help="Times each query is run per level"
+    )
+    pipeline.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    pipeline.add_argument(
+        "--llm-latency", type=float, default=0.05, help="Seconds per stub LLM call"
+    )
+    pipeline.add_argument(
+        "--search-latency", type=float, default=0.02, help="Seconds per fixture search"
+    )
+    pipeline.add_argument("--verbose", action="store_true", help="Show agent output")
+    pipeline.add_argument("--baseline", help="JSON file holding previous results")
+    pipeline.add_argument("--save", action="store_true", help="Update the baseline")
+    pipeline.set_defaults(handler=run_pipeline)
+
+    steps = commands.add_parser(
+        "steps", help="Per-step overhead of the agent step display"
+    )
+    steps.add_argument(
+        "--steps", type=int, default=200, help="Agent steps per display mode"
+    )
+    steps.add_argument(
+        "--render-latency", type=float, default=0.005,
+        help="Seconds each write to the simulated terminal takes"
+    )
+    steps.add_argument("--baseline", help="JSON file holding previous results")
+    steps.add_argument("--save", action="store_true", help="Update the baseline")
+    steps.set_defaults(handler=run_steps)
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
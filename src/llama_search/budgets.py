@@ -0,0 +1,156 @@
+"""
+Time and token budgets of a query run for the Llama Search research assistant.
+"""
+
+from typing import Optional
+from dataclasses import dataclass
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from .config_registry import TaskConfig
+from .instrumentation import QueryMetrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+@dataclass(frozen=True)
+class BudgetLimits:
+    """Limits applied to every query run; 0 means unlimited."""
+
+    query_seconds: float = 300.0
+    query_tokens: int = 0
+    stage_seconds: float = 0.0
+    stage_tokens: int = 0
+    max_searches: int = 0
+
+    @classmethod
+    def from_env(cls) -> "BudgetLimits":
+        """Read the limits from CREW_TIMEOUT and the BUDGET_* variables."""
+        return cls(
+            query_seconds=float(os.getenv("CREW_TIMEOUT", 300)),
+            query_tokens=int(os.getenv("BUDGET_QUERY_TOKENS", 0)),
+            stage_seconds=float(os.getenv("BUDGET_STAGE_SECONDS", 0)),
+            stage_tokens=int(os.getenv("BUDGET_STAGE_TOKENS", 0)),
+            max_searches=int(os.getenv("BUDGET_MAX_SEARCHES", 0))
+        )
+
+class QueryBudget:
+    """
+    Tracks one query run against its limits.
+
+    Exceeded budgets are named in the run's metrics as budget_hits:
+    'query_time', 'query_tokens', 'searches', and 'stage_time:<stage>' or
+    'stage_tokens:<stage>'. Tasks may override the stage limits with
+    time_budget and token_budget in tasks.yaml.
+    """
+
+    def __init__(self, limits: BudgetLimits, metrics: QueryMetrics):
+        """
+        Start the budget.
+
+        Args:
+            limits: Limits to enforce
+            metrics: Metrics of the run, whose token totals count against the budget
+        """
+        self.limits = limits
+        self.metrics = metrics
+        self.started = time.monotonic()
+        self.searches = 0
+        self._lock = threading.Lock()
+
+    @property
+    def degraded(self) -> bool:
+        """Whether any budget has been hit."""
+        return bool(self.metrics.budget_hits)
+
+    def hit(self, budget: str):
+        """Record that a budget ran out."""
+        with self._lock:
+            if budget in self.metrics.budget_hits:
+                return
+            self.metrics.budget_hits.append(budget)
+        logger.warning(f"Budget {budget} exhausted; degrading the run")
+
+    def query_tokens(self) -> int:
+        """Tokens used by the run's finished stages."""
+        totals = self.metrics.totals()
+        return totals['prompt_tokens'] + totals['completion_tokens']
+
+    def exhausted(self, stage_tokens: int = 0) -> bool:
+        """
+        Whether the query's time or token budget has run out.
+
+        Args:
+            stage_tokens: Tokens used so far by a stage still running
+        """
+        limits = self.limits
+        elapsed = time.monotonic() - self.started
+        if limits.query_seconds and elapsed >= limits.query_seconds:
+            self.hit('query_time')
+        tokens = self.query_tokens() + stage_tokens
+        if limits.query_tokens and tokens >= limits.query_tokens:
+            self.hit('query_tokens')
+        hits = self.metrics.budget_hits
+        return 'query_time' in hits or 'query_tokens' in hits
+
+    def stage_exceeded(self, config: TaskConfig, elapsed: float, tokens: int) -> bool:
+        """
+        Whether a running stage has used up its own budget or the query's.
+
+        Args:
+            config: The stage's task
+            elapsed: Seconds the stage has run
+            tokens: Tokens the stage has used
+        """
+        seconds = self.stage_seconds(config)
+        max_tokens = config.token_budget
+        if max_tokens is None:
+            max_tokens = self.limits.stage_tokens
+        exceeded = False
+        if seconds and elapsed >= seconds:
+            self.hit(f"stage_time:{config.label}")
+            exceeded = True
+        if max_tokens and tokens >= max_tokens:
+            self.hit(f"stage_tokens:{config.label}")
+            exceeded = True
+        return self.exhausted(tokens) or exceeded
+
+    def stage_seconds(self, config: TaskConfig) -> float:
+        """A stage's own time budget, falling back to the default; 0 is unlimited."""
+        if config.time_budget is not None:
+            return config.time_budget
+        return self.limits.stage_seconds
+
+    def time_left(self, config: TaskConfig) -> Optional[float]:
+        """Seconds a stage starting now may run, or None when unlimited."""
+        seconds = self.stage_seconds(config)
+        limits = [seconds] if seconds else []
+        if self.limits.query_seconds:
+            limits.append(self.limits.query_seconds - (time.monotonic() - self.started))
+        return max(0.0, min(limits)) if limits else None
+
+    def take_searches(self, wanted: int) -> int:
+        """
+        Reserve searches, returning how many of those wanted may run.
+
+        None may run once the query's budget is exhausted, and no more than
+        max_searches in total.
+        """
+        if self.exhausted():
+            self.hit('searches')
+            return 0
+        with self._lock:
+            allowed = wanted
+            if self.limits.max_searches:
+                allowed = max(0, min(wanted, self.limits.max_searches - self.searches))
+            self.searches += allowed
+        if allowed < wanted:
+            self.hit('searches')
+        return allowed
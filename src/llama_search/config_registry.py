@@ -0,0 +1,386 @@
+"""
+Parsed, validated agent and task configuration for the Llama Search research assistant.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, replace
+from pathlib import Path
+from functools import lru_cache
+import logging
+import os
+import re
+import threading
+
+import yaml
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).parent / "config"
+QUERY_PLACEHOLDER = "{query}"
+LLM_PROVIDERS = ('ollama', 'openai')
+DEFAULT_LLM = "default"
+ENV_REFERENCE = re.compile(r"\$\{(\w+)(?::-([^}]*))?\}")
+
+def expand_env(value):
+    """Replace ${VAR} and ${VAR:-default} in a string with environment values."""
+    if not isinstance(value, str):
+        return value
+    return ENV_REFERENCE.sub(lambda m: os.getenv(m.group(1)) or m.group(2) or "", value)
+
+def parse_number(value, kind: type, key: str, where: str):
+    """
+    Convert a YAML or ${VAR} setting to int or float.
+
+    Raises ValueError naming the key for booleans, fractional integers and
+    anything else that is not a number of the right kind.
+    """
+    fractional = kind is int and isinstance(value, float) and not value.is_integer()
+    if not (isinstance(value, bool) or fractional):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            pass
+    expected = "an integer" if kind is int else "a number"
+    raise ValueError(
+        f"{where} has an invalid '{key}'; expected {expected}, got {value!r}"
+    )
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Text split around the {query} placeholder so rendering is a single join."""
+
+    parts: Tuple[str, ...]
+
+    @classmethod
+    def compile(cls, text: str) -> "PromptTemplate":
+        """Split text on the {query} placeholder."""
+        return cls(tuple(text.split(QUERY_PLACEHOLDER)))
+
+    @property
+    def text(self) -> str:
+        """The original template text."""
+        return QUERY_PLACEHOLDER.join(self.parts)
+
+    def render(self, query: str) -> str:
+        """Substitute the query, leaving the template untouched when it is empty."""
+        if not query:
+            return self.text
+        return query.join(self.parts)
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """Model settings for an agent, from the llm block of agents.yaml."""
+
+    provider: str
+    model: str
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    base_url: Optional[str] = None
+    fallbacks: Tuple["LLMConfig", ...] = ()
+
+    @property
+    def is_default(self) -> bool:
+        """Whether this stands for the LLM configured by LLM_PROVIDER."""
+        return self.provider == DEFAULT_LLM
+
+    @classmethod
+    def from_dict(cls, data) -> Optional["LLMConfig"]:
+        """
+        Validate and build model settings, expanding ${VAR} references.
+
+        The string "default" stands for the LLM configured by LLM_PROVIDER.
+        Returns None when the model expands to an empty string, so a block
+        driven by an unset variable leaves the agent on the default LLM.
+        """
+        if data == DEFAULT_LLM:
+            return cls(provider=DEFAULT_LLM, model="")
+        if 'model' not in data:
+            raise ValueError(f"LLM settings are missing 'model': {data}")
+        data = {key: expand_env(value) for key, value in data.items()}
+        if not data['model']:
+            return None
+        provider = data.get('provider') or os.getenv("LLM_PROVIDER", "openai")
+        if provider not in LLM_PROVIDERS:
+            raise ValueError(
+                f"LLM provider must be 'ollama' or 'openai', not {provider!r}"
+            )
+        if provider == 'ollama' and not data['model'].startswith('ollama/'):
+            raise ValueError(
+                f"Ollama model names must start with 'ollama/': {data['model']}"
+            )
+        fallbacks = (cls.from_dict(item) for item in data.get('fallbacks') or ())
+        return cls(
+            provider=provider,
+            model=data['model'],
+            max_tokens=(
+                parse_number(data['max_tokens'], int, 'max_tokens', "LLM settings")
+                if data.get('max_tokens') not in (None, "") else None
+            ),
+            temperature=(
+                parse_number(data['temperature'], float, 'temperature', "LLM settings")
+                if data.get('temperature') not in (None, "") else None
+            ),
+            base_url=data.get('base_url') or None,
+            fallbacks=tuple(fallback for fallback in fallbacks if fallback)
+        )
+
+@dataclass(frozen=True)
+class AgentConfig:
+    """One entry of agents.yaml."""
+
+    agent_id: str
+    role: PromptTemplate
+    goal: PromptTemplate
+    backstory: PromptTemplate
+    tools: Tuple[str, ...] = ()
+    allow_delegation: bool = False
+    memory: bool = False
+    verbose: bool = True
+    llm: Optional[LLMConfig] = None
+
+    @classmethod
+    def from_dict(cls, agent_id: str, data: Dict) -> "AgentConfig":
+        """Validate and build an agent config from its YAML mapping."""
+        for key in ('role', 'goal', 'backstory'):
+            if key not in data:
+                raise ValueError(f"Agent {agent_id} is missing '{key}'")
+        return cls(
+            agent_id=agent_id,
+            role=PromptTemplate.compile(data['role']),
+            goal=PromptTemplate.compile(data['goal']),
+            backstory=PromptTemplate.compile(data['backstory']),
+            tools=tuple(data.get('tools') or ()),
+            allow_delegation=data.get('allow_delegation', False),
+            memory=data.get('memory', False),
+            verbose=data.get('verbose', True),
+            llm=LLMConfig.from_dict(data['llm']) if data.get('llm') else None
+        )
+
+    def render(self, query: str) -> Dict[str, str]:
+        """Return role, goal and backstory with the query substituted."""
+        return {
+            'role': self.role.render(query),
+            'goal': self.goal.render(query),
+            'backstory': self.backstory.render(query)
+        }
+
+@dataclass(frozen=True)
+class TaskConfig:
+    """One entry of tasks.yaml."""
+
+    task_id: str
+    description: str
+    agent: str
+    expected_output: str
+    context: Tuple[str, ...] = ()
+    dependencies: Tuple[str, ...] = ()
+    prompt: Optional[PromptTemplate] = None
+    fan_out: Optional[str] = None
+    fan_out_max: int = 4
+    context_budget: Optional[int] = None
+    time_budget: Optional[float] = None
+    token_budget: Optional[int] = None
+    local: bool = False
+    instance: int = 0
+
+    @classmethod
+    def from_dict(cls, task_id: str, data: Dict) -> "TaskConfig":
+        """Validate and build a task config from its YAML mapping."""
+        for key in ('description', 'agent', 'expected_output'):
+            if key not in data:
+                raise ValueError(f"Task {task_id} is missing '{key}'")
+        fan_out = data.get('fan_out') or {}
+        if not isinstance(fan_out, dict):
+            raise ValueError(
+                f"Task {task_id} has an invalid fan_out; "
+                "expected a mapping with 'from' and 'max'"
+            )
+        config = cls(
+            task_id=task_id,
+            description=data['description'],
+            agent=data['agent'],
+            expected_output=data['expected_output'],
+            context=tuple(data.get('context') or ()),
+            dependencies=tuple(data.get('dependencies') or ()),
+            fan_out=fan_out.get('from'),
+            fan_out_max=parse_number(
+                fan_out.get('max', 4), int, 'fan_out.max', f"Task {task_id}"
+            ),
+            context_budget=data.get('context_budget'),
+            time_budget=data.get('time_budget'),
+            token_budget=data.get('token_budget'),
+            local=bool(data.get('local', False))
+        )
+        if config.fan_out and config.fan_out not in config.dependencies:
+            raise ValueError(
+                f"Task {task_id} fans out over a task it does not depend on"
+            )
+        return config.with_prompt()
+
+    def with_prompt(self) -> "TaskConfig":
+        """Return a copy with the prompt template compiled from the description."""
+        context_str = "\n".join(f"- {item}" for item in self.context)
+        prompt = PromptTemplate((
+            f"{self.description}\n\nQuery: ",
+            f"\n\nContext:\n{context_str}"
+        ))
+        return replace(self, prompt=prompt)
+
+    def for_item(self, item: str, instance: int) -> "TaskConfig":
+        """Return the configuration of one fan-out branch focused on item."""
+        return replace(
+            self,
+            description=f"{self.description}\n\nFocus only on: {item}",
+            instance=instance
+        ).with_prompt()
+
+    @property
+    def label(self) -> str:
+        """Task ID, suffixed with the branch number for fan-out branches."""
+        return f"{self.task_id}[{self.instance}]" if self.instance else self.task_id
+
+    def render_description(self, query: str) -> str:
+        """Return the full task description for a query."""
+        return self.prompt.render(query)
+
+def topological_order(tasks: Dict[str, TaskConfig]) -> Tuple[str, ...]:
+    """
+    Order tasks so every task comes after its dependencies.
+
+    Ties keep the order tasks were declared in. Raises ValueError on unknown
+    dependencies or cycles.
+    """
+    for task in tasks.values():
+        unknown = [dep for dep in task.dependencies if dep not in tasks]
+        if unknown:
+            raise ValueError(f"Task {task.task_id} depends on unknown tasks: {unknown}")
+
+    order: List[str] = []
+    done = set()
+    pending = list(tasks)
+    while pending:
+        ready = [t for t in pending if set(tasks[t].dependencies) <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between tasks: {pending}")
+        order.extend(ready)
+        done.update(ready)
+        pending = [t for t in pending if t not in done]
+    return tuple(order)
+
+def without_tasks(
+    tasks: Dict[str, TaskConfig],
+    skip: Set[str]
+) -> Dict[str, TaskConfig]:
+    """
+    Remove tasks from a task graph, keeping the remaining tasks connected.
+
+    A task that depended on a removed task depends on that task's own
+    dependencies instead, and fanning out over a removed task is dropped.
+    """
+    def inherited(task_id: str) -> Tuple[str, ...]:
+        deps: List[str] = []
+        for dep in tasks[task_id].dependencies:
+            for kept in (inherited(dep) if dep in skip else (dep,)):
+                if kept not in deps:
+                    deps.append(kept)
+        return tuple(deps)
+
+    return {
+        task_id: replace(
+            config,
+            dependencies=inherited(task_id),
+            fan_out=None if config.fan_out in skip else config.fan_out
+        )
+        for task_id, config in tasks.items()
+        if task_id not in skip
+    }
+
+class ConfigRegistry:
+    """Parses agents.yaml and tasks.yaml once and reloads them when they change."""
+
+    def __init__(self, config_dir: Path = CONFIG_DIR):
+        """
+        Initialize the registry.
+
+        Args:
+            config_dir: Directory holding agents.yaml and tasks.yaml
+        """
+        self.config_dir = config_dir
+        self._lock = threading.Lock()
+        self._mtimes: Dict[str, float] = {}
+        self._agents: Dict[str, AgentConfig] = {}
+        self._tasks: Dict[str, TaskConfig] = {}
+        self._task_order: Tuple[str, ...] = ()
+
+    def _changed(self, name: str) -> bool:
+        """Return whether a config file was modified since it was last parsed."""
+        mtime = (self.config_dir / name).stat().st_mtime
+        return self._mtimes.get(name) != mtime
+
+    def _read(self, name: str, section: str) -> Dict:
+        """Parse one YAML file and record its modification time."""
+        path = self.config_dir / name
+        mtime = path.stat().st_mtime
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f)[section]
+        self._mtimes[name] = mtime
+        logger.debug(f"Parsed {path}")
+        return data
+
+    def _refresh(self):
+        """Reparse whichever config files changed and revalidate them."""
+        agents_changed = self._changed("agents.yaml")
+        tasks_changed = self._changed("tasks.yaml")
+        if not (agents_changed or tasks_changed):
+            return
+        try:
+            if agents_changed:
+                data = self._read("agents.yaml", "agents")
+                self._agents = {
+                    agent_id: AgentConfig.from_dict(agent_id, config)
+                    for agent_id, config in data.items()
+                }
+            if tasks_changed:
+                data = self._read("tasks.yaml", "tasks")
+                self._tasks = {
+                    task_id: TaskConfig.from_dict(task_id, config)
+                    for task_id, config in data.items()
+                }
+                self._task_order = topological_order(self._tasks)
+            self._validate()
+        except Exception as e:
+            self._mtimes.clear()
+            logger.error(f"Failed to load configurations: {e}")
+            raise
+
+    def _validate(self):
+        """Check that every task refers to a configured agent."""
+        for task in self._tasks.values():
+            if task.agent not in self._agents:
+                raise ValueError(
+                    f"Task {task.task_id} uses unknown agent: {task.agent}"
+                )
+
+    def agents(self) -> Dict[str, AgentConfig]:
+        """Return agent configurations by ID."""
+        with self._lock:
+            self._refresh()
+            return self._agents
+
+    def tasks(self) -> Dict[str, TaskConfig]:
+        """Return task configurations by ID, in declaration order."""
+        with self._lock:
+            self._refresh()
+            return self._tasks
+
+    def task_order(self) -> Tuple[str, ...]:
+        """Return task IDs in dependency order."""
+        with self._lock:
+            self._refresh()
+            return self._task_order
+
+@lru_cache(maxsize=None)
+def get_config_registry() -> ConfigRegistry:
+    """Return the process-wide configuration registry."""
+    return ConfigRegistry()
@@ -0,0 +1,166 @@
+"""
+Token budgeting of the context handed between pipeline stages.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import re
+
+from .dedupe import estimate_tokens
+from .evaluation import WEIGHTS, ScoredResult, bm25_scores, tokenize
+from .results import truncate
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+ANCHOR_LINE = re.compile(r"^(#+ |\[\d+\] |https?://)")
+CONTEXT_SEPARATOR = "\n\n----------\n\n"
+SNIPPET_CHARS = 160
+POSITION_WEIGHT = 0.2
+REVIEW_HEADING = "Review of borderline results:"
+
+Compactor = Callable[[int], Optional[str]]
+
+def split_block(block: str) -> Tuple[List[str], List[str]]:
+    """
+    Split a paragraph block into anchor lines and sentences.
+
+    Anchors are headings, numbered result titles and URLs; they are kept with
+    any sentence selected from their block so citations survive compression.
+    """
+    anchors: List[str] = []
+    sentences: List[str] = []
+    for line in block.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if ANCHOR_LINE.match(line) and not sentences:
+            anchors.append(line)
+        else:
+            sentences.extend(s for s in SENTENCE_BREAK.split(line) if s)
+    return anchors, sentences
+
+def fit_text(text: str, query: str, budget: int) -> str:
+    """
+    Shorten text to about budget tokens by keeping its most salient sentences.
+
+    Sentences are ranked by BM25 against the query with a small bonus for
+    appearing early in their block, then kept in their original order.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+
+    blocks = [split_block(block) for block in re.split(r"\n\s*\n", text)]
+    units = [
+        (b, s, sentence)
+        for b, (_, sentences) in enumerate(blocks)
+        for s, sentence in enumerate(sentences)
+    ]
+    relevance = bm25_scores(query, [tokenize(sentence) for _, _, sentence in units])
+    ranked = sorted(
+        range(len(units)),
+        key=lambda i: relevance[i] + POSITION_WEIGHT / (1 + units[i][1]),
+        reverse=True
+    )
+
+    chosen: Dict[int, List[int]] = {}
+    used = 0
+    for i in ranked:
+        b, s, sentence = units[i]
+        cost = estimate_tokens(sentence) + 1
+        if b not in chosen:
+            cost += sum(estimate_tokens(anchor) + 1 for anchor in blocks[b][0])
+        if used + cost > budget:
+            continue
+        chosen.setdefault(b, []).append(s)
+        used += cost
+
+    sections = []
+    for b in sorted(chosen):
+        anchors, sentences = blocks[b]
+        kept = " ".join(sentences[s] for s in sorted(chosen[b]))
+        sections.append("\n".join(anchors + [kept]))
+    return "\n\n".join(sections)
+
+def compact_evaluation(
+    query: str,
+    scored: List[ScoredResult],
+    budget: int,
+    min_score: float,
+    review: str = ""
+) -> str:
+    """
+    Render scored results as one numeric line each, best first, within budget.
+
+    Results below min_score are dropped, as are the lowest-scoring ones that
+    do not fit. The borderline review, if any, is fitted into what is left.
+    """
+    header = (
+        "Scores as relevance/{relevance} recency/{recency} authority/{authority} "
+        "uniqueness/{uniqueness} = total/100:".format(**WEIGHTS)
+    )
+    lines = [header]
+    used = estimate_tokens(header)
+    for item in scored:
+        if item.total < min_score:
+            break
+        result = item.result
+        date = f" ({result.date})" if result.date else ""
+        line = (
+            f"[{len(lines)}] {result.title}{date}\n"
+            f"{result.url}\n"
+            f"{item.relevance * WEIGHTS['relevance']:.0f}/"
+            f"{item.recency * WEIGHTS['recency']:.0f}/"
+            f"{item.authority * WEIGHTS['authority']:.0f}/"
+            f"{item.uniqueness * WEIGHTS['uniqueness']:.0f} = {item.total:.0f}: "
+            f"{truncate(result.snippet, SNIPPET_CHARS)}"
+        )
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+
+    output = "\n\n".join(lines)
+    if review and budget - used > 0:
+        output += f"\n\n{REVIEW_HEADING}\n{fit_text(review, query, budget - used)}"
+    return output
+
+def fit_context(
+    outputs: Dict[str, str],
+    query: str,
+    budget: int,
+    compactors: Optional[Dict[str, Compactor]] = None
+) -> Tuple[str, int, int]:
+    """
+    Join upstream outputs into one context of about budget tokens.
+
+    Each output gets an equal share of what earlier outputs left unused.
+    Outputs over their share are shortened by their task's compactor, when
+    one is registered and applies, or by salient-sentence extraction.
+
+    Args:
+        outputs: Upstream task outputs by task ID, in dependency order
+        query: The research query, used to rank sentences
+        budget: Token budget for the whole context; 0 disables compression
+        compactors: Structure-aware shorteners by task ID, called with a token share
+
+    Returns:
+        The context and its estimated token count before and after compression
+    """
+    full = CONTEXT_SEPARATOR.join(outputs.values())
+    before = estimate_tokens(full)
+    if not budget or before <= budget:
+        return full, before, before
+
+    compactors = compactors or {}
+    parts = []
+    remaining = budget
+    for i, (task_id, text) in enumerate(outputs.items()):
+        share = remaining // (len(outputs) - i)
+        part = None
+        if estimate_tokens(text) > share and task_id in compactors:
+            part = compactors[task_id](share)
+        if part is None:
+            part = fit_text(text, query, share)
+        parts.append(part)
+        remaining -= estimate_tokens(part)
+    context = CONTEXT_SEPARATOR.join(parts)
+    return context, before, estimate_tokens(context)
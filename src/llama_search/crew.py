@@ -10,13 +10,7 @@ import logging
 from crewai import Crew, Task
 from dotenv import load_dotenv
 
-from .agents import (
-    intent_analyzer,
-    query_planner,
-    search_agent,
-    content_evaluator,
-    synthesis_agent
-)
+from .agents import AGENT_IDS, get_default_agents
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -24,25 +18,21 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def create_research_crew(tasks: List[Task]) -> Crew:
+def create_research_crew(tasks: List[Task], agents: Optional[Dict] = None) -> Crew:
     """
     Create a research crew with the specified tasks.
 
     Args:
         tasks: List of tasks for the crew to perform
+        agents: Agents by ID; defaults to the shared agents without query context
 
     Returns:
         Crew: Configured research crew
     """
     try:
+        agents = agents or get_default_agents()
         crew = Crew(
-            agents=[
-                intent_analyzer,
-                query_planner,
-                search_agent,
-                content_evaluator,
-                synthesis_agent
-            ],
+            agents=[agents[agent_id] for agent_id in AGENT_IDS],
             tasks=tasks,
             verbose=True
         )
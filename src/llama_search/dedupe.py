@@ -0,0 +1,143 @@
+"""
+URL canonicalization and near-duplicate detection for search results.
+"""
+
+from typing import Dict, List, Optional, Set
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import hashlib
+import re
+
+from .results import SearchResult
+
+# Known trackers only; generic names like ref or source can select content
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    'ref_src', 'ref_url', 'spm', 'yclid', '_ga'
+}
+TRACKING_PREFIXES = ('utm_',)
+HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+SIMHASH_BITS = 64
+NEAR_DUPLICATE_DISTANCE = 3
+SHINGLE_SIZE = 3
+CHARS_PER_TOKEN = 4
+
+WORD_PATTERN = re.compile(r"\w+")
+
+@lru_cache(maxsize=4096)
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce URL variants of the same page to one form.
+
+    The scheme becomes https, www/mobile/amp host prefixes, default ports,
+    fragments, tracking parameters and trailing slashes are dropped, and the
+    remaining query parameters are sorted.
+    """
+    parsed = urlparse(url.strip())
+    if not parsed.netloc:
+        return url.strip()
+
+    host = (parsed.hostname or '').lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(parsed.scheme.lower()):
+        host = f"{host}:{parsed.port}"
+
+    params = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parsed.path.rstrip('/') or '/'
+    if path.endswith('/amp'):
+        path = path[:-4] or '/'
+    return urlunparse(('https', host, path, '', urlencode(sorted(params)), ''))
+
+def simhash(text: str) -> int:
+    """Compute a 64-bit SimHash over word shingles of text."""
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = [
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    ]
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text."""
+    return len(text) // CHARS_PER_TOKEN
+
+class ResultDeduplicator:
+    """Drops search results seen before under their URL or a near-identical snippet."""
+
+    def __init__(self, max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            max_distance: SimHash bit difference up to which snippets are duplicates
+        """
+        self.max_distance = max_distance
+        self.urls: Set[str] = set()
+        self.hashes: List[int] = []
+        self.dropped = 0
+        self.tokens_saved = 0
+
+    def is_duplicate(self, url: str, fingerprint: Optional[int]) -> bool:
+        """Return whether a result matches one already kept."""
+        if url in self.urls:
+            return True
+        if fingerprint is None:
+            return False
+        return any(
+            hamming_distance(fingerprint, seen) <= self.max_distance
+            for seen in self.hashes
+        )
+
+    def filter(self, results: List[SearchResult]) -> List[SearchResult]:
+        """
+        Keep only results not seen before, setting canonical_url on each.
+
+        Args:
+            results: Search results to check
+
+        Returns:
+            The new, unique results in their original order
+        """
+        kept = []
+        for result in results:
+            url = canonicalize_url(result.url)
+            text = f"{result.title} {result.snippet}"
+            fingerprint = simhash(text) if text.strip() else None
+            if self.is_duplicate(url, fingerprint):
+                self.dropped += 1
+                self.tokens_saved += estimate_tokens(result.render(result.rank))
+                continue
+            self.urls.add(url)
+            if fingerprint is not None:
+                self.hashes.append(fingerprint)
+            result.canonical_url = url
+            kept.append(result)
+        return kept
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many results were kept and dropped, and the tokens saved."""
+        return {
+            'kept': len(self.urls),
+            'dropped': self.dropped,
+            'tokens_saved': self.tokens_saved
+        }
@@ -0,0 +1,145 @@
+"""
+Terminal display of agent steps for the Llama Search research assistant.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import logging
+import os
+import queue
+import threading
+
+from dotenv import load_dotenv
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+from .pipeline import StepCallback
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+DISPLAY_MODES = ('rich', 'quiet')
+
+StepEvent = Tuple[str, str, str]
+
+class StepDisplay:
+    """
+    Shows agent steps as Rich panels without slowing the agents down.
+
+    The step callback only puts the raw step on a bounded queue; a background
+    thread formats, logs and prints it. Steps arriving while the queue is full
+    are dropped rather than waited for, so a slow terminal never stalls an
+    agent. A task's description is shown once when an agent starts it, not on
+    every step. In quiet mode there is no callback at all.
+    """
+
+    def __init__(self, console: Console, quiet: bool = False, queue_size: int = 256):
+        """
+        Initialize the display.
+
+        Args:
+            console: Console the panels are printed to
+            quiet: Show nothing, leaving agents with no step callback
+            queue_size: Steps waiting to be shown before new ones are dropped
+        """
+        self.console = console
+        self.quiet = quiet
+        self.dropped = 0
+        self._queue: "queue.Queue[StepEvent]" = queue.Queue(maxsize=queue_size)
+        self._shown_tasks: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def step_callback(self) -> Optional[StepCallback]:
+        """The pipeline step callback, or None in quiet mode."""
+        return None if self.quiet else self.enqueue
+
+    def enqueue(self, agent: Any, task: Any, step: str, input_: Any):
+        """Queue a step for display; runs on the agent's thread, so it only queues."""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait((
+                getattr(agent, 'role', None) or "Unknown",
+                getattr(task, 'description', None) or "",
+                step or ""
+            ))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def start(self):
+        """Start the thread rendering queued steps."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._consume, name="step-display", daemon=True
+            )
+            self._thread.start()
+
+    def _consume(self):
+        """Render queued steps until the process exits."""
+        while True:
+            event = self._queue.get()
+            try:
+                self.render(*event)
+            except Exception as e:
+                logger.error("Error displaying agent step: %s", e, exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def render(self, agent: str, task: str, step: str):
+        """Log a step and print its panels."""
+        logger.debug("Step by %s on task %r: %s", agent, task[:80], step)
+        if task and self._shown_tasks.get(agent) != task:
+            self._shown_tasks[agent] = task
+            task_text = task.replace("Task:", "").strip()
+            if task_text:
+                self.console.print(Panel(
+                    Markdown(task_text),
+                    title=f"[bold blue]{agent}[/bold blue]",
+                    subtitle="[blue]Current Task[/blue]",
+                    border_style="blue",
+                    padding=(1, 2)
+                ))
+        if "Thought:" in step:
+            thought_text = step.replace("Thought:", "").strip()
+            if thought_text:
+                self.console.print(Panel(
+                    Markdown(thought_text),
+                    title=f"[bold yellow]{agent}[/bold yellow]",
+                    subtitle="[yellow]Thought Process[/yellow]",
+                    border_style="yellow",
+                    padding=(1, 2)
+                ))
+
+    def drain(self, timeout: float = 5.0):
+        """
+        Wait for queued steps to be shown, e.g. before printing the results.
+
+        Args:
+            timeout: Most seconds to wait for a slow terminal
+        """
+        done = self._queue.all_tasks_done
+        with done:
+            done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            logger.warning(
+                "Skipped displaying %d agent steps while the terminal caught up",
+                dropped
+            )
+
+def display_mode() -> str:
+    """The DISPLAY_MODE setting: 'rich' (the default) or 'quiet'."""
+    mode = os.getenv("DISPLAY_MODE", "rich").lower()
+    if mode not in DISPLAY_MODES:
+        logger.warning("Unknown DISPLAY_MODE %r; using 'rich'", mode)
+        return 'rich'
+    return mode
@@ -0,0 +1,181 @@
+"""
+Deterministic scoring of search results for the Llama Search research assistant.
+
+Each result gets four feature scores that add up to the 100-point rubric:
+relevance (BM25 against the query), recency, domain authority and uniqueness.
+Only results whose total falls in the borderline band need an LLM opinion.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import urlparse
+import re
+from collections import Counter
+
+import numpy as np
+
+from .results import SearchResult
+
+WEIGHTS = {
+    'relevance': 40,
+    'recency': 20,
+    'authority': 25,
+    'uniqueness': 15
+}
+BORDERLINE = (45.0, 65.0)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+HIGH_AUTHORITY_SUFFIXES = ('.gov', '.edu', '.int', '.mil')
+HIGH_AUTHORITY_DOMAINS = {
+    'wikipedia.org', 'nature.com', 'science.org', 'nih.gov', 'who.int',
+    'reuters.com', 'apnews.com', 'bbc.co.uk', 'bbc.com', 'nytimes.com',
+    'arxiv.org', 'acm.org', 'ieee.org', 'github.com', 'python.org'
+}
+LOW_AUTHORITY_DOMAINS = {
+    'pinterest.com', 'quora.com', 'facebook.com', 'tiktok.com',
+    'instagram.com', 'x.com', 'twitter.com'
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+YEAR_PATTERN = re.compile(r"\b(19[89]\d|20\d\d)\b")
+
+@dataclass
+class ScoredResult:
+    """A search result with its feature scores and rubric total."""
+
+    result: SearchResult
+    relevance: float
+    recency: float
+    authority: float
+    uniqueness: float
+    total: float
+    borderline: bool
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def result_text(result: SearchResult) -> str:
+    """Text of a result that is matched against the query."""
+    return f"{result.title} {result.snippet}"
+
+def bm25_scores(query: str, documents: Sequence[List[str]]) -> List[float]:
+    """
+    Score tokenized documents against a query with Okapi BM25.
+
+    Returns:
+        Scores scaled to 0-1 by the best document
+    """
+    if not documents:
+        return []
+    terms = sorted(set(tokenize(query)))
+    counts = [Counter(doc) for doc in documents]
+    # Term frequencies of the query terms only: documents x terms
+    tf = np.array([[freqs[term] for term in terms] for freqs in counts], dtype=float)
+    tf = tf.reshape(len(documents), len(terms))
+    lengths = np.array([len(doc) for doc in documents], dtype=float)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (lengths.mean() or 1.0))
+    doc_freq = np.count_nonzero(tf, axis=0)
+    idf = np.log(1 + (len(documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+    scores = (idf * tf * (BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+    best = scores.max()
+    return (scores / best).tolist() if best else [0.0] * len(documents)
+
+def recency_score(result: SearchResult, current_year: int) -> float:
+    """Score 0-1 from the newest year in the result's date or text."""
+    text = f"{result.date} {result_text(result)}"
+    years = [int(year) for year in YEAR_PATTERN.findall(text)]
+    years = [year for year in years if year <= current_year]
+    if not years:
+        return 0.5
+    age = current_year - max(years)
+    return max(0.0, 1.0 - age / 5)
+
+def authority_score(url: str) -> float:
+    """Score 0-1 for how trustworthy a source's domain is likely to be."""
+    domain = urlparse(url).netloc.lower()
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    if not domain:
+        return 0.3
+    if domain.endswith(HIGH_AUTHORITY_SUFFIXES):
+        return 1.0
+    if any(domain == d or domain.endswith('.' + d) for d in HIGH_AUTHORITY_DOMAINS):
+        return 0.9
+    if any(domain == d or domain.endswith('.' + d) for d in LOW_AUTHORITY_DOMAINS):
+        return 0.2
+    return 0.6
+
+def uniqueness_scores(documents: Sequence[List[str]]) -> List[float]:
+    """Score 0-1 by how little each document overlaps an earlier one."""
+    seen: List[set] = []
+    scores = []
+    for doc in documents:
+        terms = set(doc)
+        overlap = max(
+            (
+                len(terms & other) / len(terms | other)
+                for other in seen if terms | other
+            ),
+            default=0.0
+        )
+        scores.append(1.0 - overlap)
+        seen.append(terms)
+    return scores
+
+def evaluate_results(
+    query: str,
+    results: List[SearchResult],
+    borderline: Tuple[float, float] = BORDERLINE,
+    current_year: Optional[int] = None
+) -> List[ScoredResult]:
+    """
+    Score search results against the query.
+
+    Args:
+        query: The original research query
+        results: Search results to score
+        borderline: Totals in this inclusive range are flagged for review
+        current_year: Reference year for recency; defaults to this year
+
+    Returns:
+        Scored results, best first
+    """
+    current_year = current_year or datetime.now().year
+    documents = [tokenize(result_text(result)) for result in results]
+    relevance = bm25_scores(query, documents)
+    uniqueness = uniqueness_scores(documents)
+
+    scored = []
+    for i, result in enumerate(results):
+        features = {
+            'relevance': relevance[i],
+            'recency': recency_score(result, current_year),
+            'authority': authority_score(result.url),
+            'uniqueness': uniqueness[i]
+        }
+        total = round(sum(WEIGHTS[name] * value for name, value in features.items()), 1)
+        scored.append(ScoredResult(
+            result=result,
+            total=total,
+            borderline=borderline[0] <= total <= borderline[1],
+            **features
+        ))
+    return sorted(scored, key=lambda s: s.total, reverse=True)
+
+def render_evaluation(scored: List[ScoredResult]) -> str:
+    """Render scores in the rubric format expected by the synthesis stage."""
+    lines = []
+    for rank, item in enumerate(scored, 1):
+        scores = ", ".join(
+            f"{feature.capitalize()} {getattr(item, feature) * weight:.0f}/{weight}"
+            for feature, weight in WEIGHTS.items()
+        )
+        lines.append(
+            f"{item.result.render(rank)}\n{scores} - Total {item.total:.0f}/100"
+        )
+    return "\n\n".join(lines)
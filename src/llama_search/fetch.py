@@ -0,0 +1,338 @@
+"""
+Page fetching and main-text extraction for the Llama Search research assistant.
+"""
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from functools import lru_cache
+from urllib.parse import urlsplit
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+import trafilatura
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .dedupe import canonicalize_url
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+USER_AGENT = (
+    "Mozilla/5.0 (compatible; LlamaSearch/0.1; "
+    "+https://github.com/TheSethRose/CrewAI-Llama-Search)"
+)
+TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+CHUNK_BYTES = 64 * 1024
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+DEFAULT_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_CACHE_MAX_ENTRIES = 2000
+
+class CachedPage(NamedTuple):
+    """Extracted text of a page and the validators needed to revalidate it."""
+
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched: float
+
+class PageCache:
+    """SQLite cache of extracted page text keyed by canonical URL."""
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_age: float = DEFAULT_CACHE_MAX_AGE,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES
+    ):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite database file
+            ttl: Seconds a page is served without revalidating it
+            max_age: Seconds after its last fetch that a page is dropped
+            max_entries: Pages kept before the least recently fetched are dropped
+        """
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, text TEXT, etag TEXT, last_modified TEXT, "
+            "fetched REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for a canonical URL, fresh or not."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, etag, last_modified, fetched FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Whether a cached page can be used without asking the server."""
+        return time.time() - page.fetched < self.ttl
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        etag: Optional[str],
+        last_modified: Optional[str]
+    ):
+        """Store the extracted text of a page along with its validators."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (url, text, etag, last_modified, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop pages past max_age, then the least recently fetched past max_entries."""
+        cutoff = time.time() - self.max_age
+        self._conn.execute("DELETE FROM pages WHERE fetched < ?", (cutoff,))
+        count = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM pages WHERE url IN "
+            "(SELECT url FROM pages ORDER BY fetched LIMIT ?)",
+            (excess,)
+        )
+        logger.debug(f"Evicted {excess} cached pages")
+
+    def touch(self, url: str):
+        """Mark a cached page as revalidated now."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched = ? WHERE url = ?", (time.time(), url)
+            )
+            self._conn.commit()
+
+def make_session(pool_size: int) -> requests.Session:
+    """Create an HTTP session keeping up to pool_size connections alive per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=1, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+def extract_text(html: bytes, url: str) -> str:
+    """Extract the main text of a page, falling back to all visible text."""
+    text = trafilatura.extract(
+        html,
+        url=url,
+        include_comments=False,
+        include_tables=False,
+        favor_precision=True
+    )
+    if text:
+        return text
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'noscript', 'nav', 'header', 'footer']):
+        element.decompose()
+    return soup.get_text(" ", strip=True)
+
+class PageFetcher:
+    """
+    Fetches pages over a shared keep-alive session and extracts their text.
+
+    Requests to one host are spaced at least host_interval seconds apart,
+    bodies are streamed and cut off at max_bytes, and extracted text is cached
+    by canonical URL and revalidated with ETag/Last-Modified once stale.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        timeout: float = 10.0,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        host_interval: float = 1.0,
+        cache: Optional[PageCache] = None,
+        session: Optional[requests.Session] = None
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_workers: Maximum number of pages fetched at once
+            timeout: Seconds allowed for connecting and for each read
+            max_bytes: Bodies larger than this are truncated
+            host_interval: Minimum seconds between requests to the same host
+            cache: Cache of extracted text; None disables caching
+            session: HTTP session to use; one is created if not given
+        """
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.host_interval = host_interval
+        self.cache = cache
+        self.session = session or make_session(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="fetch")
+        self._host_lock = threading.Lock()
+        self._next_request: Dict[str, float] = {}
+
+    def wait_for_host(self, host: str):
+        """Reserve the next request slot for a host and sleep until it arrives."""
+        with self._host_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request.get(host, 0.0))
+            self._next_request[host] = start + self.host_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def read_body(self, response: requests.Response) -> bytes:
+        """Read a streamed body, stopping once max_bytes have arrived."""
+        chunks: List[bytes] = []
+        size = 0
+        for chunk in response.iter_content(CHUNK_BYTES):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                logger.debug(f"Truncated {response.url} at {self.max_bytes} bytes")
+                break
+        return b"".join(chunks)[:self.max_bytes]
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Return the extracted text of a page.
+
+        Args:
+            url: Address of the page
+
+        Returns:
+            The page text, or None if it could not be fetched or is not text
+        """
+        key = canonicalize_url(url)
+        cached = self.cache.get(key) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            return cached.text
+
+        headers = {}
+        if cached and cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached and cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+
+        self.wait_for_host(urlsplit(url).hostname or '')
+        try:
+            request = self.session.get(
+                url, headers=headers, timeout=self.timeout, stream=True
+            )
+            with request as response:
+                if response.status_code == 304 and cached:
+                    self.cache.touch(key)
+                    return cached.text
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                content_type = content_type.split(';')[0].strip()
+                if content_type and content_type not in TEXT_CONTENT_TYPES:
+                    logger.debug(f"Skipping {url} with content type {content_type}")
+                    return None
+                body = self.read_body(response)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except requests.RequestException as e:
+            logger.warning(f"Failed to fetch {url}: {e}")
+            return cached.text if cached else None
+
+        text = extract_text(body, url)
+        if text and self.cache:
+            self.cache.put(key, text, etag, last_modified)
+        return text or None
+
+    def fetch_all(
+        self,
+        urls: Iterable[str],
+        timeout: Optional[float] = None
+    ) -> Dict[str, str]:
+        """
+        Fetch pages concurrently.
+
+        Args:
+            urls: Addresses of the pages
+            timeout: Seconds to wait for all of them; defaults to a few request timeouts
+
+        Returns:
+            Extracted text by URL, for the pages that were fetched in time
+        """
+        futures = {
+            url: self._executor.submit(self.fetch, url) for url in dict.fromkeys(urls)
+        }
+        if timeout is None:
+            timeout = 3 * self.timeout
+        deadline = time.monotonic() + timeout
+        pages: Dict[str, str] = {}
+        for url, future in futures.items():
+            try:
+                text = future.result(max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                future.cancel()
+                logger.warning(f"Timed out fetching {url}")
+                continue
+            except Exception as e:
+                logger.error(f"Failed to extract {url}: {e}")
+                continue
+            if text:
+                pages[url] = text
+        return pages
+
+def excerpts(text: str, max_chars: int) -> Iterator[str]:
+    """Yield whole paragraphs of text until max_chars would be exceeded."""
+    used = 0
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if used + len(paragraph) > max_chars:
+            if not used:
+                yield paragraph[:max_chars].rsplit(' ', 1)[0] + "..."
+            return
+        used += len(paragraph) + 1
+        yield paragraph
+
+@lru_cache(maxsize=None)
+def get_page_fetcher() -> PageFetcher:
+    """Return the process-wide page fetcher, keeping connections warm across queries."""
+    cache_dir = Path(os.getenv("CREW_CACHE_DIR", "./cache"))
+    return PageFetcher(
+        max_workers=int(os.getenv("FETCH_CONCURRENCY", 4)),
+        timeout=float(os.getenv("FETCH_TIMEOUT", 10)),
+        max_bytes=int(os.getenv("FETCH_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        host_interval=float(os.getenv("FETCH_HOST_INTERVAL", 1.0)),
+        cache=PageCache(
+            cache_dir / "pages.sqlite3",
+            ttl=float(os.getenv("FETCH_CACHE_TTL", DEFAULT_CACHE_TTL)),
+            max_age=float(os.getenv("FETCH_CACHE_MAX_AGE", DEFAULT_CACHE_MAX_AGE)),
+            max_entries=int(
+                os.getenv("FETCH_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES)
+            )
+        )
+    )
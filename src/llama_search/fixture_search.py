@@ -0,0 +1,54 @@
+"""
+Recorded search results for offline runs of the Llama Search research assistant.
+"""
+
+from typing import Dict, List
+from pathlib import Path
+import hashlib
+import json
+import time
+
+from .search_cache import normalize_query
+
+SEARCH_FIXTURES = Path(__file__).parent / "fixtures" / "search.json"
+
+class FixtureSearch:
+    """Raw search backend replaying recorded results instead of calling DuckDuckGo."""
+
+    def __init__(self, path: Path = SEARCH_FIXTURES, latency: float = 0.0):
+        """
+        Initialize the backend.
+
+        Args:
+            path: JSON file mapping queries to lists of raw result dicts
+            latency: Seconds each search sleeps to simulate the network
+        """
+        self.normalize = normalize_query
+        self.latency = latency
+        data = json.loads(path.read_text())
+        self.fixtures = {
+            normalize_query(query): results for query, results in data.items()
+        }
+
+    @property
+    def queries(self) -> List[str]:
+        """Queries that have recorded results."""
+        return list(self.fixtures)
+
+    def __call__(self, query: str) -> List[Dict[str, str]]:
+        """Return the recorded results for a query, or made-up ones if it has none."""
+        if self.latency:
+            time.sleep(self.latency)
+        recorded = self.fixtures.get(self.normalize(query))
+        if recorded is not None:
+            return recorded
+        slug = hashlib.sha256(query.encode()).hexdigest()[:8]
+        return [
+            {
+                'title': f"{query} ({i})",
+                'link': f"https://example{i}.org/{slug}",
+                'snippet': f"Result {i} about {query}.",
+                'date': ""
+            }
+            for i in range(1, 6)
+        ]
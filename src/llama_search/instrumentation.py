@@ -0,0 +1,288 @@
+"""
+Per-query latency, token and tool-call instrumentation for the Llama Search
+research assistant.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from functools import lru_cache
+import json
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+@dataclass
+class StageMetrics:
+    """Measurements for one pipeline stage."""
+
+    stage: str
+    agent: str
+    source: str = "agent"
+    wall_time: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_requests: int = 0
+    steps: int = 0
+    callback_seconds: float = 0.0
+    tool_calls: Dict[str, int] = field(default_factory=dict)
+    tool_seconds: Dict[str, float] = field(default_factory=dict)
+    retries: int = 0
+    context_tokens: int = 0
+    context_tokens_before: int = 0
+    first_token_time: Optional[float] = None
+
+    def record_step(self, step: Any):
+        """Count an agent step, and the tool call and failed attempt it may contain."""
+        self.steps += 1
+        tool = getattr(step, 'tool', None)
+        if not tool:
+            return
+        self.tool_calls[tool] = self.tool_calls.get(tool, 0) + 1
+        result = str(getattr(step, 'result', '') or '')
+        if result.startswith(("Error", "I encountered an error")):
+            self.retries += 1
+
+@dataclass
+class QueryMetrics:
+    """Measurements for one query across all stages."""
+
+    query: str
+    route: str = "full"
+    started: float = field(default_factory=time.time)
+    total_time: float = 0.0
+    stages: List[StageMetrics] = field(default_factory=list)
+    task_seconds: Dict[str, float] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    budget_hits: List[str] = field(default_factory=list)
+
+    def add_stage(self, stage: str, agent: str) -> StageMetrics:
+        """Start recording a stage."""
+        metrics = StageMetrics(stage=stage, agent=agent)
+        self.stages.append(metrics)
+        return metrics
+
+    @contextmanager
+    def stage(self, stage: str, agent: str) -> Iterator[StageMetrics]:
+        """Time a stage and make it the target of token and step recording."""
+        metrics = self.add_stage(stage, agent)
+        token = current_stage.set(metrics)
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_time = time.perf_counter() - start
+            current_stage.reset(token)
+
+    def totals(self) -> Dict[str, int]:
+        """Token and tool-call totals across stages."""
+        return {
+            'prompt_tokens': sum(s.prompt_tokens for s in self.stages),
+            'completion_tokens': sum(s.completion_tokens for s in self.stages),
+            'tool_calls': sum(sum(s.tool_calls.values()) for s in self.stages),
+            'context_tokens_saved': sum(
+                s.context_tokens_before - s.context_tokens for s in self.stages
+            ),
+            'retries': sum(s.retries for s in self.stages)
+        }
+
+    def callback_overhead(self) -> float:
+        """Mean seconds the step callback held up an agent step."""
+        steps = sum(s.steps for s in self.stages)
+        return sum(s.callback_seconds for s in self.stages) / steps if steps else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the metrics as a JSON-serializable dict."""
+        return dict(asdict(self), **self.totals())
+
+current_stage: ContextVar[Optional[StageMetrics]] = ContextVar(
+    "current_stage", default=None
+)
+
+def token_usage(agent: Any) -> Tuple[int, int, int]:
+    """Cumulative (prompt, completion, requests) counts recorded by a crewAI agent."""
+    process = getattr(agent, '_token_process', None)
+    if process is None:
+        return 0, 0, 0
+    summary = process.get_summary()
+    return (
+        getattr(summary, 'prompt_tokens', 0),
+        getattr(summary, 'completion_tokens', 0),
+        getattr(summary, 'successful_requests', 0)
+    )
+
+@contextmanager
+def track_tokens(agent: Any) -> Iterator[None]:
+    """Add the tokens an agent uses inside the block to the current stage."""
+    before = token_usage(agent)
+    try:
+        yield
+    finally:
+        stage = current_stage.get()
+        if stage is not None:
+            after = token_usage(agent)
+            stage.prompt_tokens += after[0] - before[0]
+            stage.completion_tokens += after[1] - before[1]
+            stage.llm_requests += after[2] - before[2]
+
+def timed_tool(name: str, func: Callable[[str], str]) -> Callable[[str], str]:
+    """Wrap a tool function so its run time is added to the current stage."""
+    def wrapper(tool_input: str) -> str:
+        start = time.perf_counter()
+        try:
+            return func(tool_input)
+        finally:
+            stage = current_stage.get()
+            if stage is not None:
+                elapsed = time.perf_counter() - start
+                stage.tool_seconds[name] = stage.tool_seconds.get(name, 0.0) + elapsed
+
+    return wrapper
+
+class MetricsRecorder:
+    """Aggregates query metrics and exports them as JSON lines and Prometheus text."""
+
+    def __init__(
+        self,
+        log_path: Optional[Path] = None,
+        prom_path: Optional[Path] = None
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            log_path: JSONL file receiving one record per query
+            prom_path: File rewritten with a Prometheus text snapshot after each query
+        """
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self.last: Optional[QueryMetrics] = None
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._query_seconds = 0.0
+        self._routes: Dict[str, Dict[str, float]] = {}
+        self._stages: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._tools: Dict[str, int] = {}
+        self._tool_seconds: Dict[str, float] = {}
+        self._budget_hits: Dict[str, int] = {}
+        self._exporters: Dict[str, Callable[[], List[str]]] = {}
+
+    def record(self, metrics: QueryMetrics):
+        """Add a finished query to the aggregates and write the exports."""
+        with self._lock:
+            self.last = metrics
+            self._queries += 1
+            self._query_seconds += metrics.total_time
+            route = self._routes.setdefault(metrics.route, {'count': 0, 'seconds': 0.0})
+            route['count'] += 1
+            route['seconds'] += metrics.total_time
+            for stage in metrics.stages:
+                totals = self._stages.setdefault(
+                    (stage.stage, stage.source),
+                    {'count': 0, 'seconds': 0.0, 'prompt_tokens': 0,
+                     'completion_tokens': 0, 'retries': 0, 'callback_seconds': 0.0}
+                )
+                totals['count'] += 1
+                totals['seconds'] += stage.wall_time
+                totals['prompt_tokens'] += stage.prompt_tokens
+                totals['completion_tokens'] += stage.completion_tokens
+                totals['retries'] += stage.retries
+                totals['callback_seconds'] += stage.callback_seconds
+                for tool, count in stage.tool_calls.items():
+                    self._tools[tool] = self._tools.get(tool, 0) + count
+                for tool, seconds in stage.tool_seconds.items():
+                    total = self._tool_seconds.get(tool, 0.0)
+                    self._tool_seconds[tool] = total + seconds
+            for budget in metrics.budget_hits:
+                self._budget_hits[budget] = self._budget_hits.get(budget, 0) + 1
+            self.export(metrics)
+
+    def export(self, metrics: QueryMetrics):
+        """Append the query record and rewrite the Prometheus snapshot."""
+        try:
+            if self.log_path:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(metrics.to_dict()) + "\n")
+            if self.prom_path:
+                self.prom_path.write_text(self._prometheus_text())
+        except OSError as e:
+            logger.error(f"Failed to export metrics: {e}")
+
+    def set_exporter(self, name: str, exporter: Callable[[], List[str]]):
+        """Add (or replace) a source of extra lines for the Prometheus snapshot."""
+        with self._lock:
+            self._exporters[name] = exporter
+
+    def mean_seconds(self, route: str) -> Optional[float]:
+        """Average total time of the queries that took a route, if any did."""
+        with self._lock:
+            totals = self._routes.get(route)
+            return totals['seconds'] / totals['count'] if totals else None
+
+    def prometheus_text(self) -> str:
+        """Prometheus exposition-format snapshot of the aggregates."""
+        with self._lock:
+            return self._prometheus_text()
+
+    def _prometheus_text(self) -> str:
+        """Build the snapshot; the caller holds the lock."""
+        lines = [
+            "# TYPE llama_search_queries_total counter",
+            f"llama_search_queries_total {self._queries}",
+            "# TYPE llama_search_query_seconds_total counter",
+            f"llama_search_query_seconds_total {self._query_seconds:.6f}",
+            "# TYPE llama_search_route_queries_total counter"
+        ]
+        for route, totals in sorted(self._routes.items()):
+            lines.append(
+                f'llama_search_route_queries_total{{route="{route}"}} {totals["count"]}'
+            )
+        metric_names = {
+            'count': 'llama_search_stage_runs_total',
+            'seconds': 'llama_search_stage_seconds_total',
+            'prompt_tokens': 'llama_search_stage_prompt_tokens_total',
+            'completion_tokens': 'llama_search_stage_completion_tokens_total',
+            'retries': 'llama_search_stage_retries_total',
+            'callback_seconds': 'llama_search_stage_callback_seconds_total'
+        }
+        for key, name in metric_names.items():
+            lines.append(f"# TYPE {name} counter")
+            for (stage, source), totals in sorted(self._stages.items()):
+                labels = f'stage="{stage}",source="{source}"'
+                lines.append(f'{name}{{{labels}}} {totals[key]}')
+        lines.append("# TYPE llama_search_tool_calls_total counter")
+        for tool, count in sorted(self._tools.items()):
+            lines.append(f'llama_search_tool_calls_total{{tool="{tool}"}} {count}')
+        lines.append("# TYPE llama_search_tool_seconds_total counter")
+        for tool, seconds in sorted(self._tool_seconds.items()):
+            lines.append(
+                f'llama_search_tool_seconds_total{{tool="{tool}"}} {seconds:.6f}'
+            )
+        lines.append("# TYPE llama_search_budget_hits_total counter")
+        for budget, count in sorted(self._budget_hits.items()):
+            lines.append(f'llama_search_budget_hits_total{{budget="{budget}"}} {count}')
+        for exporter in self._exporters.values():
+            lines.extend(exporter())
+        return "\n".join(lines) + "\n"
+
+@lru_cache(maxsize=None)
+def get_metrics_recorder() -> MetricsRecorder:
+    """Return the process-wide metrics recorder configured from the environment."""
+    log_path = os.getenv("METRICS_LOG")
+    prom_path = os.getenv("METRICS_PROM_FILE")
+    return MetricsRecorder(
+        log_path=Path(log_path) if log_path else None,
+        prom_path=Path(prom_path) if prom_path else None
+    )
@@ -0,0 +1,230 @@
+"""
+LLM completion cache for the Llama Search research assistant.
+
+Completions are keyed by model, a hash of the full prompt and the sampling
+parameters. Stages listed as near-match stages can also reuse the output of
+an earlier, slightly reworded query whose hashed term vector is close enough.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+from pathlib import Path
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_NEAR_THRESHOLD = 0.9
+DEFAULT_NEAR_STAGES = "analyze_intent,plan_queries"
+VECTOR_DIMENSIONS = 1024
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for',
+    'from', 'how', 'i', 'in', 'is', 'it', 'me', 'of', 'on', 'or', 'please', 'tell',
+    'that', 'the', 'to', 'what', 'when', 'where', 'which', 'who', 'why', 'with'
+}
+WORD_PATTERN = re.compile(r"\w+")
+
+def query_vector(text: str) -> Dict[int, float]:
+    """Unit-length hashed term-frequency vector of text without stop words."""
+    vector: Dict[int, float] = {}
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        digest = hashlib.blake2b(word.encode('utf-8'), digest_size=4).digest()
+        index = int.from_bytes(digest, 'big') % VECTOR_DIMENSIONS
+        vector[index] = vector.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {index: value / norm for index, value in vector.items()}
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two unit-length sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+def completion_key(model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """Exact cache key for a completion request."""
+    payload = json.dumps(
+        {'model': model, 'prompt': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+         'params': params},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    """SQLite-backed completion cache bounded by total stored bytes."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        near_stages: Iterable[str] = (),
+        near_threshold: float = DEFAULT_NEAR_THRESHOLD
+    ):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite database file
+            max_bytes: Completion bytes kept before least recently used are evicted
+            near_stages: Stages that may reuse completions for similar queries
+            near_threshold: Minimum cosine similarity for a near match
+        """
+        self.max_bytes = max_bytes
+        self.near_stages = set(near_stages)
+        self.near_threshold = near_threshold
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, stage TEXT, model TEXT, vector TEXT, "
+            "value TEXT, size INTEGER, last_access REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS completions_stage ON completions(stage, model)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, stage: str, model: str, query: str) -> Optional[str]:
+        """
+        Look up a completion, falling back to a near match for near-match stages.
+
+        Args:
+            key: Exact key from completion_key
+            stage: Task ID the completion belongs to
+            model: Model that produced the completion
+            query: The user's query, used for near matching
+
+        Returns:
+            The cached completion, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, value FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+            elif stage in self.near_stages:
+                row = self._nearest(stage, model, query)
+                if row is not None:
+                    self.near_hits += 1
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE completions SET last_access = ? WHERE key = ?",
+                (time.time(), row[0])
+            )
+            self._conn.commit()
+        return row[1]
+
+    def _nearest(self, stage: str, model: str, query: str) -> Optional[Tuple[str, str]]:
+        """Find the most similar earlier query's completion above the threshold."""
+        target = query_vector(query)
+        best: Optional[Tuple[str, str]] = None
+        best_score = self.near_threshold
+        rows = self._conn.execute(
+            "SELECT key, vector, value FROM completions WHERE stage = ? AND model = ?",
+            (stage, model)
+        )
+        for key, vector, value in rows:
+            stored = {
+                int(index): weight for index, weight in json.loads(vector).items()
+            }
+            score = cosine(target, stored)
+            if score >= best_score:
+                best, best_score = (key, value), score
+        return best
+
+    def put(self, key: str, stage: str, model: str, query: str, value: str):
+        """Store a completion and evict old ones beyond the byte budget."""
+        size = len(value.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, model, json.dumps(query_vector(query)), value, size,
+                 time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Delete least recently used completions until within the byte budget."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY last_access"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM completions WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} cached completions")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit counters, hit rate and stored size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size
+        }
+
+    def report(self) -> str:
+        """One-line summary of cache effectiveness."""
+        stats = self.stats()
+        return (
+            f"LLM cache: {stats['hit_rate']:.0%} hit rate "
+            f"({stats['hits']} exact, {stats['near_hits']} near, "
+            f"{stats['misses']} misses), "
+            f"{stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB"
+        )
+
+@lru_cache(maxsize=None)
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when LLM_CACHE is disabled."""
+    if os.getenv("LLM_CACHE", "true").lower() != "true":
+        return None
+    cache_dir = Path(os.getenv("CREW_CACHE_DIR", "./cache"))
+    near_stages = os.getenv("LLM_CACHE_NEAR_STAGES", DEFAULT_NEAR_STAGES)
+    near_threshold = os.getenv("LLM_CACHE_NEAR_THRESHOLD", DEFAULT_NEAR_THRESHOLD)
+    return LLMCache(
+        cache_dir / "llm.sqlite3",
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        near_stages=[name.strip() for name in near_stages.split(",") if name.strip()],
+        near_threshold=float(near_threshold)
+    )
@@ -0,0 +1,115 @@
+"""
+Fallback between model endpoints for the Llama Search research assistant.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+import threading
+import time
+
+import litellm
+
+from .streaming import litellm_stream
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SATURATION_ERROR_NAMES = (
+    'RateLimitError', 'ServiceUnavailableError', 'Timeout', 'APIConnectionError',
+    'InternalServerError'
+)
+SATURATION_ERRORS = tuple(
+    getattr(litellm, name) for name in SATURATION_ERROR_NAMES if hasattr(litellm, name)
+) or (ConnectionError, TimeoutError)
+
+class FallbackChain:
+    """
+    Sends an LLM's calls to the next model in a chain when one is saturated.
+
+    A model that fails with a rate-limit, overload, timeout or connection
+    error is skipped for cooldown seconds, so later calls go straight to the
+    next model instead of waiting on the saturated endpoint again. The last
+    model in the chain is always tried.
+    """
+
+    def __init__(self, llms: List[Any], cooldown: float = 30.0):
+        """
+        Initialize the chain.
+
+        Args:
+            llms: The primary LLM followed by its fallbacks, in order of preference
+            cooldown: Seconds a saturated model is skipped
+        """
+        self.models = [getattr(llm, 'model', str(llm)) for llm in llms]
+        self.cooldown = cooldown
+        self._calls: List[Callable] = [llm.call for llm in llms]
+        self._streams: List[Callable[[List[Dict[str, str]]], Iterator[str]]] = [
+            self.stream_fn(llm) for llm in llms
+        ]
+        self._saturated_until = [0.0] * len(llms)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stream_fn(llm: Any) -> Callable[[List[Dict[str, str]]], Iterator[str]]:
+        """The function streaming a completion from one LLM."""
+        stream = getattr(llm, 'stream', None)
+        if callable(stream):
+            return stream
+        return lambda messages: litellm_stream(llm, messages)
+
+    def attach(self, llm: Any) -> Any:
+        """Route the primary LLM's calls through the chain and return it."""
+        llm.call = self.call
+        llm.stream = self.stream
+        return llm
+
+    def candidates(self) -> List[int]:
+        """Indexes of the models to try, skipping those cooling down."""
+        now = time.monotonic()
+        with self._lock:
+            ready = [i for i, until in enumerate(self._saturated_until) if until <= now]
+        last = len(self.models) - 1
+        return ready if last in ready else ready + [last]
+
+    def saturated(self, index: int, error: Exception):
+        """Put a model into cooldown after it failed with a saturation error."""
+        with self._lock:
+            self._saturated_until[index] = time.monotonic() + self.cooldown
+        logger.warning(
+            f"Model {self.models[index]} is saturated ({type(error).__name__}); "
+            "falling back"
+        )
+
+    def call(
+        self,
+        messages: List[Dict[str, str]],
+        callbacks: Optional[List[Any]] = None
+    ) -> str:
+        """Call the first available model, moving down the chain on saturation."""
+        error: Optional[Exception] = None
+        for i in self.candidates():
+            try:
+                if callbacks is None:
+                    return self._calls[i](messages)
+                return self._calls[i](messages, callbacks)
+            except SATURATION_ERRORS as e:
+                self.saturated(i, e)
+                error = e
+        raise error
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream from the first model that starts answering."""
+        error: Optional[Exception] = None
+        for i in self.candidates():
+            try:
+                chunks = iter(self._streams[i](messages))
+                first = next(chunks, None)
+            except SATURATION_ERRORS as e:
+                self.saturated(i, e)
+                error = e
+                continue
+            if first is not None:
+                yield first
+            yield from chunks
+            return
+        raise error
@@ -2,29 +2,28 @@
 Main entry point for the Llama Search research assistant.
 """
 
-from typing import Dict, List, Optional, Any
-import logging
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional
 from pathlib import Path
-import yaml
+import argparse
+import logging
+import os
 import sys
-import json
 
-from crewai import Task, Crew
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.markdown import Markdown
 from rich.prompt import Prompt
+from rich.table import Table
 from rich.logging import RichHandler
 
-from .agents import (
-    init_agents,
-    intent_analyzer,
-    query_planner,
-    search_agent,
-    content_evaluator,
-    synthesis_agent
-)
+from .agents import init_agents
+from .batch import BatchRunner, open_source, read_queries
+from .display import StepDisplay, display_mode
+from .instrumentation import QueryMetrics, get_metrics_recorder
+from .pipeline import ResearchPipeline
+from .streaming import iterate_in_thread
 
 # Configure logging with rich
 logging.basicConfig(
@@ -45,123 +44,9 @@ console = Console()
 # Load environment variables
 load_dotenv()
 
-def load_task_configs() -> Dict:
-    """Load task configurations from YAML file."""
-    config_path = Path(__file__).parent / "config" / "tasks.yaml"
-    logger.debug(f"Loading task configurations from: {config_path}")
-    try:
-        with open(config_path, 'r') as f:
-            configs = yaml.safe_load(f)['tasks']
-            logger.debug(f"Loaded task configurations: {json.dumps(configs, indent=2)}")
-            return configs
-    except Exception as e:
-        logger.error(f"Failed to load task configurations: {e}", exc_info=True)
-        raise
-
-def create_tasks(query: str) -> List[Task]:
-    """
-    Create tasks based on YAML configurations.
-
-    Args:
-        query: The user's query to use in task descriptions
-    """
-    logger.debug("Creating tasks from configurations")
-    configs = load_task_configs()
-    agent_map = {
-        'intent_analyzer': intent_analyzer,
-        'query_planner': query_planner,
-        'search_agent': search_agent,
-        'content_evaluator': content_evaluator,
-        'synthesis_agent': synthesis_agent
-    }
-    logger.debug(f"Available agents: {list(agent_map.keys())}")
-
-    tasks = []
-    task_map = {}  # Store tasks by ID for dependency resolution
-
-    # First pass: Create all tasks
-    for task_id, config in configs.items():
-        logger.debug(f"\nCreating task: {task_id}")
-        logger.debug(f"Task config: {json.dumps(config, indent=2)}")
-
-        try:
-            # Format task description with context and query
-            context_str = "\n".join([f"- {item}" for item in config['context']])
-            description = f"{config['description']}\n\nQuery: {query}\n\nContext:\n{context_str}"
-
-            # Get the agent
-            agent = agent_map.get(config['agent'])
-            if not agent:
-                raise ValueError(f"Unknown agent: {config['agent']}")
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "true").lower() == "true"
 
-            logger.debug(f"Using agent: {agent.role}")
-            logger.debug(f"Task description: {description}")
-            logger.debug(f"Expected output: {config['expected_output']}")
-
-            task = Task(
-                description=description,
-                agent=agent,
-                expected_output=config['expected_output']
-            )
-            logger.debug(f"Created task with description: {task.description}")
-
-            tasks.append(task)
-            task_map[task_id] = task
-
-        except Exception as e:
-            logger.error(f"Failed to create task {task_id}: {e}", exc_info=True)
-            raise
-
-    # Second pass: Set up dependencies
-    for task_id, config in configs.items():
-        if 'dependencies' in config:
-            task = task_map[task_id]
-            dependencies = [task_map[dep_id] for dep_id in config['dependencies']]
-            task.context = dependencies
-            logger.debug(f"Set dependencies for task {task_id}: {config['dependencies']}")
-
-    logger.debug(f"Created {len(tasks)} tasks")
-    return tasks
-
-def display_agent_thoughts(agent: str, thought: str):
-    """Display agent's thought process in a panel."""
-    if not thought:
-        return
-
-    logger.debug(f"Agent Thought - {agent}: {thought}")
-
-    # Clean up the thought text
-    thought_text = thought.replace("Thought:", "").strip()
-    if not thought_text:
-        return
-
-    console.print(Panel(
-        Markdown(thought_text),
-        title=f"[bold yellow]{agent}[/bold yellow]",
-        subtitle="[yellow]Thought Process[/yellow]",
-        border_style="yellow",
-        padding=(1, 2)
-    ))
-
-def display_agent_task(agent: str, task: str):
-    """Display agent's current task in a panel."""
-    if not task:
-        return
-
-    logger.debug(f"Agent Task - {agent}: {task}")
-
-    # Clean up the task text
-    task_text = task.replace("Task:", "").strip()
-    if not task_text:
-        return
-
-    console.print(Panel(
-        Markdown(task_text),
-        title=f"[bold blue]{agent}[/bold blue]",
-        subtitle="[blue]Current Task[/blue]",
-        border_style="blue",
-        padding=(1, 2)
-    ))
+step_display = StepDisplay(console, quiet=display_mode() == 'quiet')
 
 def display_result(result: str):
     """Display research results in a formatted panel."""
@@ -173,9 +58,78 @@ def display_result(result: str):
         padding=(1, 2)
     ))
 
+def display_streaming_result(chunks: Iterable[str]) -> str:
+    """Render research results in a panel that updates as chunks arrive."""
+    text = ""
+
+    def render() -> Panel:
+        return Panel(
+            Markdown(text),
+            title="[bold green]Research Results[/bold green]",
+            border_style="green",
+            padding=(1, 2)
+        )
+
+    with Live(render(), console=console, refresh_per_second=8) as live:
+        for chunk in chunks:
+            text += chunk
+            live.update(render())
+    return text
+
+def context_cell(after: int, before: int) -> str:
+    """Format a stage's context size, and its size before compression if it shrank."""
+    if not before:
+        return ""
+    return f"{after} (from {before})" if after < before else str(after)
+
+def display_metrics(metrics: Optional[QueryMetrics]):
+    """Display per-stage latency, token and tool-call figures for a query."""
+    if metrics is None:
+        return
+
+    caption = f"{metrics.route.capitalize()} path"
+    if metrics.critical_path:
+        caption += f", critical path: {' -> '.join(metrics.critical_path)}"
+    if metrics.budget_hits:
+        caption += f", budgets hit: {', '.join(metrics.budget_hits)}"
+    if any(stage.steps for stage in metrics.stages):
+        caption += f", step callback {metrics.callback_overhead() * 1e6:.0f}µs/step"
+    table = Table(title="Run Summary", title_style="bold magenta", caption=caption)
+    columns = (
+        "Stage", "Source", "Time (s)", "Tool time (s)", "Context tok",
+        "Prompt tok", "Completion tok", "Tool calls", "Retries"
+    )
+    for column in columns:
+        justify = "left" if column in ("Stage", "Source") else "right"
+        table.add_column(column, justify=justify)
+    for stage in metrics.stages:
+        table.add_row(
+            stage.stage,
+            stage.source,
+            f"{stage.wall_time:.2f}",
+            f"{sum(stage.tool_seconds.values()):.2f}",
+            context_cell(stage.context_tokens, stage.context_tokens_before),
+            str(stage.prompt_tokens),
+            str(stage.completion_tokens),
+            str(sum(stage.tool_calls.values())),
+            str(stage.retries)
+        )
+    totals = metrics.totals()
+    table.add_row(
+        "[bold]total[/bold]", "",
+        f"{metrics.total_time:.2f}",
+        f"{sum(sum(s.tool_seconds.values()) for s in metrics.stages):.2f}",
+        f"-{totals['context_tokens_saved']}" if totals['context_tokens_saved'] else "",
+        str(totals['prompt_tokens']),
+        str(totals['completion_tokens']),
+        str(totals['tool_calls']),
+        str(totals['retries'])
+    )
+    console.print(table)
+
 def display_error(error: str):
     """Display error message in a panel."""
-    logger.debug(f"Displaying error: {error}")
+    logger.debug("Displaying error: %s", error)
     console.print(Panel(
         f"[red]{error}[/red]",
         title="[bold red]Error[/bold red]",
@@ -203,85 +157,112 @@ def process_query(query: str) -> Any:
         query: The research query to process
 
     Returns:
-        Any: The final research result with citations
+        str: The final research result with citations
     """
-    logger.debug(f"Processing query: {query}")
+    logger.debug("Processing query: %s", query)
     try:
         # Initialize agents with query context
-        logger.info(f"Initializing agents with query: {query}")
+        logger.info("Initializing agents with query: %s", query)
         agents_with_context = init_agents(query)
 
-        # Create tasks with query context
-        tasks = create_tasks(query)
-        logger.debug(f"Created {len(tasks)} tasks for processing")
-
-        # Debug task configurations
-        for i, task in enumerate(tasks):
-            logger.debug(f"Task {i+1}:")
-            logger.debug(f"  Description: {task.description}")
-            logger.debug(f"  Agent: {task.agent.role}")
-            logger.debug(f"  Expected Output: {task.expected_output}")
-            if hasattr(task, 'context') and task.context:
-                logger.debug(f"  Dependencies: {[t.description for t in task.context]}")
-
-        # Create crew
-        logger.debug("Creating crew with agents and tasks")
-        crew = Crew(
-            agents=[
-                agents_with_context['intent_analyzer'],
-                agents_with_context['query_planner'],
-                agents_with_context['search_agent'],
-                agents_with_context['content_evaluator'],
-                agents_with_context['synthesis_agent']
-            ],
-            tasks=tasks,
-            verbose=True,
-            step_callback=lambda agent, task, step, input_: handle_step_callback(agent, task, step, input_)
+        pipeline = ResearchPipeline(
+            agents_with_context, step_callback=step_display.step_callback
         )
 
-        # Process query
-        logger.info("Starting crew kickoff")
-        result = crew.kickoff(inputs={'query': query})
-        logger.info("Crew processing completed")
+        logger.info("Starting research pipeline")
+        result = pipeline.run(query)
+        logger.info("Research pipeline completed")
         return result
 
     except Exception as e:
         logger.error(f"Error processing query: {e}", exc_info=True)
         raise
 
-def handle_step_callback(agent, task, step, input_):
-    """Handle crew step callback with detailed logging."""
-    try:
-        # Log the step details
-        logger.debug(f"\nStep Details:")
-        logger.debug(f"Agent: {getattr(agent, 'role', 'Unknown') if agent else 'Unknown'}")
-        logger.debug(f"Task: {getattr(task, 'description', 'Unknown') if task else 'Unknown'}")
-        logger.debug(f"Input: {input_}")
-        logger.debug(f"Step: {step}")
-
-        # Display the agent's task if we have one
-        if agent and task and hasattr(agent, 'role'):
-            display_agent_task(agent.role, task.description)
-
-        # If this is a thought step, display it
-        if step and "Thought:" in step and agent and hasattr(agent, 'role'):
-            display_agent_thoughts(agent.role, step)
+def stream_query(query: str) -> Iterator[str]:
+    """
+    Process a research query, yielding the final answer as it is generated.
 
-        return None  # Callback must return None
+    Args:
+        query: The research query to process
 
-    except Exception as e:
-        logger.error(f"Error in step callback: {e}", exc_info=True)
-        return None
+    Yields:
+        str: Chunks of the final research result
+    """
+    logger.info("Initializing agents with query: %s", query)
+    pipeline = ResearchPipeline(
+        init_agents(query), step_callback=step_display.step_callback
+    )
+    yield from pipeline.stream(query)
+
+async def astream_query(query: str) -> AsyncIterator[str]:
+    """Asynchronous version of stream_query."""
+    chunks = iterate_in_thread(lambda: stream_query(query))
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await chunks.aclose()
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(description="Llama Search research assistant")
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="Process queries from a JSONL or text file ('-' for stdin) and exit"
+    )
+    parser.add_argument(
+        "--output", default="results.jsonl",
+        help="JSONL file receiving batch results (default: results.jsonl)"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Queries run at once")
+    parser.add_argument(
+        "--processes", action="store_true",
+        help="Run batch queries in worker processes instead of threads"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip queries that already have a result in the output file"
+    )
+    parser.add_argument(
+        "--quiet", action="store_true",
+        help="Show no agent steps while a query runs (same as DISPLAY_MODE=quiet)"
+    )
+    return parser
+
+def run_batch(args: argparse.Namespace):
+    """Run a batch of queries non-interactively."""
+    source = open_source(args.batch)
+    try:
+        queries = read_queries(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    runner = BatchRunner(
+        process_query, workers=args.workers, use_processes=args.processes
+    )
+    counts = runner.run(queries, Path(args.output), resume=args.resume)
+    logger.info(
+        f"Batch finished: {counts['succeeded']} succeeded, {counts['failed']} failed, "
+        f"{counts['skipped']} skipped"
+    )
+
+def main(argv: Optional[List[str]] = None):
+    """Main function; prompts for queries interactively unless --batch is given."""
+    args = build_parser().parse_args(argv)
+    if args.quiet:
+        step_display.quiet = True
+    if args.batch:
+        run_batch(args)
+        return
 
-def main():
-    """Interactive main function that prompts for queries."""
     logger.info("Starting Llama Search")
     display_welcome()
 
     while True:
         try:
             query = Prompt.ask("\n[cyan]Enter your query[/cyan]").strip()
-            logger.debug(f"Received query: {query}")
+            logger.debug("Received query: %s", query)
 
             if not query:
                 logger.debug("Empty query received")
@@ -302,8 +283,14 @@ def main():
                 border_style="cyan"
             ))
 
-            result = process_query(query)
-            display_result(result)
+            if STREAM_OUTPUT:
+                display_streaming_result(stream_query(query))
+                step_display.drain()
+            else:
+                result = process_query(query)
+                step_display.drain()
+                display_result(result)
+            display_metrics(get_metrics_recorder().last)
 
         except KeyboardInterrupt:
             logger.info("Search cancelled by user")
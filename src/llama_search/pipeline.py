@@ -0,0 +1,629 @@
+"""
+Stage-by-stage execution of the research tasks for the Llama Search research assistant.
+"""
+
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple
+)
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from crewai import Task
+from dotenv import load_dotenv
+
+from .agents import init_search_client, search_and_record
+from .budgets import BudgetLimits, QueryBudget
+from .config_registry import (
+    TaskConfig,
+    get_config_registry,
+    topological_order,
+    without_tasks
+)
+from .context_budget import REVIEW_HEADING, compact_evaluation, fit_context
+from .dedupe import estimate_tokens
+from .evaluation import evaluate_results, render_evaluation
+from .fetch import excerpts, get_page_fetcher
+from .instrumentation import (
+    StageMetrics,
+    current_stage,
+    get_metrics_recorder,
+    timed_tool,
+    token_usage,
+    track_tokens
+)
+from .llm_cache import completion_key, get_llm_cache
+from .recording import get_call_recorder
+from .results import render_results
+from .router import classify_query
+from .run_context import RunState, current_run
+from .run_store import RunRecord, get_run_store
+from .scheduler import TaskScheduler, critical_path
+from .semantic_index import get_semantic_index
+from .streaming import build_messages, iterate_in_thread, stream_completion
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+StepCallback = Callable[[Any, Any, Any, Any], None]
+LocalStage = Callable[[RunState, TaskConfig], Optional[str]]
+
+class ResearchPipeline:
+    """Runs the configured tasks in dependency order, skipping the LLM where it can."""
+
+    def __init__(
+        self,
+        agents: Dict[str, Any],
+        step_callback: Optional[StepCallback] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            agents: Agents by ID, as returned by init_agents
+            step_callback: Called as (agent, task, step, input) on every agent step
+        """
+        self.agents = agents
+        self.step_callback = step_callback
+        self.local_stages: Dict[str, LocalStage] = {
+            'evaluate_content': self.evaluate_content,
+            'fetch_content': self.fetch_content
+        }
+        self.fast_stages: Dict[str, LocalStage] = {
+            'execute_search': self.direct_search
+        }
+        # Recorded and replayed runs skip the cache so every LLM call is captured
+        recording = get_call_recorder() is not None
+        self.llm_cache = None if recording else get_llm_cache()
+        self.answer_index = None if recording else get_semantic_index("answers")
+        self.prior_task = os.getenv("SEMANTIC_PRIOR_TASK", "synthesize_information")
+        self.prior_score = float(os.getenv("SEMANTIC_PRIOR_SCORE", 0.8))
+        self.prior_answers = int(os.getenv("SEMANTIC_PRIOR_ANSWERS", 2))
+        self.scheduler = TaskScheduler(
+            self.run_stage,
+            max_workers=int(os.getenv("TASK_CONCURRENCY", 4))
+        )
+        self.agent_locks = {id(agent): threading.Lock() for agent in agents.values()}
+        self._agent_copies: Dict[Tuple[str, int], Any] = {}
+        self._copies_lock = threading.Lock()
+        self.llm_review = os.getenv("EVAL_LLM_REVIEW", "true").lower() == "true"
+        self.borderline = (
+            float(os.getenv("EVAL_BORDERLINE_LOW", 45)),
+            float(os.getenv("EVAL_BORDERLINE_HIGH", 65))
+        )
+        self.context_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", 2000))
+        self.min_score = float(os.getenv("CONTEXT_MIN_SCORE", 40))
+        self.fetch_top = int(os.getenv("FETCH_TOP_RESULTS", 3))
+        self.fetch_max_chars = int(os.getenv("FETCH_MAX_CHARS", 1500))
+        self.fast_path = os.getenv("FAST_PATH", "true").lower() == "true"
+        fast_skip = os.getenv(
+            "FAST_PATH_SKIP", "analyze_intent,plan_queries,evaluate_content"
+        )
+        self.fast_skip = {task.strip() for task in fast_skip.split(",") if task.strip()}
+        self.budget_limits = BudgetLimits.from_env()
+
+    def run(self, query: str) -> str:
+        """
+        Run every task for a query.
+
+        Args:
+            query: The research query
+
+        Returns:
+            str: Output of the last task
+        """
+        run = self.new_run(query)
+        token = current_run.set(run)
+        start = time.perf_counter()
+        try:
+            self.recall(run)
+            tasks, final = self.select_tasks(run)
+            run.final_task = final
+            self.scheduler.run(run, tasks)
+            self.finish(run, tasks, time.perf_counter() - start)
+            self.remember(run, final)
+            return run.outputs[final]
+        finally:
+            current_run.reset(token)
+
+    def stream(self, query: str) -> Iterator[str]:
+        """
+        Run every task for a query, streaming the last task's output as it is generated.
+
+        Args:
+            query: The research query
+
+        Yields:
+            Chunks of the final answer
+
+        If the caller stops early (closing the generator or interrupting it),
+        the run is still recorded, but its partial answer is not indexed.
+        """
+        run = self.new_run(query)
+        context = contextvars.copy_context()
+        context.run(current_run.set, run)
+        start = time.perf_counter()
+
+        context.run(self.recall, run)
+        tasks, final_id = context.run(self.select_tasks, run)
+        run.final_task = final_id
+        final = tasks[final_id]
+        try:
+            if self.agents[final.agent].tools:
+                # Agents with tools need their reasoning loop; the answer arrives whole
+                context.run(self.scheduler.run, run, tasks)
+                yield run.outputs[final.task_id]
+            else:
+                upstream = {
+                    task_id: config for task_id, config in tasks.items()
+                    if task_id != final.task_id
+                }
+                context.run(self.scheduler.run, run, upstream)
+                chunks = []
+                generator = self.stream_agent(run, final)
+                try:
+                    # Each step runs in the run's context, like every other stage
+                    for chunk in iter(lambda: context.run(next, generator, None), None):
+                        chunks.append(chunk)
+                        yield chunk
+                finally:
+                    context.run(generator.close)
+                    run.outputs[final.task_id] = "".join(chunks)
+        except (GeneratorExit, KeyboardInterrupt):
+            context.run(self.finish, run, tasks, time.perf_counter() - start)
+            raise
+        context.run(self.finish, run, tasks, time.perf_counter() - start)
+        context.run(self.remember, run, final_id)
+
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """Asynchronous version of stream."""
+        chunks = iterate_in_thread(lambda: self.stream(query))
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def new_run(self, query: str) -> RunState:
+        """Create the state of a query run and start its budget."""
+        run = RunState(query=query)
+        run.budget = QueryBudget(self.budget_limits, run.metrics)
+        return run
+
+    def recall(self, run: RunState):
+        """Look up answers to similar earlier queries as prior evidence for the run."""
+        if self.answer_index is None:
+            return
+        try:
+            hits = self.answer_index.search(
+                run.query, k=self.prior_answers, min_score=self.prior_score
+            )
+        except Exception as e:
+            logger.error(f"Semantic index lookup failed: {e}")
+            return
+        if not hits:
+            return
+        run.prior = "\n\n".join(
+            f"Earlier research on \"{hit.query}\" (similarity {hit.score:.2f}):\n"
+            f"{hit.payload['answer']}"
+            for hit in hits
+        )
+        logger.info(f"Found {len(hits)} earlier answers related to the query")
+
+    def remember(self, run: RunState, final: str):
+        """Add the run's answer and its sources to the semantic index."""
+        if self.answer_index is None or not run.outputs.get(final):
+            return
+        try:
+            self.answer_index.add([(run.query, {
+                'answer': run.outputs[final],
+                'sources': [result.url for result in run.results]
+            })])
+        except Exception as e:
+            logger.error(f"Failed to index the answer: {e}")
+
+    def select_tasks(self, run: RunState) -> Tuple[Dict[str, TaskConfig], str]:
+        """
+        Choose the tasks to run for a query and the task whose output is the answer.
+
+        Simple lookups take the fast path, which leaves out the FAST_PATH_SKIP
+        tasks and searches directly for the query.
+        """
+        registry = get_config_registry()
+        tasks = registry.tasks()
+        route = classify_query(run.query) if self.fast_path else None
+        if route is None or not route.fast or not self.fast_skip & set(tasks):
+            return tasks, registry.task_order()[-1]
+
+        selected = without_tasks(tasks, self.fast_skip)
+        run.metrics.route = route.name
+        logger.info(
+            f"Taking the fast path ({route.reason}), skipping "
+            f"{', '.join(t for t in tasks if t not in selected)}"
+        )
+        return selected, topological_order(selected)[-1]
+
+    def finish(self, run: RunState, tasks: Dict[str, TaskConfig], elapsed: float):
+        """Record the run's metrics; log its critical path, dedup and cache figures."""
+        run.metrics.total_time = elapsed
+        path, seconds = critical_path(tasks, run.metrics.task_seconds)
+        run.metrics.critical_path = path
+        logger.info(f"Critical path ({seconds:.2f}s): {' -> '.join(path)}")
+        recorder = get_metrics_recorder()
+        full_path_mean = recorder.mean_seconds("full")
+        recorder.record(run.metrics)
+        if run.metrics.route == "fast" and full_path_mean is not None:
+            logger.info(
+                f"Fast path took {elapsed:.2f}s, {full_path_mean - elapsed:.2f}s less "
+                f"than the full-path average"
+            )
+        self.store_run(run, tasks)
+
+        stats = run.dedup.stats()
+        logger.info(
+            f"Deduplication kept {stats['kept']} results, dropped {stats['dropped']} "
+            f"(~{stats['tokens_saved']} tokens saved)"
+        )
+        if self.llm_cache:
+            logger.info(self.llm_cache.report())
+        logger.info(init_search_client().report())
+
+    def store_run(self, run: RunState, tasks: Dict[str, TaskConfig]):
+        """Add a compact record of the run and each of its stages to the run store."""
+        metrics = run.metrics
+        store = get_run_store()
+        stages = {stage.stage: stage for stage in metrics.stages}
+        for task_id, config in tasks.items():
+            stage = stages.get(config.label)
+            if stage is None:
+                continue
+            store.add(RunRecord(
+                kind='stage',
+                task_id=task_id,
+                query=metrics.query,
+                timestamp=metrics.started,
+                data={
+                    'agent': stage.agent,
+                    'source': stage.source,
+                    'seconds': round(
+                        metrics.task_seconds.get(task_id, stage.wall_time), 3
+                    ),
+                    'prompt_tokens': stage.prompt_tokens,
+                    'completion_tokens': stage.completion_tokens
+                }
+            ))
+        store.add(RunRecord(
+            kind='run', query=metrics.query, timestamp=metrics.started,
+            data=dict(
+                metrics.totals(),
+                route=metrics.route,
+                total_time=round(metrics.total_time, 3),
+                critical_path=metrics.critical_path,
+                budget_hits=metrics.budget_hits
+            )
+        ))
+        store.flush()
+
+    def run_stage(self, run: RunState, config: TaskConfig) -> str:
+        """
+        Run one task, preferring its local implementation when it has one.
+
+        Once the query's time or token budget has run out, every task but the
+        final one is replaced by what the run already has, so the answer is
+        synthesized from the evidence gathered so far.
+        """
+        with run.metrics.stage(config.label, config.agent) as stage:
+            exhausted = run.budget is not None and run.budget.exhausted()
+            if config.task_id != run.final_task and exhausted:
+                stage.source = "degraded"
+                return self.degraded_output(run, config)
+            local = self.local_stages.get(config.task_id)
+            if run.metrics.route == "fast":
+                local = self.fast_stages.get(config.task_id, local)
+            if local:
+                output = local(run, config)
+                if output is not None:
+                    stage.source = "local+agent" if stage.steps else "local"
+                    return output
+            if config.local:
+                raise ValueError(
+                    f"Task {config.task_id} is marked local but has no pipeline stage"
+                )
+            context = self.build_context(run, config)
+            return self.run_agent(config, config.render_description(run.query), context)
+
+    def degraded_output(self, run: RunState, config: TaskConfig) -> str:
+        """Stand-in output for a task skipped because the query's budget ran out."""
+        if config.task_id == 'evaluate_content' and run.results:
+            return self.evaluate_content(run, config)
+        if self.agents[config.agent].tools and run.results:
+            return render_results(run.results)
+        return "Skipped: the query's time or token budget ran out."
+
+    def build_context(self, run: RunState, config: TaskConfig) -> str:
+        """
+        Join a task's upstream outputs, compressed to its context token budget.
+
+        The budget comes from the task's context_budget setting, falling back
+        to CONTEXT_TOKEN_BUDGET; sizes before and after go to the stage metrics.
+        Answers to similar earlier queries are added for SEMANTIC_PRIOR_TASK.
+        """
+        budget = config.context_budget
+        if budget is None:
+            budget = self.context_budget
+        outputs = {dep: run.outputs[dep] for dep in config.dependencies}
+        if run.prior and config.task_id == self.prior_task:
+            outputs['prior_research'] = run.prior
+        context, before, after = fit_context(
+            outputs,
+            run.query,
+            budget,
+            compactors={
+                'evaluate_content': lambda share: self.compact_evaluation(run, share)
+            }
+        )
+        stage = current_stage.get()
+        if stage is not None:
+            stage.context_tokens = after
+            stage.context_tokens_before = before
+        if after < before:
+            logger.info(
+                f"Compressed context for {config.label}: {before} -> {after} tokens"
+            )
+        return context
+
+    def compact_evaluation(self, run: RunState, budget: int) -> Optional[str]:
+        """Shorten the evaluation output from its scores, if it was scored locally."""
+        if not run.scored:
+            return None
+        review = run.outputs['evaluate_content'].partition(REVIEW_HEADING)[2].strip()
+        return compact_evaluation(run.query, run.scored, budget, self.min_score, review)
+
+    def run_agent(self, config: TaskConfig, description: str, context: str) -> str:
+        """
+        Run a task's agent on a description and upstream context.
+
+        Stages whose agent has no tools are served from the LLM cache when an
+        identical (or, for near-match stages, similar) request was seen before.
+        """
+        agent = self.agent_for(config)
+        if agent.tools or not self.llm_cache:
+            return self.execute_task(agent, config, description, context)
+
+        model, key = self.cache_key(agent, config, description, context)
+        query = current_run.get().query
+        cached = self.llm_cache.get(key, config.task_id, model, query)
+        if cached is not None:
+            logger.info(f"Served task {config.task_id} from the LLM cache")
+            current_stage.get().source = "cache"
+            return cached
+
+        output = self.execute_task(agent, config, description, context)
+        self.llm_cache.put(key, config.task_id, model, query, output)
+        return output
+
+    @staticmethod
+    def cache_key(
+        agent: Any,
+        config: TaskConfig,
+        description: str,
+        context: str
+    ) -> Tuple[str, str]:
+        """Return the model name and LLM cache key for a task request."""
+        model = getattr(agent.llm, 'model', str(agent.llm))
+        prompt = "\n".join(
+            (agent.role, agent.goal, agent.backstory, description, context,
+             config.expected_output)
+        )
+        params = {'temperature': getattr(agent.llm, 'temperature', None)}
+        return model, completion_key(model, prompt, params)
+
+    def stream_agent(self, run: RunState, config: TaskConfig) -> Iterator[str]:
+        """
+        Stream a tool-free task's answer straight from its agent's model.
+
+        The agent's reasoning loop is bypassed so tokens reach the caller as
+        soon as they are generated; cached answers are yielded in one piece.
+        """
+        agent = self.agent_for(config)
+        description = config.render_description(run.query)
+        stage = run.metrics.add_stage(config.label, config.agent)
+        stage.source = "stream"
+        token = current_stage.set(stage)
+        try:
+            context = self.build_context(run, config)
+        finally:
+            current_stage.reset(token)
+        start = time.perf_counter()
+
+        model, key = self.cache_key(agent, config, description, context)
+        cached = None
+        if self.llm_cache:
+            cached = self.llm_cache.get(key, config.task_id, model, run.query)
+        if cached is not None:
+            stage.source = "cache"
+            chunks: Iterable[str] = [cached]
+        else:
+            messages = build_messages(
+                agent, description, config.expected_output, context
+            )
+            prompt = "".join(message['content'] for message in messages)
+            stage.prompt_tokens = estimate_tokens(prompt)
+            chunks = stream_completion(agent.llm, messages)
+
+        output = []
+        try:
+            for chunk in chunks:
+                if stage.first_token_time is None:
+                    stage.first_token_time = time.perf_counter() - start
+                output.append(chunk)
+                yield chunk
+        finally:
+            stage.wall_time = time.perf_counter() - start
+            run.metrics.task_seconds[config.task_id] = stage.wall_time
+
+        answer = "".join(output)
+        if cached is None:
+            stage.completion_tokens = estimate_tokens(answer)
+            if self.llm_cache:
+                self.llm_cache.put(key, config.task_id, model, run.query, answer)
+
+    def execute_task(
+        self,
+        agent: Any,
+        config: TaskConfig,
+        description: str,
+        context: str
+    ) -> str:
+        """Execute a task with its agent, recording its steps and token usage."""
+        with self.agent_locks[id(agent)]:
+            agent.step_callback = self.make_step_callback(
+                agent, current_stage.get(), config
+            )
+            task = Task(
+                description=description,
+                agent=agent,
+                expected_output=config.expected_output
+            )
+            logger.info(f"Running task {config.label}")
+            with track_tokens(agent):
+                return task.execute_sync(context=context or None).raw
+
+    def agent_for(self, config: TaskConfig) -> Any:
+        """
+        Return the agent for a task.
+
+        Fan-out branches each get their own copy of the agent so they can run
+        at the same time; other tasks sharing an agent take turns.
+        """
+        agent = self.agents[config.agent]
+        if not config.instance:
+            return agent
+        key = (config.agent, config.instance)
+        with self._copies_lock:
+            if key not in self._agent_copies:
+                copy = agent.copy()
+                self._agent_copies[key] = copy
+                self.agent_locks[id(copy)] = threading.Lock()
+            return self._agent_copies[key]
+
+    def make_step_callback(
+        self,
+        agent: Any,
+        stage: Optional[StageMetrics],
+        config: TaskConfig
+    ) -> Callable[[Any], None]:
+        """
+        Adapt the pipeline step callback to the single-argument agent callback.
+
+        After each tool step the stage and query budgets are checked; once one
+        is exceeded the agent is made to give its final answer next.
+        """
+        run = current_run.get()
+        budget = run.budget if run else None
+        started = time.monotonic()
+        before = token_usage(agent)
+
+        def callback(step: Any):
+            if stage is not None:
+                stage.record_step(step)
+            if self.step_callback:
+                start = time.perf_counter()
+                task = getattr(agent.agent_executor, 'task', None)
+                self.step_callback(agent, task, getattr(step, 'text', str(step)), None)
+                if stage is not None:
+                    stage.callback_seconds += time.perf_counter() - start
+            if budget is not None and getattr(step, 'tool', None):
+                used = token_usage(agent)
+                tokens = used[0] + used[1] - before[0] - before[1]
+                if budget.stage_exceeded(config, time.monotonic() - started, tokens):
+                    self.force_final_answer(agent)
+
+        return callback
+
+    @staticmethod
+    def force_final_answer(agent: Any):
+        """
+        End an agent's reasoning loop after its current step.
+
+        Lowering the executor's iteration limit to the iterations already run
+        makes crewAI ask for the final answer instead of another tool call,
+        so the stage still returns an answer built from what it has.
+        """
+        executor = getattr(agent, 'agent_executor', None)
+        if executor is not None and hasattr(executor, 'iterations'):
+            executor.max_iter = min(executor.max_iter, executor.iterations)
+
+    def evaluate_content(self, run: RunState, config: TaskConfig) -> Optional[str]:
+        """
+        Score search results locally, asking the agent only about borderline ones.
+
+        Returns None, so the agent evaluates everything, if no structured
+        results were recorded during the search stage.
+        """
+        if not run.results:
+            logger.info("No recorded search results; evaluating with the agent")
+            return None
+
+        scored = evaluate_results(run.query, run.results, self.borderline)
+        run.scored = scored
+        output = render_evaluation(scored)
+        borderline = [item for item in scored if item.borderline]
+        logger.info(
+            f"Scored {len(scored)} results locally, {len(borderline)} borderline"
+        )
+        if not (borderline and self.llm_review) or (run.budget and run.budget.degraded):
+            return output
+
+        description = (
+            f"{config.description}\n\nQuery: {run.query}\n\n"
+            "Only these borderline results need your judgement. For each, state "
+            "whether it should be kept for the summary and adjust its total score."
+        )
+        review = self.run_agent(config, description, render_evaluation(borderline))
+        return f"{output}\n\n{REVIEW_HEADING}\n{review}"
+
+    def fetch_content(self, run: RunState, config: TaskConfig) -> Optional[str]:
+        """
+        Fetch the top-ranked search results and return excerpts of their main text.
+
+        Results are taken best rank first across all searches, so each query
+        contributes its top hit before any second hits are fetched.
+        """
+        if not (run.results and self.fetch_top):
+            return "No pages were fetched."
+
+        top = sorted(run.results, key=lambda result: result.rank)[:self.fetch_top]
+        start = time.perf_counter()
+        fetcher = get_page_fetcher()
+        timeout = 3 * fetcher.timeout
+        time_left = run.budget.time_left(config) if run.budget else None
+        if time_left is not None:
+            timeout = min(timeout, time_left)
+        pages = fetcher.fetch_all((result.url for result in top), timeout=timeout)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Fetched {len(pages)}/{len(top)} pages in {elapsed:.2f}s")
+        sections = [
+            f"### {result.title}\n{result.url}\n"
+            + "\n".join(excerpts(pages[result.url], self.fetch_max_chars))
+            for result in top if result.url in pages
+        ]
+        return "\n\n".join(sections) or "No pages were fetched."
+
+    def direct_search(self, run: RunState, config: TaskConfig) -> Optional[str]:
+        """Search for the query itself, without the agent planning or calling tools."""
+        stage = current_stage.get()
+        stage.tool_calls['web_search'] = stage.tool_calls.get('web_search', 0) + 1
+        return timed_tool('web_search', search_and_record)(run.query)
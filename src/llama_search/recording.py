@@ -0,0 +1,215 @@
+"""
+Record and replay of LLM and search calls for the Llama Search research assistant.
+"""
+
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from collections import deque
+from pathlib import Path
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from .results import SearchResult
+from .streaming import litellm_stream
+from .stub_llm import report_usage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+MODES = ('off', 'record', 'replay')
+STREAM_CHUNK_WORDS = 4
+
+SearchFn = Callable[[str], List[SearchResult]]
+
+class ReplayMissError(LookupError):
+    """Raised when a replayed run makes a call that was not recorded."""
+
+def call_key(kind: str, payload: Any) -> str:
+    """Stable key identifying a call by its kind and full input."""
+    data = json.dumps({'kind': kind, 'payload': payload}, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+class CallRecorder:
+    """
+    Writes LLM and search calls to a JSONL log, or serves them back from one.
+
+    Each line holds the kind of call, a hash of its input, its response and
+    how long it took. On replay, calls are matched by that hash; repeated
+    identical calls are served in the order they were recorded.
+    """
+
+    def __init__(self, mode: str, path: Path, latency_scale: float = 1.0):
+        """
+        Initialize the recorder.
+
+        Args:
+            mode: 'record' to append calls to path, 'replay' to serve them from it
+            path: Location of the JSONL log
+            latency_scale: Fraction of the recorded latency slept on replay; 0 disables
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(
+                f"Recorder mode must be 'record' or 'replay', not {mode!r}"
+            )
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+        if mode == 'replay':
+            self.load()
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self):
+        """Read the recorded calls into per-key queues."""
+        with open(self.path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry['key'], deque()).append(entry)
+        count = sum(map(len, self._entries.values()))
+        logger.info(f"Loaded {count} recorded calls from {self.path}")
+
+    def write(self, entry: Dict[str, Any]):
+        """Append one call to the log."""
+        with self._lock, open(self.path, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def take(self, kind: str, key: str, description: str) -> Dict[str, Any]:
+        """Return the next recorded entry for a key, or the last one once exhausted."""
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            entry = self._last.get(key)
+        if entry is None:
+            raise ReplayMissError(f"No recorded {kind} call for {description}")
+        return entry
+
+    def sleep(self, seconds: float):
+        """Simulate recorded latency."""
+        if self.latency_scale and seconds > 0:
+            time.sleep(seconds * self.latency_scale)
+
+    def wrap_llm(self, llm: Any) -> Any:
+        """
+        Route an LLM's calls through the recorder.
+
+        The LLM object is kept, so agents still see the LLM they expect; only
+        its call and stream methods are replaced. Wrapping twice is a no-op.
+        """
+        if getattr(llm, '_recorder', None) is self:
+            return llm
+        model = getattr(llm, 'model', str(llm))
+        call = llm.call
+        stream = getattr(llm, 'stream', None)
+        if not callable(stream):
+            def stream(messages: List[Dict[str, str]]) -> Iterator[str]:
+                return litellm_stream(llm, messages)
+
+        def recorded_call(
+            messages: List[Dict[str, str]],
+            callbacks: Optional[List[Any]] = None
+        ) -> str:
+            key = call_key('llm', {'model': model, 'messages': messages})
+            if self.mode == 'replay':
+                entry = self.take('llm', key, f"model {model}")
+                self.sleep(entry['seconds'])
+                report_usage(callbacks or [], messages, entry['response'])
+                return entry['response']
+            start = time.perf_counter()
+            if callbacks is not None:
+                response = call(messages, callbacks)
+            else:
+                response = call(messages)
+            self.write({
+                'kind': 'llm', 'key': key, 'model': model,
+                'seconds': round(time.perf_counter() - start, 4), 'response': response
+            })
+            return response
+
+        def recorded_stream(messages: List[Dict[str, str]]) -> Iterator[str]:
+            key = call_key('llm_stream', {'model': model, 'messages': messages})
+            if self.mode == 'replay':
+                yield from self.replay_stream(self.take('llm', key, f"model {model}"))
+                return
+            start = time.perf_counter()
+            first_token = None
+            chunks = []
+            for chunk in stream(messages):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                chunks.append(chunk)
+                yield chunk
+            self.write({
+                'kind': 'llm_stream', 'key': key, 'model': model,
+                'seconds': round(time.perf_counter() - start, 4),
+                'first_token': round(first_token or 0.0, 4), 'response': "".join(chunks)
+            })
+
+        llm.call = recorded_call
+        llm.stream = recorded_stream
+        llm._recorder = self
+        return llm
+
+    def replay_stream(self, entry: Dict[str, Any]) -> Iterator[str]:
+        """Yield a recorded streamed response in chunks spread over its duration."""
+        words = entry['response'].split(" ")
+        chunks = [
+            " ".join(words[i:i + STREAM_CHUNK_WORDS])
+            for i in range(0, len(words), STREAM_CHUNK_WORDS)
+        ]
+        chunks = [chunk + " " for chunk in chunks[:-1]] + chunks[-1:]
+        self.sleep(entry.get('first_token', 0.0))
+        gap = (entry['seconds'] - entry.get('first_token', 0.0)) / max(len(chunks), 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                self.sleep(gap)
+            yield chunk
+
+    def wrap_search(self, search_fn: SearchFn) -> SearchFn:
+        """Route a search function's calls through the recorder."""
+        def recorded_search(query: str) -> List[SearchResult]:
+            key = call_key('search', query)
+            if self.mode == 'replay':
+                entry = self.take('search', key, f"query {query!r}")
+                self.sleep(entry['seconds'])
+                return [SearchResult.from_dict(result) for result in entry['response']]
+            start = time.perf_counter()
+            results = search_fn(query)
+            self.write({
+                'kind': 'search', 'key': key, 'query': query,
+                'seconds': round(time.perf_counter() - start, 4),
+                'response': [result.to_dict() for result in results]
+            })
+            return results
+
+        return recorded_search
+
+@lru_cache(maxsize=None)
+def get_call_recorder() -> Optional[CallRecorder]:
+    """Return the process-wide call recorder, or None when RECORD_MODE is off."""
+    mode = os.getenv("RECORD_MODE", "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"RECORD_MODE must be one of {', '.join(MODES)}")
+    if mode == 'off':
+        return None
+    cache_dir = Path(os.getenv("CREW_CACHE_DIR", "./cache"))
+    path = Path(os.getenv("RECORD_LOG", str(cache_dir / "recording.jsonl")))
+    return CallRecorder(
+        mode,
+        path,
+        latency_scale=float(os.getenv("REPLAY_LATENCY_SCALE", 1.0))
+    )
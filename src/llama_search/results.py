@@ -0,0 +1,78 @@
+"""
+Structured search results for the Llama Search research assistant.
+"""
+
+from typing import Any, Dict, List
+
+SNIPPET_CHARS = 240
+
+class SearchResult:
+    """A single search hit as it moves between pipeline stages."""
+
+    __slots__ = ('title', 'url', 'snippet', 'date', 'rank', 'query', 'canonical_url')
+
+    def __init__(
+        self,
+        title: str,
+        url: str,
+        snippet: str = "",
+        date: str = "",
+        rank: int = 0,
+        query: str = "",
+        canonical_url: str = ""
+    ):
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.date = date
+        self.rank = rank
+        self.query = query
+        self.canonical_url = canonical_url or url
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any], rank: int, query: str) -> "SearchResult":
+        """Build a result from a DuckDuckGo result dict."""
+        return cls(
+            title=raw.get('title', '') or 'Untitled',
+            url=raw.get('link') or raw.get('url', ''),
+            snippet=raw.get('snippet') or raw.get('body', ''),
+            date=raw.get('date', ''),
+            rank=rank,
+            query=query
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a plain dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        """Rebuild a result from to_dict output."""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def render(self, number: int, snippet_chars: int = SNIPPET_CHARS) -> str:
+        """Compact text form of the result for an LLM prompt."""
+        heading = f"[{number}] {self.title}"
+        if self.date:
+            heading += f" ({self.date})"
+        return f"{heading}\n{self.url}\n{truncate(self.snippet, snippet_chars)}"
+
+    def __repr__(self) -> str:
+        return f"SearchResult(rank={self.rank}, url={self.url!r})"
+
+def truncate(text: str, limit: int) -> str:
+    """Shorten text to at most limit characters, cutting at a word boundary."""
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + "..."
+
+def render_results(
+    results: List[SearchResult],
+    snippet_chars: int = SNIPPET_CHARS
+) -> str:
+    """Render results as numbered title/URL/snippet blocks."""
+    if not results:
+        return "No results found."
+    return "\n\n".join(
+        result.render(i, snippet_chars) for i, result in enumerate(results, 1)
+    )
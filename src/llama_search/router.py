@@ -0,0 +1,59 @@
+"""
+Query routing between the fast and full research paths.
+"""
+
+from typing import NamedTuple
+import re
+
+FACTUAL_PREFIXES = (
+    'what is', "what's", 'what are', 'what was', 'who is', 'who was', 'who wrote',
+    'who invented', 'when did', 'when was', 'when is', 'where is', 'where was',
+    'how many', 'how much', 'how old', 'how tall', 'how far', 'how long is',
+    'define', 'definition of', 'meaning of', 'capital of', 'population of'
+)
+# Regular expressions matched as whole words, with the inflections that matter
+COMPLEX_MARKERS = (
+    r'compar(?:e|es|ed|ing|isons?)', r'vs', 'versus', 'difference between',
+    'pros and cons', r'(?:dis)?advantages?', 'why', 'how does', 'how do', 'how can',
+    r'explain(?:s|ed|ing)?', r'analy[sz](?:e|es|ed|ing|is)', r'impacts?', r'effects?',
+    'latest', r'recent(?:ly)?', 'news', r'trends?', r'reviews?', 'best', 'should i',
+    'research', 'overview', 'history of', 'future'
+)
+COMPLEX_PATTERN = re.compile(r"\b(" + "|".join(COMPLEX_MARKERS) + r")\b")
+MULTI_PART_MARKERS = (' and ', ';', ' also ', ' as well as ')
+MAX_FAST_WORDS = 10
+MAX_LOOKUP_WORDS = 3
+
+class Route(NamedTuple):
+    """The path chosen for a query and why."""
+
+    fast: bool
+    reason: str
+
+    @property
+    def name(self) -> str:
+        """'fast' or 'full'."""
+        return "fast" if self.fast else "full"
+
+def classify_query(query: str) -> Route:
+    """
+    Decide whether a query is a simple lookup that can take the fast path.
+
+    Short factual questions ("who wrote Dune", "capital of Peru") qualify;
+    long, multi-part, comparative, explanatory or time-sensitive queries
+    take the full path.
+    """
+    text = " ".join(query.lower().split())
+    words = len(text.split())
+    if words > MAX_FAST_WORDS:
+        return Route(False, f"{words} words")
+    marker = COMPLEX_PATTERN.search(text)
+    if marker:
+        return Route(False, f"contains '{marker.group(1)}'")
+    if text.count('?') > 1 or any(m in f" {text} " for m in MULTI_PART_MARKERS):
+        return Route(False, "several questions")
+    if text.startswith(FACTUAL_PREFIXES):
+        return Route(True, "factual question")
+    if words <= MAX_LOOKUP_WORDS:
+        return Route(True, "short lookup")
+    return Route(False, "open-ended")
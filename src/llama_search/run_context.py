@@ -0,0 +1,58 @@
+"""
+Per-query state shared between pipeline stages and tools.
+"""
+
+from typing import Dict, List, Optional
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import threading
+
+from .budgets import QueryBudget
+from .dedupe import ResultDeduplicator
+from .evaluation import ScoredResult
+from .instrumentation import QueryMetrics
+from .results import SearchResult
+
+@dataclass
+class RunState:
+    """Everything a single query run has produced so far."""
+
+    query: str
+    outputs: Dict[str, str] = field(default_factory=dict)
+    results: List[SearchResult] = field(default_factory=list)
+    scored: List[ScoredResult] = field(default_factory=list)
+    prior: str = ""
+    final_task: str = ""
+    budget: Optional[QueryBudget] = None
+    dedup: ResultDeduplicator = field(default_factory=ResultDeduplicator)
+    metrics: QueryMetrics = field(init=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self.metrics = QueryMetrics(query=self.query)
+
+current_run: ContextVar[Optional[RunState]] = ContextVar("current_run", default=None)
+
+def record_results(results: List[SearchResult]) -> List[SearchResult]:
+    """
+    Deduplicate search results and add the new ones to the active run.
+
+    Without an active run, results are only deduplicated among themselves.
+
+    Returns:
+        The results not seen earlier in the run
+    """
+    run = current_run.get()
+    if run is None:
+        return ResultDeduplicator().filter(results)
+    with run.lock:
+        unique = run.dedup.filter(results)
+        run.results.extend(unique)
+    return unique
+
+def take_searches(wanted: int) -> int:
+    """Number of the wanted searches the active run's budget allows; all without one."""
+    run = current_run.get()
+    if run is None or run.budget is None:
+        return wanted
+    return run.budget.take_searches(wanted)
@@ -0,0 +1,264 @@
+"""
+Bounded history of tasks and query runs for the Llama Search research assistant.
+"""
+
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from functools import lru_cache
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_CAPACITY = 1000
+
+@dataclass
+class RunRecord:
+    """
+    One entry of the history.
+
+    kind is 'created' for tasks made by TaskManager, 'stage' for a task run
+    by the pipeline and 'run' for a whole query.
+    """
+
+    kind: str
+    task_id: str = ""
+    query: str = ""
+    timestamp: float = field(default_factory=time.time)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def matches(
+        self,
+        kind: Optional[str],
+        task_id: Optional[str],
+        query: Optional[str],
+        since: Optional[float],
+        until: Optional[float]
+    ) -> bool:
+        """Whether the record passes the filters of RunStore.find."""
+        return (
+            (kind is None or self.kind == kind)
+            and (task_id is None or self.task_id == task_id)
+            and (query is None or query.lower() in self.query.lower())
+            and (since is None or self.timestamp >= since)
+            and (until is None or self.timestamp < until)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the record as a plain dict."""
+        return asdict(self)
+
+class RunStore:
+    """
+    Keeps recent records in a fixed-size ring buffer and older ones on disk.
+
+    Records are appended to an indexed SQLite log when they are flushed, at
+    the latest when they are pushed out of the buffer, so memory stays
+    constant under sustained load while the full history remains queryable
+    by time, task ID and query. Flushed records stay in the buffer too, and
+    remember their row in the log so searches do not return them twice.
+    """
+
+    def __init__(self, path: Optional[Path] = None, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite database receiving flushed records; with None, records
+                leaving the buffer are dropped
+            capacity: Number of most recent records held in memory
+        """
+        self.capacity = capacity
+        # Each record with its row ID in the log, or None until it is written
+        self._recent: Deque[Tuple[RunRecord, Optional[int]]] = deque()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "id INTEGER PRIMARY KEY, kind TEXT, task_id TEXT, query TEXT, "
+                "timestamp REAL, data TEXT)"
+            )
+            for column in ('timestamp', 'task_id', 'query'):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS records_{column} ON records({column})"
+                )
+            self._conn.commit()
+
+    def add(self, record: RunRecord):
+        """Add a record, writing the oldest one to disk if the buffer is full."""
+        with self._lock:
+            self._recent.append((record, None))
+            if len(self._recent) > self.capacity:
+                oldest, row_id = self._recent.popleft()
+                if row_id is None:
+                    self._write([oldest])
+
+    def _write(self, records: List[RunRecord]) -> List[Optional[int]]:
+        """Append records to the disk log and return their row IDs; hold the lock."""
+        if self._conn is None or not records:
+            return [None] * len(records)
+        row_ids = [
+            self._conn.execute(
+                "INSERT INTO records (kind, task_id, query, timestamp, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (r.kind, r.task_id, r.query, r.timestamp, json.dumps(r.data))
+            ).lastrowid
+            for r in records
+        ]
+        self._conn.commit()
+        return row_ids
+
+    def flush(self):
+        """
+        Write buffered records that are not on disk yet, keeping them in memory.
+
+        The pipeline flushes after every run, since process pool workers exit
+        without running atexit handlers.
+        """
+        with self._lock:
+            if self._conn is None:
+                return
+            unwritten = [
+                i for i, (_, row_id) in enumerate(self._recent) if row_id is None
+            ]
+            try:
+                row_ids = self._write([self._recent[i][0] for i in unwritten])
+            except sqlite3.Error as e:
+                logger.error(f"Failed to flush run store: {e}")
+                return
+            for i, row_id in zip(unwritten, row_ids):
+                self._recent[i] = (self._recent[i][0], row_id)
+
+    def find(
+        self,
+        kind: Optional[str] = None,
+        task_id: Optional[str] = None,
+        query: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100
+    ) -> List[RunRecord]:
+        """
+        Return matching records, newest first.
+
+        Args:
+            kind: Only records of this kind
+            task_id: Only records for this task
+            query: Only records whose query contains this text, ignoring case
+            since: Only records at or after this Unix time
+            until: Only records before this Unix time
+            limit: Maximum number of records returned
+        """
+        with self._lock:
+            found = [
+                (record, row_id) for record, row_id in self._recent
+                if record.matches(kind, task_id, query, since, until)
+            ]
+            if self._conn is not None:
+                # Other processes write to the same log, so its rows are merged
+                # by time rather than cut off at this buffer's oldest row; rows
+                # the buffer holds are skipped by ID
+                buffered = {row_id for _, row_id in found if row_id is not None}
+                found.extend(
+                    (record, row_id)
+                    for record, row_id in self._find_on_disk(
+                        kind, task_id, query, since, until, limit + len(buffered)
+                    )
+                    if row_id not in buffered
+                )
+        # Unwritten records have no row ID yet and sort after rows with the same time
+        found.sort(
+            key=lambda entry: (entry[0].timestamp, entry[1] or float('inf')),
+            reverse=True
+        )
+        return [record for record, _ in found[:limit]]
+
+    def _find_on_disk(
+        self,
+        kind: Optional[str],
+        task_id: Optional[str],
+        query: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+        limit: int
+    ) -> List[Tuple[RunRecord, int]]:
+        """Matching rows of the disk log, newest first; the caller holds the lock."""
+        conditions, params = [], []
+        for column, value in (('kind', kind), ('task_id', task_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if query is not None:
+            escaped = query.replace('\\', '\\\\')
+            escaped = escaped.replace('%', '\\%').replace('_', '\\_')
+            conditions.append("query LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._conn.execute(
+            f"SELECT kind, task_id, query, timestamp, data, id FROM records {where} "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [
+            (
+                RunRecord(
+                    kind=row[0], task_id=row[1], query=row[2], timestamp=row[3],
+                    data=json.loads(row[4])
+                ),
+                row[5]
+            )
+            for row in rows
+        ]
+
+    def clear(self, kind: Optional[str] = None):
+        """Remove all records, or all records of one kind, from memory and disk."""
+        with self._lock:
+            self._recent = deque(
+                entry for entry in self._recent
+                if kind is not None and entry[0].kind != kind
+            )
+            if self._conn is not None:
+                if kind is None:
+                    self._conn.execute("DELETE FROM records")
+                else:
+                    self._conn.execute("DELETE FROM records WHERE kind = ?", (kind,))
+                self._conn.commit()
+
+    def __len__(self) -> int:
+        """Number of records held in memory."""
+        return len(self._recent)
+
+@lru_cache(maxsize=None)
+def get_run_store() -> RunStore:
+    """Return the process-wide run store configured from the environment."""
+    cache_dir = Path(os.getenv("CREW_CACHE_DIR", "./cache"))
+    path = os.getenv("RUN_STORE", str(cache_dir / "runs.sqlite3"))
+    store = RunStore(
+        Path(path) if path else None,
+        capacity=int(os.getenv("RUN_STORE_CAPACITY", DEFAULT_CAPACITY))
+    )
+    atexit.register(store.flush)
+    return store
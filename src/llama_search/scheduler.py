@@ -0,0 +1,130 @@
+"""
+Dependency-aware concurrent task scheduling for the Llama Search research assistant.
+"""
+
+from typing import Callable, Dict, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import contextvars
+import logging
+import time
+
+from .config_registry import TaskConfig
+from .run_context import RunState
+from .tools.search_tools import parse_queries
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+StageRunner = Callable[[RunState, TaskConfig], str]
+
+def critical_path(
+    tasks: Dict[str, TaskConfig],
+    durations: Dict[str, float]
+) -> Tuple[List[str], float]:
+    """
+    Find the chain of dependent tasks with the largest total duration.
+
+    Args:
+        tasks: Task configurations by ID
+        durations: Wall time of each task in seconds
+
+    Returns:
+        The task IDs on the critical path, in order, and their total duration
+    """
+    finish: Dict[str, float] = {}
+    previous: Dict[str, str] = {}
+
+    def finish_time(task_id: str) -> float:
+        if task_id not in finish:
+            deps = tasks[task_id].dependencies
+            slowest = max(deps, key=finish_time, default=None)
+            if slowest is not None:
+                previous[task_id] = slowest
+            start = finish_time(slowest) if slowest is not None else 0.0
+            finish[task_id] = start + durations.get(task_id, 0.0)
+        return finish[task_id]
+
+    if not tasks:
+        return [], 0.0
+    last = max(tasks, key=finish_time)
+    path = [last]
+    while path[-1] in previous:
+        path.append(previous[path[-1]])
+    return path[::-1], finish[last]
+
+class TaskScheduler:
+    """Runs each task once its dependencies finish, fanning out branches set in YAML."""
+
+    def __init__(self, run_stage: StageRunner, max_workers: int = 4):
+        """
+        Initialize the scheduler.
+
+        Args:
+            run_stage: Function running one task for a run and returning its output
+            max_workers: Maximum number of tasks (or fan-out branches) run at once
+        """
+        self.run_stage = run_stage
+        self.max_workers = max_workers
+
+    def submit(self, executor: ThreadPoolExecutor, fn: Callable, *args) -> Future:
+        """Submit fn in a copy of the caller's context so run state is visible."""
+        return executor.submit(contextvars.copy_context().run, fn, *args)
+
+    def run(self, run: RunState, tasks: Dict[str, TaskConfig]) -> Dict[str, str]:
+        """
+        Run all tasks, respecting dependencies.
+
+        Dependencies outside tasks must already have outputs on the run.
+
+        Args:
+            run: State of the query run; outputs are stored on it
+            tasks: Task configurations by ID
+
+        Returns:
+            Task outputs by ID
+        """
+        pending = dict(tasks)
+        running: Dict[Future, str] = {}
+        executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="task")
+        with executor:
+            while pending or running:
+                ready = [
+                    task_id for task_id, config in pending.items()
+                    if all(dep in run.outputs for dep in config.dependencies)
+                ]
+                for task_id in ready:
+                    config = pending.pop(task_id)
+                    running[self.submit(executor, self.run_task, run, config)] = task_id
+                if not running:
+                    raise ValueError(f"Tasks can never become ready: {list(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_id = running.pop(future)
+                    run.outputs[task_id] = future.result()
+        return run.outputs
+
+    def run_task(self, run: RunState, config: TaskConfig) -> str:
+        """Run one task, or all of its fan-out branches, and time it."""
+        start = time.perf_counter()
+        try:
+            if not config.fan_out:
+                return self.run_stage(run, config)
+            return self.run_fan_out(run, config)
+        finally:
+            run.metrics.task_seconds[config.task_id] = time.perf_counter() - start
+
+    def run_fan_out(self, run: RunState, config: TaskConfig) -> str:
+        """Run one branch per item listed in the fan-out source task's output."""
+        items = parse_queries(run.outputs[config.fan_out], config.fan_out_max)
+        if len(items) <= 1:
+            return self.run_stage(run, config)
+
+        logger.info(f"Fanning out {config.task_id} over {len(items)} items")
+        branches = [config.for_item(item, i) for i, item in enumerate(items, 1)]
+        with ThreadPoolExecutor(len(branches), thread_name_prefix="branch") as executor:
+            futures = [self.submit(executor, self.run_stage, run, b) for b in branches]
+            outputs = [future.result() for future in futures]
+        return "\n\n".join(
+            f"### {item}\n{output}" for item, output in zip(items, outputs)
+        )
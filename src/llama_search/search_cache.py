@@ -0,0 +1,189 @@
+"""
+Persistent search result cache for the Llama Search research assistant.
+"""
+
+from typing import Any, Callable, Dict, Optional
+from pathlib import Path
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10_000
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so case, punctuation and spacing variants share an entry."""
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+class SearchCache:
+    """SQLite-backed search cache with per-entry TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite database file
+            ttl: Default time-to-live for new entries, in seconds
+            max_entries: Number of entries kept before least recently used are evicted
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, query TEXT, value TEXT, "
+            "expires REAL, last_access REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str, namespace: str = "") -> str:
+        """Build the storage key for a query."""
+        normalized = f"{namespace}:{normalize_query(query)}"
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, namespace: str = "") -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            query: The search query
+            namespace: Separates values produced by different search functions
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        key = self.make_key(query, namespace)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(
+        self,
+        query: str,
+        value: Any,
+        namespace: str = "",
+        ttl: Optional[float] = None
+    ):
+        """
+        Store a JSON-serializable value for a query.
+
+        Args:
+            query: The search query
+            value: Value to cache
+            namespace: Separates values produced by different search functions
+            ttl: Time-to-live override for this entry, in seconds
+        """
+        key = self.make_key(query, namespace)
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_query(query), json.dumps(value), expires, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones over the size bound."""
+        self._conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN "
+            "(SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+            (excess,)
+        )
+        logger.debug(f"Evicted {excess} search cache entries")
+
+    def wrap(
+        self,
+        search_fn: Callable[[str], Any],
+        namespace: str = ""
+    ) -> Callable[[str], Any]:
+        """Return a version of search_fn that reads through this cache."""
+        def cached_search(query: str) -> Any:
+            cached = self.get(query, namespace)
+            if cached is not None:
+                return cached
+            result = search_fn(query)
+            if result:
+                self.put(query, result, namespace)
+            return result
+
+        return cached_search
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current entry count."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': size
+        }
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+@lru_cache(maxsize=None)
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache configured from the environment."""
+    cache_dir = Path(os.getenv("CREW_CACHE_DIR", "./cache"))
+    cache = SearchCache(
+        cache_dir / "search.sqlite3",
+        ttl=float(os.getenv("SEARCH_CACHE_TTL", DEFAULT_TTL)),
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    )
+    logger.debug(f"Search cache opened in {cache_dir}")
+    return cache
@@ -0,0 +1,339 @@
+"""
+Rate-limited, retrying web search client for the Llama Search research assistant.
+"""
+
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from collections import deque
+import logging
+import random
+import statistics
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RawSearch = Callable[[str], List[Dict]]
+Clock = Callable[[], float]
+Sleep = Callable[[float], None]
+
+LATENCY_WINDOW = 1000
+
+class SearchUnavailableError(RuntimeError):
+    """Raised when every search backend failed or has its circuit open."""
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by every thread calling one backend."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Clock = time.monotonic,
+        sleep: Sleep = time.sleep
+    ):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second; 0 disables limiting
+            burst: Most tokens the bucket holds, and so the largest burst allowed
+            clock: Monotonic time source, in seconds
+            sleep: Waits for the given seconds
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, waiting for one if needed, and return the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            refill = (now - self._updated) * self.rate
+            self._tokens = min(self.burst, self._tokens + refill)
+            self._updated = now
+            # Taking the token up front reserves it, so waiters queue in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+class CircuitBreaker:
+    """
+    Stops calls to a backend after repeated failures.
+
+    After threshold consecutive failures the circuit opens and calls are
+    refused for reset_after seconds. Then one trial call is let through: its
+    success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        reset_after: float = 60.0,
+        clock: Clock = time.monotonic
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            threshold: Consecutive failures that open the circuit; 0 disables it
+            reset_after: Seconds the circuit stays open before a trial call
+            clock: Monotonic time source, in seconds
+        """
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self._failures = 0
+        self._opened: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'."""
+        with self._lock:
+            if self._opened is None:
+                return "closed"
+            if self.clock() - self._opened >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead."""
+        with self._lock:
+            if self._opened is None:
+                return True
+            if self._trial or self.clock() - self._opened < self.reset_after:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened = None
+            self._trial = False
+
+    def failure(self):
+        """Record a failed call, opening the circuit if there were too many."""
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self.threshold and self._failures >= self.threshold):
+                self._opened = self.clock()
+                self._trial = False
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Seconds to wait before a retry, with full jitter over an exponential ceiling."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class SearchBackend:
+    """A named search provider with its own rate limit and circuit breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        search: RawSearch,
+        bucket: TokenBucket,
+        breaker: CircuitBreaker
+    ):
+        self.name = name
+        self.search = search
+        self.bucket = bucket
+        self.breaker = breaker
+        self.calls = 0
+        self.errors = 0
+
+class SearchClient:
+    """
+    Runs searches against an ordered list of backends.
+
+    Each backend call waits for its rate limiter and is retried with
+    jittered exponential backoff. A backend whose circuit opens is skipped
+    in favour of the next one until its reset time has passed. End-to-end
+    latencies of recent searches are kept for percentile reporting.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Tuple[str, RawSearch]],
+        rate: float = 1.0,
+        burst: int = 3,
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 60.0,
+        clock: Clock = time.monotonic,
+        sleep: Sleep = time.sleep
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            backends: (name, search function) pairs, in order of preference
+            rate: Calls per second allowed to each backend; 0 disables limiting
+            burst: Calls each backend may take at once after being idle
+            retries: Retries of a failed call before moving to the next backend
+            backoff_base: Ceiling of the first retry delay, in seconds
+            backoff_max: Largest retry delay ceiling, in seconds
+            breaker_threshold: Consecutive failures that open a backend's circuit
+            breaker_reset: Seconds an open circuit waits before a trial call
+            clock: Monotonic time source for rate limits and circuit breakers
+            sleep: Waits for the given seconds, for rate limits and retries
+        """
+        if not backends:
+            raise ValueError("At least one search backend is required")
+        self.backends = [
+            SearchBackend(
+                name,
+                search,
+                TokenBucket(rate, burst, clock, sleep),
+                CircuitBreaker(breaker_threshold, breaker_reset, clock)
+            )
+            for name, search in backends
+        ]
+        self.sleep = sleep
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.searches = 0
+        self.failures = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> List[Dict]:
+        """
+        Return raw results for a query from the first backend that answers.
+
+        Raises:
+            SearchUnavailableError: If every backend failed or is unavailable
+        """
+        start = time.perf_counter()
+        error: Optional[Exception] = None
+        try:
+            for backend in self.backends:
+                if not backend.breaker.allow():
+                    logger.debug(
+                        f"Skipping search backend {backend.name}: circuit open"
+                    )
+                    continue
+                results, error = self.call(backend, query)
+                if results is not None:
+                    return results
+            with self._lock:
+                self.failures += 1
+            # Worded for the agent reading the tool output, so it moves on
+            # instead of retrying
+            raise SearchUnavailableError(
+                f"Search is unavailable ({error or 'all backends paused'}); "
+                "do not retry, continue with the information you already have"
+            )
+        finally:
+            with self._lock:
+                self.searches += 1
+                self._latencies.append(time.perf_counter() - start)
+
+    def call(
+        self,
+        backend: SearchBackend,
+        query: str
+    ) -> Tuple[Optional[List[Dict]], Optional[Exception]]:
+        """Call one backend with retries, returning its results or the last error."""
+        error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.sleep(
+                    backoff_delay(attempt - 1, self.backoff_base, self.backoff_max)
+                )
+            backend.bucket.acquire()
+            with self._lock:
+                backend.calls += 1
+            try:
+                results = backend.search(query)
+            except Exception as e:
+                with self._lock:
+                    backend.errors += 1
+                backend.breaker.failure()
+                error = e
+                logger.warning(
+                    f"Search backend {backend.name} failed for '{query}' "
+                    f"(attempt {attempt + 1}/{self.retries + 1}): {e}"
+                )
+                if backend.breaker.state != "closed":
+                    logger.error(f"Search backend {backend.name} circuit opened")
+                    break
+                continue
+            backend.breaker.success()
+            return results, None
+        return None, error
+
+    def percentiles(self) -> Dict[str, float]:
+        """p50, p95 and p99 of recent search latencies, in seconds."""
+        with self._lock:
+            latencies = list(self._latencies)
+        if len(latencies) < 2:
+            value = latencies[0] if latencies else 0.0
+            return {'p50': value, 'p95': value, 'p99': value}
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+    def stats(self) -> Dict[str, Any]:
+        """Search counts, latency percentiles and per-backend state."""
+        return dict(
+            self.percentiles(),
+            searches=self.searches,
+            failures=self.failures,
+            backends={
+                backend.name: {
+                    'calls': backend.calls,
+                    'errors': backend.errors,
+                    'state': backend.breaker.state
+                }
+                for backend in self.backends
+            }
+        )
+
+    def report(self) -> str:
+        """One-line summary for logging."""
+        p = self.percentiles()
+        states = ", ".join(f"{b.name} {b.breaker.state}" for b in self.backends)
+        return (
+            f"Search latency p50 {p['p50']:.2f}s, p95 {p['p95']:.2f}s, "
+            f"p99 {p['p99']:.2f}s "
+            f"over {self.searches} searches, {self.failures} failed ({states})"
+        )
+
+    def prometheus_lines(self) -> List[str]:
+        """Prometheus exposition-format lines for the search metrics."""
+        p = self.percentiles()
+        lines = [
+            "# TYPE llama_search_search_seconds summary",
+            *(
+                f'llama_search_search_seconds{{quantile="{q}"}} {p[key]:.6f}'
+                for q, key in (("0.5", 'p50'), ("0.95", 'p95'), ("0.99", 'p99'))
+            ),
+            f"llama_search_search_seconds_count {self.searches}",
+            "# TYPE llama_search_search_failures_total counter",
+            f"llama_search_search_failures_total {self.failures}",
+            "# TYPE llama_search_search_backend_errors_total counter"
+        ]
+        lines.extend(
+            f'llama_search_search_backend_errors_total{{backend="{b.name}"}} {b.errors}'
+            for b in self.backends
+        )
+        lines.append("# TYPE llama_search_search_backend_open gauge")
+        for b in self.backends:
+            is_open = int(b.breaker.state == "open")
+            lines.append(
+                f'llama_search_search_backend_open{{backend="{b.name}"}} {is_open}'
+            )
+        return lines
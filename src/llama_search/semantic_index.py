@@ -0,0 +1,329 @@
+"""
+Semantic index of past research for the Llama Search research assistant.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from pathlib import Path
+from functools import lru_cache
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .evaluation import tokenize
+from .results import SearchResult
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+DIMS = 1024
+CANDIDATES_PER_HIT = 8
+BIGRAM_WEIGHT = 0.5
+
+class IndexHit(NamedTuple):
+    """An indexed entry and its similarity to the text searched for."""
+
+    score: float
+    query: str
+    payload: Any
+    timestamp: float
+
+def embed(text: str, dims: int = DIMS) -> np.ndarray:
+    """
+    Hash a text's words and word pairs into a unit-length term-frequency vector.
+
+    Each feature lands in a bucket chosen by its CRC32, with a sign taken from
+    another bit of the hash so collisions tend to cancel out. Word pairs count
+    for less than words, so reworded queries still match closely.
+    """
+    tokens = tokenize(text)
+    features = [(token, 1.0) for token in tokens] + [
+        (f"{a} {b}", BIGRAM_WEIGHT) for a, b in zip(tokens, tokens[1:])
+    ]
+    counts: Dict[int, List[float]] = {}
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode('utf-8'))
+        counts.setdefault(h, [0, weight])[0] += 1
+    vector = np.zeros(dims, dtype=np.float32)
+    for h, (count, weight) in counts.items():
+        sign = 1.0 if h & 0x80000000 else -1.0
+        vector[h % dims] += sign * weight * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticIndex:
+    """
+    Flat vector index of texts and their payloads, persisted to disk.
+
+    Vectors are appended to a float32 file that is memory-mapped rather than
+    read, so opening the index costs the same however large it grows; entry
+    metadata lives in SQLite and is looked up only for the best matches.
+    Similarity is the cosine of IDF-weighted vectors, with document
+    frequencies kept up to date as entries are added.
+
+    Several processes may share one index: an entry's row number is its
+    offset in the vector file, writers take SQLite's write lock before
+    choosing rows, and readers pick up entries added elsewhere before each
+    search.
+    """
+
+    def __init__(self, path: Path, dims: int = DIMS):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: Directory holding the vector file and metadata database
+            dims: Length of the hashed vectors
+        """
+        self.dims = dims
+        self._lock = threading.Lock()
+        self._vectors_path = path / "vectors.f32"
+
+        path.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(path / "entries.sqlite3"), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "row INTEGER PRIMARY KEY, query TEXT, payload TEXT, timestamp REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS df ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), counts BLOB)"
+        )
+        self._conn.commit()
+
+        self._size = 0
+        self._df = np.zeros(dims)
+        self._norms: Optional[np.ndarray] = None
+        self._vectors = self._map()
+        with self._lock:
+            self._refresh()
+
+    def _map(self, size: Optional[int] = None) -> np.ndarray:
+        """Memory-map the first size stored vectors, all committed ones by default."""
+        size = self._size if size is None else size
+        if not size:
+            return np.zeros((0, self.dims), dtype=np.float32)
+        return np.memmap(
+            self._vectors_path, dtype=np.float32, mode='r', shape=(size, self.dims)
+        )
+
+    def _stored(self) -> Tuple[int, Optional[bytes]]:
+        """Committed entry count and document frequencies; the caller holds the lock."""
+        size = self._conn.execute(
+            "SELECT COALESCE(MAX(row) + 1, 0) FROM entries"
+        ).fetchone()[0]
+        counts = self._conn.execute("SELECT counts FROM df WHERE id = 0").fetchone()
+        return size, counts[0] if counts else None
+
+    def _refresh(self):
+        """Pick up entries added by other processes; the caller holds the lock."""
+        # Both reads come from one snapshot, so the counts match the entries
+        self._conn.execute("BEGIN")
+        try:
+            size, counts = self._stored()
+        finally:
+            self._conn.commit()
+        if size == self._size:
+            return
+        self._size = size
+        self._df = self._document_frequencies(size, counts)
+        self._norms = None
+        self._vectors = self._map()
+
+    def _document_frequencies(self, size: int, counts: Optional[bytes]) -> np.ndarray:
+        """Decode stored document frequencies, or count them from the vectors."""
+        if counts is not None:
+            return np.frombuffer(counts, dtype=np.float64).copy()
+        if not size:
+            return np.zeros(self.dims)
+        return (self._map(size) != 0).sum(axis=0).astype(np.float64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, entries: Iterable[Tuple[str, Any]]):
+        """
+        Append entries to the index.
+
+        Args:
+            entries: (query, payload) tuples; each is indexed by its query text
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        vectors = np.stack([embed(query, self.dims) for query, _ in entries])
+        now = time.time()
+        with self._lock:
+            # Holding SQLite's write lock keeps other processes off the same rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                size, counts = self._stored()
+                df = self._document_frequencies(size, counts)
+                df += (vectors != 0).sum(axis=0)
+                mode = 'r+b' if self._vectors_path.exists() else 'wb'
+                with open(self._vectors_path, mode) as f:
+                    # Rows past the stored size are left over from an interrupted add
+                    f.seek(size * self.dims * 4)
+                    f.write(vectors.tobytes())
+                    f.truncate()
+                self._conn.executemany(
+                    "INSERT INTO entries (row, query, payload, timestamp) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (size + i, query, json.dumps(payload), now)
+                        for i, (query, payload) in enumerate(entries)
+                    ]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO df (id, counts) VALUES (0, ?)",
+                    (df.tobytes(),)
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._size = size + len(entries)
+            self._df = df
+            self._norms = None
+            self._vectors = self._map()
+
+    def search(
+        self,
+        text: str,
+        k: int = 5,
+        min_score: float = 0.0,
+        max_age: Optional[float] = None
+    ) -> List[IndexHit]:
+        """
+        Return the entries most similar to a text, best first.
+
+        Args:
+            text: Text to search for
+            k: Maximum number of hits
+            min_score: Only hits with at least this cosine similarity
+            max_age: Only entries added within this many seconds
+        """
+        with self._lock:
+            self._refresh()
+            if not self._size:
+                return []
+            idf = np.log((1 + self._size) / (1 + self._df)) + 1
+            weights = (idf * idf).astype(np.float32)
+            if self._norms is None:
+                self._norms = np.sqrt(np.square(self._vectors) @ weights)
+            query = embed(text, self.dims)
+            query_norm = float(np.sqrt(np.square(query) @ weights))
+            if not query_norm:
+                return []
+            norms = np.maximum(self._norms, 1e-9) * query_norm
+            scores = (self._vectors @ (query * weights)) / norms
+
+            wanted = k * CANDIDATES_PER_HIT if max_age is not None else k
+            count = min(self._size, wanted)
+            top = np.argpartition(-scores, count - 1)[:count]
+            top = top[np.argsort(-scores[top])]
+            top = [int(row) for row in top if scores[row] >= min_score]
+            if not top:
+                return []
+            rows = self._conn.execute(
+                f"SELECT row, query, payload, timestamp FROM entries "
+                f"WHERE row IN ({','.join('?' * len(top))})",
+                top
+            ).fetchall()
+
+        entries = {row[0]: row[1:] for row in rows}
+        oldest = time.time() - max_age if max_age is not None else None
+        hits = []
+        for row in top:
+            query_text, payload, timestamp = entries[row]
+            if oldest is None or timestamp >= oldest:
+                hits.append(IndexHit(
+                    float(scores[row]), query_text, json.loads(payload), timestamp
+                ))
+        return hits[:k]
+
+    def wrap_search(
+        self,
+        search_fn: Callable[[str], List[SearchResult]],
+        min_score: float,
+        max_age: float
+    ) -> Callable[[str], List[SearchResult]]:
+        """
+        Skip searches the index already covers and index the results of the rest.
+
+        A search is covered when a recent earlier search for a query at
+        least min_score similar returned results; those are returned instead.
+        """
+        def indexed_search(query: str) -> List[SearchResult]:
+            try:
+                hits = self.search(query, k=1, min_score=min_score, max_age=max_age)
+            except Exception as e:
+                logger.error(f"Semantic index lookup failed for '{query}': {e}")
+                hits = []
+            if hits and hits[0].payload:
+                hit = hits[0]
+                logger.info(
+                    f"Skipped search for '{query}': covered by '{hit.query}' "
+                    f"(similarity {hit.score:.2f})"
+                )
+                return [SearchResult.from_dict(result) for result in hit.payload]
+            results = search_fn(query)
+            if results:
+                try:
+                    self.add([(query, [result.to_dict() for result in results])])
+                except Exception as e:
+                    logger.error(f"Failed to index search results for '{query}': {e}")
+            return results
+
+        return indexed_search
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM df")
+                # Other processes keep reading the unlinked file until they refresh
+                self._vectors_path.unlink(missing_ok=True)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._size = 0
+            self._df = np.zeros(self.dims)
+            self._norms = None
+            self._vectors = self._map()
+
+@lru_cache(maxsize=None)
+def get_semantic_index(name: str) -> Optional[SemanticIndex]:
+    """
+    Return the process-wide semantic index of one kind of entry.
+
+    'searches' holds search results by query and 'answers' final answers by
+    query. Returns None when SEMANTIC_INDEX is off.
+    """
+    if os.getenv("SEMANTIC_INDEX", "true").lower() != "true":
+        return None
+    cache_dir = Path(os.getenv("CREW_CACHE_DIR", "./cache"))
+    root = Path(os.getenv("SEMANTIC_INDEX_DIR", str(cache_dir / "semantic_index")))
+    try:
+        index = SemanticIndex(root / name)
+    except Exception as e:
+        logger.error(f"Failed to open semantic index '{name}': {e}")
+        return None
+    logger.debug(f"Semantic index '{name}' opened with {len(index)} entries")
+    return index
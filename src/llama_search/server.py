@@ -0,0 +1,344 @@
+"""
+HTTP service mode for the Llama Search research assistant.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import time
+
+from dotenv import load_dotenv
+
+from .agent_pool import AgentPool, AgentFactory, default_agent_factory
+from .instrumentation import get_metrics_recorder
+from .streaming import iterate_in_thread
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+MAX_BODY_BYTES = 64 * 1024
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+class Busy(Exception):
+    """Raised when a request cannot be admitted or queued."""
+
+class ResearchServer:
+    """
+    ASGI application answering research queries from a warm agent pool.
+
+    Endpoints:
+        POST /query    {"query": "...", "stream": false}
+                       -> {"result": ..., "elapsed": ...}; with "stream": true
+                       the answer is sent as plain text chunks
+        GET  /health   Pool and queue occupancy
+        GET  /metrics  Prometheus text of the aggregated query metrics
+
+    At most pool.size queries run at once and queue_size more wait, each for
+    up to queue_timeout seconds; anything beyond that gets 503 immediately.
+    """
+
+    def __init__(
+        self,
+        pool: AgentPool,
+        queue_size: int = 8,
+        queue_timeout: float = 30.0
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            pool: Warm pipelines serving the queries
+            queue_size: Requests allowed to wait for an idle pipeline
+            queue_timeout: Seconds a request waits before giving up with 503
+        """
+        self.pool = pool
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(pool.size, thread_name_prefix="query")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._active = 0
+        self._queued = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Receive, send: Send):
+        """ASGI entry point."""
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        route = (scope['method'], scope['path'])
+        try:
+            if route == ('POST', '/query'):
+                await self.handle_query(receive, send)
+            elif route == ('GET', '/health'):
+                await self.send_json(send, 200, self.health())
+            elif route == ('GET', '/metrics'):
+                text = get_metrics_recorder().prometheus_text()
+                await self.send_text(send, 200, text, "text/plain; version=0.0.4")
+            elif scope['path'] in ('/query', '/health', '/metrics'):
+                await self.send_json(send, 405, {'error': "Method not allowed"})
+            else:
+                await self.send_json(send, 404, {'error': "Not found"})
+        except Busy as e:
+            await self.send_json(
+                send, 503, {'error': str(e)},
+                headers=[(b"retry-after", str(int(self.queue_timeout)).encode())]
+            )
+        except ValueError as e:
+            await self.send_json(send, 400, {'error': str(e)})
+
+    async def lifespan(self, receive: Receive, send: Send):
+        """Acknowledge startup and shut the worker threads down on exit."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def health(self) -> Dict[str, int]:
+        """Current pool and queue occupancy."""
+        return {
+            'pool_size': self.pool.size,
+            'idle': self.pool.available,
+            'active': self._active,
+            'queued': self._queued,
+            'queue_size': self.queue_size
+        }
+
+    async def handle_query(self, receive: Receive, send: Send):
+        """Admit a query, wait for a pipeline and send its answer."""
+        request = await self.read_json(receive)
+        query = str(request.get('query') or '').strip()
+        if not query:
+            raise ValueError("Request body needs a non-empty 'query'")
+
+        await self.admit()
+        try:
+            if request.get('stream'):
+                await self.stream_answer(send, query)
+                return
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, self.pool.run, query, self.queue_timeout
+                )
+            except queue.Empty:
+                raise Busy("Timed out waiting for an idle agent pool")
+            except Exception as e:
+                logger.error(f"Query failed: {e}", exc_info=True)
+                await self.send_json(send, 500, {'error': str(e)})
+                return
+            await self.send_json(send, 200, {
+                'query': query,
+                'result': str(result),
+                'elapsed': round(time.perf_counter() - start, 3)
+            })
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    async def admit(self):
+        """
+        Take a run slot, queueing for one if all are busy.
+
+        Raises Busy when the queue is full or the wait times out.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool.size)
+        if self._slots.locked():
+            if self._queued >= self.queue_size:
+                raise Busy("Server busy, try again later")
+            self._queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Busy("Timed out waiting for an idle agent pool")
+            finally:
+                self._queued -= 1
+        else:
+            await self._slots.acquire()
+        self._active += 1
+
+    async def stream_answer(self, send: Send, query: str):
+        """
+        Send the answer as chunks of plain text while it is generated.
+
+        The response starts with the first chunk, so a pool timeout or an
+        error in an earlier stage still gets a proper status. Returns only
+        once the pipeline is back in the pool, even if the client has gone.
+        """
+        chunks = iterate_in_thread(lambda: self.pool.stream(query, self.queue_timeout))
+        try:
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = ""
+            except queue.Empty:
+                raise Busy("Timed out waiting for an idle agent pool")
+            except Exception as e:
+                logger.error(f"Streaming query failed: {e}", exc_info=True)
+                await self.send_json(send, 500, {'error': str(e)})
+                return
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b"content-type", b"text/plain; charset=utf-8")]
+            })
+            await self.send_chunk(send, first)
+            try:
+                async for chunk in chunks:
+                    await self.send_chunk(send, chunk)
+            except Exception as e:
+                # Headers are already sent, so the error goes in the body
+                logger.error(f"Streaming query failed: {e}", exc_info=True)
+                await self.send_chunk(send, f"\n\nError: {e}")
+            await send({'type': 'http.response.body', 'body': b""})
+        finally:
+            # Keeps the run slot until the worker thread has returned its pipeline
+            await chunks.aclose()
+
+    @staticmethod
+    async def send_chunk(send: Send, text: str):
+        """Send one piece of a streamed response body."""
+        await send({
+            'type': 'http.response.body',
+            'body': text.encode(),
+            'more_body': True
+        })
+
+    @staticmethod
+    async def read_json(receive: Receive) -> Dict[str, Any]:
+        """Read and parse a JSON object request body."""
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get('body', b"")
+            if len(body) > MAX_BODY_BYTES:
+                raise ValueError("Request body too large")
+            if not message.get('more_body'):
+                break
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise ValueError("Request body must be a JSON object")
+        return request
+
+    @classmethod
+    async def send_json(
+        cls,
+        send: Send,
+        status: int,
+        payload: Dict[str, Any],
+        headers: Optional[List[Tuple[bytes, bytes]]] = None
+    ):
+        """Send a complete JSON response."""
+        await cls.send_text(
+            send, status, json.dumps(payload), "application/json", headers
+        )
+
+    @staticmethod
+    async def send_text(
+        send: Send,
+        status: int,
+        text: str,
+        content_type: str,
+        headers: Optional[List[Tuple[bytes, bytes]]] = None
+    ):
+        """Send a complete text response."""
+        body = text.encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(len(body)).encode())
+            ] + (headers or [])
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+def create_app(
+    pool_size: Optional[int] = None,
+    agent_factory: AgentFactory = default_agent_factory
+) -> ResearchServer:
+    """
+    Build the server and warm its agent pool, with sizes from the environment.
+
+    Args:
+        pool_size: Overrides SERVER_POOL_SIZE
+        agent_factory: Returns a fresh set of agents by ID for each pool slot
+    """
+    pool = AgentPool(
+        size=pool_size or int(os.getenv("SERVER_POOL_SIZE", 2)),
+        agent_factory=agent_factory
+    )
+    return ResearchServer(
+        pool,
+        queue_size=int(os.getenv("SERVER_QUEUE_SIZE", 8)),
+        queue_timeout=float(os.getenv("SERVER_QUEUE_TIMEOUT", 30))
+    )
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(description="Serve Llama Search over HTTP")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8000, help="Port to bind (default: 8000)"
+    )
+    parser.add_argument(
+        "--pool-size", type=int, help="Warm pipelines (default: SERVER_POOL_SIZE)"
+    )
+    parser.add_argument(
+        "--stub-llm", action="store_true",
+        help="Answer with a deterministic offline LLM instead of the configured model"
+    )
+    parser.add_argument(
+        "--stub-latency", type=float, default=0.0,
+        help="Seconds each stub LLM call takes (default: 0)"
+    )
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    """Run the server with uvicorn."""
+    args = build_parser().parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving over HTTP requires uvicorn: pip install uvicorn")
+
+    agent_factory = default_agent_factory
+    if args.stub_llm:
+        from .agents import QUERY_REFERENCE, init_agents
+        from .stub_llm import StubLLM
+
+        def stub_agent_factory() -> Dict[str, Any]:
+            return init_agents(QUERY_REFERENCE, llm=StubLLM(latency=args.stub_latency))
+
+        agent_factory = stub_agent_factory
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(levelname)s %(name)s: %(message)s"
+    )
+    app = create_app(args.pool_size, agent_factory)
+    uvicorn.run(app, host=args.host, port=args.port, lifespan="on")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Token streaming for the final research stage.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List
+import asyncio
+import logging
+import threading
+
+import litellm
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LLM_PARAMS = (
+    'temperature', 'top_p', 'max_tokens', 'base_url', 'api_version', 'api_key'
+)
+
+def build_messages(
+    agent: Any,
+    description: str,
+    expected_output: str,
+    context: str
+) -> List[Dict[str, str]]:
+    """Build chat messages for a task the same way the agent would frame it."""
+    system = (
+        f"You are {agent.role}. {agent.backstory}\n"
+        f"Your personal goal is: {agent.goal}"
+    )
+    user = (
+        f"{description}\n\n"
+        f"This is the expected criteria for your final answer: {expected_output}"
+    )
+    if context:
+        user += f"\n\nThis is the context you're working with:\n{context}"
+    return [
+        {'role': 'system', 'content': system},
+        {'role': 'user', 'content': user}
+    ]
+
+def stream_completion(llm: Any, messages: List[Dict[str, str]]) -> Iterator[str]:
+    """
+    Stream a completion from the model behind a crewAI LLM.
+
+    Args:
+        llm: The agent's LLM, whose model and settings are reused
+        messages: Chat messages to send
+
+    Yields:
+        Text chunks as the model produces them
+    """
+    stream = getattr(llm, 'stream', None)
+    if callable(stream):
+        # LLMs that stream themselves, such as the offline stub
+        yield from stream(messages)
+        return
+    yield from litellm_stream(llm, messages)
+
+def litellm_stream(llm: Any, messages: List[Dict[str, str]]) -> Iterator[str]:
+    """Stream a completion through litellm with the LLM's model and settings."""
+    params = {name: getattr(llm, name, None) for name in LLM_PARAMS}
+    params = {name: value for name, value in params.items() if value is not None}
+    params.update(getattr(llm, 'kwargs', None) or {})
+    response = litellm.completion(
+        model=llm.model,
+        messages=messages,
+        stream=True,
+        **params
+    )
+    for chunk in response:
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            yield text
+
+async def iterate_in_thread(
+    make_iterator: Callable[[], Iterator[str]]
+) -> AsyncIterator[str]:
+    """
+    Consume a blocking iterator in a worker thread and yield its items asynchronously.
+
+    Closing the async generator early (aclose(), or leaving an async for with
+    an exception) stops the worker after the item it is waiting for and closes
+    the blocking iterator on the worker thread, so a generator there sees
+    GeneratorExit. aclose() returns only once the worker has finished.
+
+    Args:
+        make_iterator: Called in the worker thread to create the iterator
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        iterator = None
+        try:
+            iterator = make_iterator()
+            for item in iterator:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            try:
+                close = getattr(iterator, 'close', None)
+                if close is not None:
+                    close()
+            except Exception as e:
+                logger.error(f"Error closing stream: {e}", exc_info=True)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    threading.Thread(target=produce, name="stream", daemon=True).start()
+    finished = False
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                finished = True
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while not finished:
+            finished = await queue.get() is done
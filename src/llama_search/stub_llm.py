@@ -0,0 +1,126 @@
+"""
+Deterministic offline LLM for local testing of the Llama Search research assistant.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+import hashlib
+import json
+import logging
+import re
+import time
+
+from crewai import LLM
+
+from .dedupe import estimate_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+QUERY_LINE = re.compile(r"^Query: (.+)$", re.MULTILINE)
+TOOL_NAMES = re.compile(r"only one name of \[([^\]]*)\]")
+OBSERVATION_CHARS = 2000
+
+def report_usage(callbacks: List[Any], messages: List[Dict[str, str]], answer: str):
+    """Pass estimated token counts to litellm-style success callbacks."""
+    from litellm import Usage
+
+    prompt_tokens = estimate_tokens("".join(m.get('content', '') for m in messages))
+    completion_tokens = estimate_tokens(answer)
+    usage = Usage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens
+    )
+    for callback in callbacks:
+        try:
+            callback.log_success_event(
+                kwargs={}, response_obj={'usage': usage}, start_time=0, end_time=0
+            )
+        except Exception as e:
+            logger.debug(f"Usage callback failed: {e}")
+
+class StubLLM(LLM):
+    """
+    Answers every request immediately with a canned final answer.
+
+    Agents with tools first get one call of their first tool with the query
+    as input, and their final answer quotes what it returned. No model or
+    network is involved, so servers, pipelines and benchmarks can be exercised
+    locally. Token usage is estimated and reported to the agent's callbacks as
+    a real model's would be.
+    """
+
+    def __init__(self, latency: float = 0.0, model: str = "stub/echo", **kwargs):
+        """
+        Initialize the stub.
+
+        Args:
+            latency: Seconds each call sleeps to simulate model time
+            model: Model name reported to callers and used in cache keys
+        """
+        super().__init__(model=model, **kwargs)
+        self.latency = latency
+
+    def call(
+        self,
+        messages: List[Dict[str, str]],
+        callbacks: Optional[List[Any]] = None
+    ) -> str:
+        """Return a tool call or a final answer built from the query in the messages."""
+        if self.latency:
+            time.sleep(self.latency)
+        answer = self.tool_call(messages) or f"Final Answer: {self.answer(messages)}"
+        report_usage(callbacks or [], messages, answer)
+        return answer
+
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Yield the answer word by word, as a streaming model would."""
+        if self.latency:
+            time.sleep(self.latency)
+        for i, word in enumerate(self.answer(messages).split(" ")):
+            yield f" {word}" if i else word
+
+    @staticmethod
+    def query(prompt: str) -> str:
+        """The query named in a task prompt."""
+        match = QUERY_LINE.search(prompt)
+        return match.group(1).strip() if match else "the query"
+
+    def tool_call(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """Call the first listed tool, unless the agent has none or already used one."""
+        if any(message.get('role') == 'assistant' for message in messages):
+            return None
+        prompt = "\n".join(message.get('content', '') for message in messages)
+        match = TOOL_NAMES.search(prompt)
+        tools = [name.strip() for name in match.group(1).split(',')] if match else []
+        if not tools or not tools[0]:
+            return None
+        return (
+            "Thought: I should search for this.\n"
+            f"Action: {tools[0]}\n"
+            f"Action Input: {json.dumps({'tool_input': self.query(prompt)})}"
+        )
+
+    @classmethod
+    def answer(cls, messages: List[Dict[str, str]]) -> str:
+        """Build a deterministic answer naming the query, quoting any tool output."""
+        prompt = "\n".join(message.get('content', '') for message in messages)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        answer = f"Stub answer {digest} for: {cls.query(prompt)}"
+        _, found, observation = prompt.rpartition("Observation:")
+        replied = any(message.get('role') == 'assistant' for message in messages)
+        if found and observation and replied:
+            answer += f"\n\n{observation.strip()[:OBSERVATION_CHARS]}"
+        return answer
+
+    def supports_function_calling(self) -> bool:
+        """The stub never emits function calls."""
+        return False
+
+    def supports_stop_words(self) -> bool:
+        """The stub ignores stop words."""
+        return False
+
+    def get_context_window_size(self) -> int:
+        """A fixed window, since there is no real model to look up."""
+        return 8192
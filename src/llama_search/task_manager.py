@@ -2,22 +2,17 @@
 Task management and execution for the Llama Search research assistant.
 """
 
-from typing import Dict, List, Optional, Any
-from pathlib import Path
-import yaml
+from typing import Dict, List, Optional
+from dataclasses import fields, replace
 import logging
 from datetime import datetime
 
 from crewai import Task
 from dotenv import load_dotenv
 
-from .agents import (
-    intent_analyzer,
-    query_planner,
-    search_agent,
-    content_evaluator,
-    synthesis_agent
-)
+from .agents import get_default_agents
+from .config_registry import TaskConfig, get_config_registry
+from .run_store import RunRecord, RunStore, get_run_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,24 +20,30 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+TASK_FIELDS = frozenset(field.name for field in fields(TaskConfig))
+
 class TaskManager:
     """Manages task creation, execution, and result tracking."""
 
-    def __init__(self):
-        """Initialize the task manager."""
-        self.task_history = []
+    def __init__(self, run_store: Optional[RunStore] = None):
+        """
+        Initialize the task manager.
+
+        Args:
+            run_store: Where created tasks are recorded; defaults to the shared one
+        """
+        self.run_store = run_store if run_store is not None else get_run_store()
         self.load_configs()
 
+    @property
+    def task_configs(self) -> Dict[str, TaskConfig]:
+        """Task configurations, reloaded by the registry when tasks.yaml changes."""
+        return get_config_registry().tasks()
+
     def load_configs(self):
-        """Load task configurations from YAML."""
-        config_path = Path(__file__).parent / "config" / "tasks.yaml"
-        try:
-            with open(config_path, 'r') as f:
-                self.task_configs = yaml.safe_load(f)['tasks']
-            logger.info("Task configurations loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load task configurations: {e}")
-            raise
+        """Load and validate task configurations."""
+        configs = self.task_configs
+        logger.info(f"Loaded {len(configs)} task configurations")
 
     def create_task(self, task_id: str, **kwargs) -> Task:
         """
@@ -50,52 +51,71 @@ class TaskManager:
 
         Args:
             task_id: The identifier of the task in the configuration
-            **kwargs: Additional parameters to override configuration
+            **kwargs: Additional parameters to override configuration; keys that
+                are not TaskConfig fields are only recorded in the task history
 
         Returns:
             Task: The created task
         """
         if task_id not in self.task_configs:
             raise ValueError(f"Unknown task ID: {task_id}")
-
-        config = self.task_configs[task_id].copy()
-        config.update(kwargs)
-
-        agent_map = {
-            'intent_analyzer': intent_analyzer,
-            'query_planner': query_planner,
-            'search_agent': search_agent,
-            'content_evaluator': content_evaluator,
-            'synthesis_agent': synthesis_agent
-        }
-
-        agent = agent_map[config['agent']]
+        if self.task_configs[task_id].local:
+            raise ValueError(
+                f"Task {task_id} is run by the research pipeline, not by an agent"
+            )
+
+        config = replace(
+            self.task_configs[task_id],
+            **{key: value for key, value in kwargs.items() if key in TASK_FIELDS}
+        )
+        agent = get_default_agents()[config.agent]
 
         task = Task(
-            description=config['description'],
+            description=config.description,
             agent=agent,
-            context=config['context'],
-            expected_output=config['expected_output']
+            context=list(config.context),
+            expected_output=config.expected_output
         )
 
-        self.task_history.append({
-            'task_id': task_id,
-            'timestamp': datetime.now(),
-            'config': config
-        })
+        self.run_store.add(RunRecord(
+            kind='created',
+            task_id=task_id,
+            data={
+                'agent': config.agent,
+                'overrides': {k: str(v)[:200] for k, v in kwargs.items()}
+            }
+        ))
 
         return task
 
-    def get_task_history(self) -> List[Dict]:
+    @property
+    def task_history(self) -> List[Dict]:
+        """The most recently created tasks, oldest first."""
+        return self.get_task_history()
+
+    def get_task_history(self, limit: int = 100, **filters) -> List[Dict]:
         """
         Get the history of created tasks.
 
+        Args:
+            limit: Maximum number of records returned
+            **filters: task_id, query, since or until, as accepted by RunStore.find
+
         Returns:
-            List[Dict]: List of task creation records
+            List[Dict]: Task creation records, oldest first
         """
-        return self.task_history
+        records = self.run_store.find(kind='created', limit=limit, **filters)
+        return [
+            {
+                'task_id': record.task_id,
+                'timestamp': datetime.fromtimestamp(record.timestamp),
+                'agent': record.data.get('agent'),
+                'overrides': record.data.get('overrides', {})
+            }
+            for record in reversed(records)
+        ]
 
     def clear_history(self):
         """Clear the task history."""
-        self.task_history = []
+        self.run_store.clear(kind='created')
         logger.info("Task history cleared")
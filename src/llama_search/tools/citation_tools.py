@@ -2,10 +2,72 @@
 Citation management tools for Llama Search.
 """
 
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
 from urllib.parse import urlparse
+from functools import lru_cache
 import json
+import re
+
+from ..dedupe import canonicalize_url
+from ..results import SearchResult
+
+STYLES = ('apa', 'numbered')
+YEAR = re.compile(r"\b(1[5-9]\d{2}|20\d{2})\b")
+AUTHOR_SEPARATOR = re.compile(r"\s*;\s*|\s+and\s+|\s*&\s*")
+SECOND_LEVEL_LABELS = {'co', 'com', 'org', 'net', 'ac', 'gov', 'edu'}
+
+Source = Union[SearchResult, Dict[str, Any]]
+
+@lru_cache(maxsize=8192)
+def parse_url(url: str) -> Tuple[str, str]:
+    """
+    Canonical form and domain of a source URL.
+
+    The canonical form only identifies duplicates; it may not be a working
+    link, so citations print the URL as given.
+    """
+    return canonicalize_url(url), urlparse(url).netloc
+
+@lru_cache(maxsize=4096)
+def site_name(domain: str) -> str:
+    """
+    Readable name of a site, standing in for a missing author.
+
+    "forbes.com" becomes "Forbes" and "bbc.co.uk" becomes "BBC".
+    """
+    labels = domain.split(':')[0].split('.')
+    if len(labels) > 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        labels = labels[:-1]
+    name = labels[-2] if len(labels) > 1 else labels[0]
+    if not name.islower():
+        return name
+    return name.upper() if len(name) <= 3 else name.capitalize()
+
+@lru_cache(maxsize=4096)
+def format_authors(author: str) -> str:
+    """Join the names in an author field as "A", "A & B" or "A, B, & C"."""
+    names = [name for name in AUTHOR_SEPARATOR.split(" ".join(author.split())) if name]
+    if len(names) < 3:
+        return " & ".join(names)
+    return f"{', '.join(names[:-1])}, & {names[-1]}"
+
+@lru_cache(maxsize=4096)
+def publication_year(date: str) -> str:
+    """The year in a publication date, or "n.d." when there is none."""
+    match = YEAR.search(date)
+    return match.group(1) if match else "n.d."
+
+def source_fields(source: Source) -> Tuple[str, str, str, str]:
+    """Title, URL, author and date of a search result or source dict."""
+    if isinstance(source, SearchResult):
+        return source.title, source.url, "", source.date
+    return (
+        source.get('title') or 'Untitled',
+        source.get('url') or source.get('link', ''),
+        source.get('author') or '',
+        source.get('date') or ''
+    )
 
 class CitationManagerTool:
     """Tool for managing and formatting citations."""
@@ -32,22 +94,12 @@ class CitationManagerTool:
         """
         try:
             source = json.loads(source_json)
-
-            # Extract domain and date
-            domain = urlparse(source['url']).netloc
-            date = source.get('date', datetime.now().strftime('%Y, %B %d'))
-
-            # Format author
-            author = source.get('author', domain)
-
-            # Create citations
-            full_citation = f"{author} ({date}). {source['title']}. Retrieved from {source['url']}"
-            inline_citation = f"({author}, {date})"
-
-            return json.dumps({
-                'citation': full_citation,
-                'inline': inline_citation
-            })
+            return json.dumps(self.cite(
+                source['title'],
+                source['url'],
+                author=source.get('author'),
+                date=source.get('date')
+            ))
 
         except Exception as e:
             return json.dumps({
@@ -56,26 +108,98 @@ class CitationManagerTool:
                 'inline': ''
             })
 
-    def format_bibliography(self, sources_json: str) -> str:
+    def cite(
+        self,
+        title: str,
+        url: str,
+        author: Optional[str] = None,
+        date: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Build full and inline citations for one source.
+
+        The domain stands in for a missing author and today's date for a
+        missing publication date.
+        """
+        _, domain = parse_url(url)
+        author = author or domain
+        date = date or datetime.now().strftime('%Y, %B %d')
+        return {
+            'citation': f"{author} ({date}). {title}. Retrieved from {url}",
+            'inline': f"({author}, {date})"
+        }
+
+    def cite_result(self, result: SearchResult) -> Dict[str, str]:
+        """Build citations for a search result."""
+        return self.cite(result.title, result.url, date=result.date or None)
+
+    def format_citations(
+        self,
+        sources: Iterable[Source],
+        style: str = 'apa'
+    ) -> List[str]:
+        """
+        Format many sources in one pass.
+
+        Sources whose URLs share a canonical form are cited once, keeping the
+        first. 'apa' entries take cite()'s form and are sorted by author; 'numbered'
+        entries follow the synthesis agent's "[n] Source. (Year). Title." form,
+        with the URL on the next line, in the order given.
+
+        Args:
+            sources: Search results, or dicts with title, url and optional
+                author and date
+            style: One of STYLES
+
+        Returns:
+            List[str]: One citation per distinct source
+        """
+        if style not in STYLES:
+            raise ValueError(f"Unknown citation style: {style}")
+
+        today = datetime.now().strftime('%Y, %B %d')
+        seen = set()
+        citations = []
+        for source in sources:
+            title, url, author, date = source_fields(source)
+            key, domain = parse_url(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            if style == 'apa':
+                author = format_authors(author) if author else domain
+                citations.append(
+                    f"{author} ({date or today}). {title.rstrip('.')}. "
+                    f"Retrieved from {url}"
+                )
+            else:
+                author = format_authors(author) if author else site_name(domain)
+                citations.append(
+                    f"[{len(citations) + 1}] {author.rstrip('.')}. "
+                    f"({publication_year(date)}). "
+                    f"{title.rstrip('.')}.\n{url}"
+                )
+        if style == 'apa':
+            citations.sort(key=str.lower)
+        return citations
+
+    def bibliography(self, sources: Iterable[Source], style: str = 'apa') -> str:
+        """Format sources as a References section."""
+        return "\n\nReferences\n" + "\n\n".join(self.format_citations(sources, style))
+
+    def format_bibliography(self, sources_json: str, style: str = 'apa') -> str:
         """
         Format a bibliography from multiple sources.
 
         Args:
             sources_json: JSON string containing list of source information
+            style: One of STYLES
 
         Returns:
             Formatted bibliography string
         """
         try:
-            sources = json.loads(sources_json)
-            citations = []
-
-            for source in sources:
-                result = json.loads(self.func(json.dumps(source)))
-                if 'citation' in result:
-                    citations.append(result['citation'])
-
-            return "\n\nReferences\n" + "\n\n".join(citations)
+            return self.bibliography(json.loads(sources_json), style)
 
         except Exception as e:
             return f"Error formatting bibliography: {str(e)}"
@@ -0,0 +1,158 @@
+"""
+Batched web search tools for Llama Search.
+"""
+
+from typing import Any, Callable, Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import math
+import re
+import time
+
+from ..results import SearchResult, render_results
+from ..run_context import record_results, take_searches
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+SEARCH_BUDGET_SPENT = (
+    "The search budget for this query is spent; do not search again, "
+    "answer with the results you already have."
+)
+
+def parse_queries(queries_text: str, limit: int) -> List[str]:
+    """
+    Split tool input into distinct queries, one per line.
+
+    List markers ("1.", "-", "*") and surrounding quotes are removed, and
+    repeated queries are kept once.
+    """
+    queries = []
+    seen = set()
+    for line in queries_text.splitlines():
+        query = LIST_MARKER.sub("", line).strip().strip('"\'').strip()
+        key = query.lower()
+        if not query or key in seen:
+            continue
+        seen.add(key)
+        queries.append(query)
+    return queries[:limit]
+
+class BatchSearchTool:
+    """Tool for running a list of search queries concurrently."""
+
+    def __init__(
+        self,
+        search_fn: Callable[[str], List[SearchResult]],
+        max_workers: int = 4,
+        timeout: float = 20.0,
+        max_queries: int = 8
+    ):
+        """
+        Initialize the tool.
+
+        Args:
+            search_fn: Function running a single search
+            max_workers: Maximum number of searches in flight at once
+            timeout: Seconds each search may run, counted from when it starts
+            max_queries: Queries beyond this many are ignored
+        """
+        self.name = "web_search_batch"
+        self.description = (
+            "Run several web searches at once. Provide every search query as plain "
+            "text, one query per line. Returns the results grouped by query."
+        )
+        self.search_fn = search_fn
+        self.timeout = timeout
+        self.max_queries = max_queries
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="search")
+
+    def search_all(self, queries: List[str]) -> Dict[str, Any]:
+        """
+        Run every query concurrently.
+
+        Each search gets the full timeout from when a worker starts it, so
+        queries queued behind the first wave are not cut short. A query still
+        queued once every wave could have used its timeout is abandoned.
+
+        Args:
+            queries: Search queries to run
+
+        Returns:
+            Dict mapping each query to its results, or to the exception it raised
+        """
+        started: Dict[str, float] = {}
+
+        def run(query: str) -> List[SearchResult]:
+            started[query] = time.monotonic()
+            return self.search_fn(query)
+
+        futures = {query: self._executor.submit(run, query) for query in queries}
+        waves = math.ceil(len(queries) / self.max_workers)
+        last_start = time.monotonic() + self.timeout * waves
+        results: Dict[str, Any] = {}
+        pending = dict(futures)
+        while pending:
+            now = time.monotonic()
+            for query, future in list(pending.items()):
+                if future.done():
+                    error = future.exception()
+                    results[query] = error if error is not None else future.result()
+                elif query in started and now - started[query] >= self.timeout:
+                    results[query] = TimeoutError(f"timed out after {self.timeout:g}s")
+                elif query not in started and now >= last_start:
+                    future.cancel()
+                    results[query] = TimeoutError(
+                        "timed out waiting for a free search worker"
+                    )
+                else:
+                    continue
+                del pending[query]
+            if not pending:
+                break
+            deadlines = [started[q] + self.timeout for q in pending if q in started]
+            deadlines.append(last_start)
+            wait(
+                pending.values(),
+                max(0.0, min(deadlines) - now),
+                return_when=FIRST_COMPLETED
+            )
+        return {query: results[query] for query in queries}
+
+    def func(self, queries_text: str) -> str:
+        """
+        Run the batch search.
+
+        Args:
+            queries_text: Search queries, one per line
+
+        Returns:
+            Results for every query, each under a heading naming the query
+        """
+        queries = parse_queries(queries_text, self.max_queries)
+        if not queries:
+            return "No search queries provided. Give one query per line."
+        allowed = take_searches(len(queries))
+        if not allowed:
+            return SEARCH_BUDGET_SPENT
+        if allowed < len(queries):
+            logger.info(f"Search budget allows {allowed} of {len(queries)} queries")
+            queries = queries[:allowed]
+
+        start = time.perf_counter()
+        results = self.search_all(queries)
+        logger.info(
+            f"Ran {len(queries)} searches in {time.perf_counter() - start:.2f}s"
+        )
+
+        sections = []
+        for query, result in results.items():
+            if isinstance(result, Exception):
+                logger.error(f"Search failed for '{query}': {result}")
+                body = f"Search failed: {result}"
+            else:
+                body = render_results(record_results(result))
+            sections.append(f"### {query}\n{body}")
+        return "\n\n".join(sections)
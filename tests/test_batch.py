@@ -0,0 +1,53 @@
+"""
+Tests of batch query processing.
+"""
+
+import io
+import json
+
+from llama_search.batch import BatchRunner, completed_ids, read_queries
+
+def answer(query: str) -> str:
+    if "fail" in query:
+        raise RuntimeError("no answer")
+    return f"answer to {query}"
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_read_queries_accepts_jsonl_and_text():
+    source = io.StringIO(
+        '{"id": "a", "query": "first"}\n'
+        '\n'
+        '{"request_id": "b", "title": "second"}\n'
+        'third\n'
+    )
+    assert read_queries(source) == [("a", "first"), ("b", "second"), ("4", "third")]
+
+def test_batch_records_results_and_errors(tmp_path):
+    output = tmp_path / "results.jsonl"
+    counts = BatchRunner(answer, workers=2).run([("1", "one"), ("2", "fail")], output)
+    assert counts == {'succeeded': 1, 'failed': 1, 'skipped': 0}
+    records = {r['id']: r for r in read_records(output)}
+    assert records["1"]['result'] == "answer to one"
+    assert records["2"]['error'] == "no answer"
+
+def test_resume_skips_answered_queries_and_retries_failures(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({'id': "1", 'query': "one", 'result': "earlier answer"}) + "\n"
+        + json.dumps({'id': "2", 'query': "two", 'error': "timed out"}) + "\n"
+        + '{"id": "3", "query": "thr'  # Partial line from a crash
+    )
+    assert completed_ids(output) == {"1"}
+
+    queries = [("1", "one"), ("2", "two"), ("3", "three")]
+    counts = BatchRunner(answer, workers=2).run(queries, output, resume=True)
+    assert counts == {'succeeded': 2, 'failed': 0, 'skipped': 1}
+    assert completed_ids(output) == {"1", "2", "3"}
+
+def test_resume_counts_only_skipped_queries_of_this_input(tmp_path):
+    output = tmp_path / "results.jsonl"
+    BatchRunner(answer).run([("1", "one"), ("2", "two"), ("3", "three")], output)
+    counts = BatchRunner(answer).run([("2", "two"), ("4", "four")], output, resume=True)
+    assert counts == {'succeeded': 1, 'failed': 0, 'skipped': 1}
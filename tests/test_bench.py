@@ -0,0 +1,52 @@
+"""
+Tests of the benchmark harness and its search fixtures.
+"""
+
+import json
+
+from llama_search.bench import compare, load_baseline, save_baseline, summarize
+from llama_search.fixture_search import FixtureSearch
+
+def test_fixture_search_replays_recorded_results():
+    search = FixtureSearch()
+    assert search.queries
+    query = search.queries[0]
+    results = search(query.upper())
+    assert results and results == search(query)
+    assert {'title', 'link', 'snippet'} <= set(results[0])
+
+def test_fixture_search_makes_up_stable_results_for_unknown_queries():
+    search = FixtureSearch()
+    first = search("a query with no recording")
+    assert len(first) == 5
+    assert first == search("a query with no recording")
+    assert first != search("another query with no recording")
+
+def test_fixture_search_reads_a_given_file(tmp_path):
+    path = tmp_path / "search.json"
+    results = [{'title': "Rust 2.0", 'link': "https://example.org"}]
+    path.write_text(json.dumps({"Rust Release": results}))
+    assert FixtureSearch(path)("rust release")[0]['title'] == "Rust 2.0"
+
+def test_summarize():
+    summary = summarize([float(i) for i in range(1, 101)])
+    assert summary['median'] == 50.5
+    assert summary['p95'] == 96.0
+    assert summary['max'] == 100.0
+
+def test_compare_against_baseline(tmp_path):
+    path = tmp_path / "baseline.json"
+    assert load_baseline(path) == {}
+    save_baseline(path, 'pipeline', {'total_seconds': {'median': 2.0}})
+    save_baseline(path, 'startup', {'llama_search.main': {'median': 1.0}})
+    baseline = load_baseline(path)
+    assert set(baseline) == {'pipeline', 'startup'}
+
+    lines = compare(
+        {'total_seconds': {'median': 3.0}, 'total_tokens': {'median': 10.0}},
+        baseline['pipeline']
+    )
+    assert lines == [
+        "total_seconds: 3.000 vs 2.000 (+50.0%)",
+        "total_tokens: 10.000 (no baseline)"
+    ]
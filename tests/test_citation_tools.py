@@ -0,0 +1,43 @@
+"""
+Tests of citation and bibliography formatting.
+"""
+
+import pytest
+
+from llama_search.results import SearchResult
+from llama_search.tools.citation_tools import CitationManagerTool
+
+SOURCES = [
+    {'title': "Zeta study.", 'url': "https://www.zeta.org/study?utm_source=x",
+     'author': "Young and Adams", 'date': "2023-05-01"},
+    SearchResult(title="Fusion news", url="https://news.bbc.co.uk/fusion", date="2024"),
+    {'title': "Zeta study again", 'url': "https://zeta.org/study/", 'date': "2022"},
+    {'title': "Alpha report", 'url': "https://alpha.com/report",
+     'author': "Baker; Cole; Diaz"}
+]
+
+def test_apa_citations_are_deduplicated_and_sorted_by_author():
+    citations = CitationManagerTool().format_citations(SOURCES)
+    assert len(citations) == 3
+    assert [citation.split(" (")[0] for citation in citations] == [
+        "Baker, Cole, & Diaz", "news.bbc.co.uk", "Young & Adams"
+    ]
+    assert citations[2] == (
+        "Young & Adams (2023-05-01). Zeta study. "
+        "Retrieved from https://www.zeta.org/study?utm_source=x"
+    )
+
+def test_numbered_citations_keep_their_order():
+    citations = CitationManagerTool().format_citations(SOURCES, style='numbered')
+    assert citations == [
+        "[1] Young & Adams. (2023). Zeta study.\n"
+        "https://www.zeta.org/study?utm_source=x",
+        "[2] BBC. (2024). Fusion news.\nhttps://news.bbc.co.uk/fusion",
+        "[3] Baker, Cole, & Diaz. (n.d.). Alpha report.\nhttps://alpha.com/report"
+    ]
+
+def test_unknown_style_is_rejected():
+    with pytest.raises(ValueError, match="Unknown citation style"):
+        CitationManagerTool().format_citations(SOURCES, style='mla')
+    bibliography = CitationManagerTool().format_bibliography("[]", style='mla')
+    assert bibliography.startswith("Error")
@@ -0,0 +1,117 @@
+"""
+Tests of parsing, validating and reloading agents.yaml and tasks.yaml.
+"""
+
+import os
+
+import pytest
+import yaml
+
+from llama_search.config_registry import ConfigRegistry, LLMConfig, TaskConfig
+
+AGENTS = {
+    'researcher': {
+        'role': "Researcher for {query}",
+        'goal': "Answer {query}",
+        'backstory': "An experienced researcher",
+        'llm': {
+            'provider': 'openai',
+            'model': "${TEST_MODEL:-gpt-4o-mini}",
+            'max_tokens': 512
+        }
+    }
+}
+TASKS = {
+    'search': {
+        'description': "Search for the query",
+        'agent': 'researcher',
+        'expected_output': "Results"
+    },
+    'summarize': {
+        'description': "Summarize the results",
+        'agent': 'researcher',
+        'expected_output': "A summary",
+        'dependencies': ['search']
+    }
+}
+
+def write_config(path, agents=AGENTS, tasks=TASKS, mtime=None):
+    (path / "agents.yaml").write_text(yaml.safe_dump({'agents': agents}))
+    (path / "tasks.yaml").write_text(yaml.safe_dump({'tasks': tasks}))
+    if mtime is not None:
+        for name in ("agents.yaml", "tasks.yaml"):
+            os.utime(path / name, (mtime, mtime))
+
+def task_data(**overrides):
+    return dict(TASKS['summarize'], **overrides)
+
+def test_registry_parses_and_orders_tasks(tmp_path, monkeypatch):
+    monkeypatch.delenv("TEST_MODEL", raising=False)
+    write_config(tmp_path)
+    registry = ConfigRegistry(tmp_path)
+    assert registry.task_order() == ('search', 'summarize')
+    agent = registry.agents()['researcher']
+    assert agent.role.render("fusion") == "Researcher for fusion"
+    assert agent.llm.model == "gpt-4o-mini"
+    assert agent.llm.max_tokens == 512
+
+def test_registry_reloads_changed_files(tmp_path):
+    write_config(tmp_path, mtime=1_000_000)
+    registry = ConfigRegistry(tmp_path)
+    tasks = registry.tasks()
+    assert registry.tasks() is tasks  # Unchanged files are not parsed again
+
+    changed = dict(TASKS, summarize=task_data(description="Summarize briefly"))
+    write_config(tmp_path, tasks=changed, mtime=1_000_100)
+    assert registry.tasks()['summarize'].description == "Summarize briefly"
+
+def test_invalid_reload_raises_and_is_retried(tmp_path):
+    write_config(tmp_path, mtime=1_000_000)
+    registry = ConfigRegistry(tmp_path)
+    registry.tasks()
+    tasks = dict(TASKS, summarize=task_data(agent='nobody'))
+    write_config(tmp_path, tasks=tasks, mtime=1_000_100)
+    with pytest.raises(ValueError, match="unknown agent: nobody"):
+        registry.tasks()
+    write_config(tmp_path, mtime=1_000_200)
+    assert set(registry.tasks()) == {'search', 'summarize'}
+
+def test_dependency_cycles_are_rejected(tmp_path):
+    tasks = dict(TASKS, search=dict(TASKS['search'], dependencies=['summarize']))
+    write_config(tmp_path, tasks=tasks)
+    with pytest.raises(ValueError, match="Dependency cycle"):
+        ConfigRegistry(tmp_path).task_order()
+
+def test_task_settings_are_validated():
+    with pytest.raises(ValueError, match="missing 'agent'"):
+        TaskConfig.from_dict("summarize", {'description': "d", 'expected_output': "e"})
+    invalid = task_data(fan_out={'from': 'search', 'max': 'two'})
+    with pytest.raises(ValueError, match="expected an integer, got 'two'"):
+        TaskConfig.from_dict("summarize", invalid)
+    valid = task_data(fan_out={'from': 'search', 'max': "3"})
+    config = TaskConfig.from_dict("summarize", valid)
+    assert config.fan_out_max == 3
+
+@pytest.mark.parametrize("settings, message", [
+    ({'provider': 'ollama', 'model': "llama3.1"}, "must start with 'ollama/'"),
+    ({'provider': 'anthropic', 'model': "claude"}, "must be 'ollama' or 'openai'"),
+    ({'provider': 'openai'}, "missing 'model'"),
+    ({'provider': 'openai', 'model': "gpt", 'max_tokens': 1.5}, "expected an integer"),
+    ({'provider': 'openai', 'model': "gpt", 'temperature': "hot"}, "expected a number"),
+    ({'provider': 'openai', 'model': "gpt", 'temperature': True}, "expected a number")
+])
+def test_invalid_llm_settings_raise(settings, message):
+    with pytest.raises(ValueError, match=message):
+        LLMConfig.from_dict(settings)
+
+def test_llm_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("TEST_MODEL", "ollama/llama3.1")
+    monkeypatch.setenv("TEST_TEMPERATURE", "0.2")
+    config = LLMConfig.from_dict({
+        'provider': 'ollama',
+        'model': "${TEST_MODEL}",
+        'temperature': "${TEST_TEMPERATURE}"
+    })
+    assert (config.model, config.temperature) == ("ollama/llama3.1", 0.2)
+    monkeypatch.delenv("TEST_MODEL")
+    assert LLMConfig.from_dict({'provider': 'ollama', 'model': "${TEST_MODEL}"}) is None
@@ -0,0 +1,70 @@
+"""
+Tests of token budgeting of the context handed between stages.
+"""
+
+from llama_search.context_budget import (
+    CONTEXT_SEPARATOR,
+    REVIEW_HEADING,
+    compact_evaluation,
+    fit_context,
+    fit_text
+)
+from llama_search.dedupe import estimate_tokens
+from llama_search.evaluation import ScoredResult
+from llama_search.results import SearchResult
+
+QUERY = "fusion energy"
+FILLER = "Unrelated filler about the weather and local sports results today. "
+
+def scored(title: str, total: float) -> ScoredResult:
+    url = f"https://example.org/{title}"
+    result = SearchResult(title=title, url=url, snippet="x" * 40)
+    return ScoredResult(result, 0.5, 0.5, 0.5, 0.5, total, borderline=False)
+
+def test_text_within_budget_is_untouched():
+    text = "Fusion energy is close.\n\nMore below."
+    assert fit_text(text, QUERY, 100) is text
+
+def test_salient_sentences_and_their_anchors_are_kept_in_order():
+    text = (
+        "# Results\n" + FILLER * 3 + "Fusion energy output doubled this year.\n\n"
+        "[2] Sports\n" + FILLER * 3
+    )
+    fitted = fit_text(text, QUERY, 30)
+    assert estimate_tokens(fitted) <= 30
+    assert fitted.startswith("# Results\n")
+    assert "Fusion energy output doubled this year." in fitted
+    assert "[2] Sports" not in fitted
+
+def test_evaluation_keeps_the_best_results_that_fit():
+    items = [scored("best", 90), scored("good", 70), scored("weak", 20)]
+    output = compact_evaluation(QUERY, items, budget=1000, min_score=50)
+    assert "[1] best" in output and "[2] good" in output and "weak" not in output
+    short = compact_evaluation(QUERY, items, budget=60, min_score=50)
+    assert "[1] best" in short and "good" not in short
+
+def test_evaluation_review_is_fitted_into_the_remaining_budget():
+    items = [scored("best", 90)]
+    review = FILLER * 20 + "Fusion energy claims in [1] need checking."
+    output = compact_evaluation(QUERY, items, budget=80, min_score=50, review=review)
+    assert REVIEW_HEADING in output
+    assert "Fusion energy claims in [1] need checking." in output
+    assert estimate_tokens(output) <= 85
+
+def test_context_shares_the_budget_and_prefers_compactors():
+    outputs = {
+        'search': FILLER * 20 + "Fusion energy record set.",
+        'evaluate': "long evaluation " * 100
+    }
+    context, before, after = fit_context(
+        outputs, QUERY, 100, compactors={'evaluate': lambda share: f"compact {share}"}
+    )
+    parts = context.split(CONTEXT_SEPARATOR)
+    assert "Fusion energy record set." in parts[0]
+    assert parts[1].startswith("compact ")
+    assert before > 100 >= after
+
+def test_zero_budget_disables_compression():
+    text = FILLER * 50
+    tokens = estimate_tokens(text)
+    assert fit_context({'search': text}, QUERY, 0) == (text, tokens, tokens)
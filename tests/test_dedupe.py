@@ -0,0 +1,64 @@
+"""
+Tests of URL canonicalization and near-duplicate detection.
+"""
+
+from llama_search.dedupe import (
+    ResultDeduplicator,
+    canonicalize_url,
+    hamming_distance,
+    simhash
+)
+from llama_search.results import SearchResult
+
+SNIPPET = (
+    "The National Ignition Facility reported a net energy gain from a fusion "
+    "experiment, producing more energy than the lasers delivered to the target."
+)
+
+def test_url_variants_share_one_canonical_form():
+    canonical = canonicalize_url("https://example.org/news/fusion?b=2&a=1")
+    assert canonical == "https://example.org/news/fusion?a=1&b=2"
+    for variant in (
+        "http://www.example.org/news/fusion/?a=1&b=2",
+        "https://m.example.org:443/news/fusion?b=2&a=1#results",
+        "https://example.org/news/fusion/amp?a=1&b=2&utm_source=feed&fbclid=x1",
+        "https://EXAMPLE.org/news/fusion?gclid=abc&a=1&b=2"
+    ):
+        assert canonicalize_url(variant) == canonical
+
+def test_parameters_that_may_select_content_are_kept():
+    assert canonicalize_url("https://example.org/page?ref=main&source=docs") == (
+        "https://example.org/page?ref=main&source=docs"
+    )
+    assert canonicalize_url("https://example.org:8080/") == "https://example.org:8080/"
+
+def test_simhash_is_close_for_reworded_text_and_far_for_other_text():
+    reworded = SNIPPET.replace("reported", "announced")
+    other = "Rust 2.0 ships with a new borrow checker and faster compile times."
+    assert hamming_distance(simhash(SNIPPET), simhash(SNIPPET)) == 0
+    assert hamming_distance(simhash(SNIPPET), simhash(reworded)) < hamming_distance(
+        simhash(SNIPPET), simhash(other)
+    )
+    assert hamming_distance(simhash(SNIPPET), simhash(other)) > 3
+
+def test_deduplicator_drops_repeated_urls_and_snippets():
+    dedup = ResultDeduplicator()
+    first = dedup.filter([
+        SearchResult(
+            "Fusion milestone", "https://www.example.org/fusion?utm_id=1", SNIPPET
+        ),
+        SearchResult(
+            "Fusion milestone", "http://example.org/fusion/", "A different snippet"
+        ),
+        SearchResult(
+            "Rust 2.0", "https://rust.example.com/2.0", "Rust ships a new release."
+        )
+    ])
+    assert [result.title for result in first] == ["Fusion milestone", "Rust 2.0"]
+    assert first[0].canonical_url == "https://example.org/fusion"
+
+    mirror = SearchResult("Fusion milestone", "https://mirror.example.net/a", SNIPPET)
+    second = dedup.filter([mirror])
+    assert second == []
+    stats = dedup.stats()
+    assert stats['kept'] == 2 and stats['dropped'] == 2 and stats['tokens_saved'] > 0
@@ -0,0 +1,20 @@
+"""
+Tests of the deterministic search result scoring.
+"""
+
+from llama_search.evaluation import bm25_scores, tokenize
+
+def test_bm25_ranks_the_matching_document_first():
+    documents = [
+        tokenize("Weather forecast for the weekend"),
+        tokenize("Fusion reactor sets an energy record"),
+        tokenize("Energy prices rise again")
+    ]
+    scores = bm25_scores("fusion energy record", documents)
+    assert scores[1] == 1.0
+    assert scores[0] == 0.0
+    assert 0.0 < scores[2] < 1.0
+
+def test_bm25_without_matches_scores_zero():
+    assert bm25_scores("", [tokenize("anything"), []]) == [0.0, 0.0]
+    assert bm25_scores("fusion", []) == []
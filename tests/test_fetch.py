@@ -0,0 +1,118 @@
+"""
+Tests of page fetching against a local HTTP server.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+
+from llama_search.fetch import PageCache, PageFetcher, make_session
+
+PAGE = (
+    b"<html><body><article><p>"
+    + b"Fusion results were published today. " * 20
+    + b"</p></article></body></html>"
+)
+ETAG = '"v1"'
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves the test pages and records every request it sees."""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers), time.monotonic()))
+        if self.path == "/large":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.end_headers()
+            try:
+                for _ in range(256):
+                    self.wfile.write(b"word " * 1024)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        elif self.path == "/etag":
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_page(PAGE, "text/html", ETag=ETAG)
+        elif self.path == "/image":
+            self.send_page(b"\x89PNG", "image/png")
+        else:
+            self.send_page(PAGE, "text/html")
+
+    def send_page(self, body: bytes, content_type: str, **headers):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def base_url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_fetcher(**kwargs) -> PageFetcher:
+    session = make_session(4)
+    session.trust_env = False  # Ignore proxy settings for the local server
+    kwargs.setdefault('host_interval', 0.0)
+    return PageFetcher(session=session, **kwargs)
+
+def test_body_is_cut_off_at_max_bytes(server):
+    fetcher = make_fetcher(max_bytes=10_000)
+    text = fetcher.fetch(f"{base_url(server)}/large")
+    assert text
+    assert len(text) <= 10_000
+
+def test_non_text_content_is_skipped(server):
+    assert make_fetcher().fetch(f"{base_url(server)}/image") is None
+
+def test_fresh_cached_page_is_not_refetched(server, tmp_path):
+    fetcher = make_fetcher(cache=PageCache(tmp_path / "pages.sqlite3"))
+    first = fetcher.fetch(f"{base_url(server)}/page")
+    second = fetcher.fetch(f"{base_url(server)}/page")
+    assert first and first == second
+    assert len(server.requests) == 1
+
+def test_stale_page_is_revalidated_with_etag(server, tmp_path):
+    fetcher = make_fetcher(cache=PageCache(tmp_path / "pages.sqlite3", ttl=0))
+    first = fetcher.fetch(f"{base_url(server)}/etag")
+    second = fetcher.fetch(f"{base_url(server)}/etag")
+    assert first and first == second
+    assert len(server.requests) == 2
+    assert server.requests[1][1].get("If-None-Match") == ETAG
+
+def test_requests_to_one_host_are_spaced(server):
+    fetcher = make_fetcher(host_interval=0.2)
+    urls = [f"{base_url(server)}/page{i}" for i in range(3)]
+    pages = fetcher.fetch_all(urls, timeout=10)
+    assert set(pages) == set(urls)
+    arrivals = sorted(arrived for _, _, arrived in server.requests)
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    assert min(gaps) >= 0.15
+
+def test_cache_drops_old_pages_and_keeps_at_most_max_entries(tmp_path):
+    cache = PageCache(tmp_path / "pages.sqlite3", max_age=3600, max_entries=2)
+    cache.put("https://example.org/old", "old", None, None)
+    cache._conn.execute("UPDATE pages SET fetched = fetched - 7200")
+    cache.put("https://example.org/a", "a", None, None)
+    assert cache.get("https://example.org/old") is None
+    cache.put("https://example.org/b", "b", None, None)
+    cache.put("https://example.org/c", "c", None, None)
+    assert cache.get("https://example.org/a") is None
+    assert cache.get("https://example.org/b") and cache.get("https://example.org/c")
@@ -0,0 +1,35 @@
+"""
+Tests of per-query metrics recording.
+"""
+
+import json
+
+import pytest
+
+from llama_search.instrumentation import QueryMetrics, get_metrics_recorder
+
+@pytest.fixture
+def recorder_env(tmp_path, monkeypatch):
+    """Configure the recorder from a clean environment under tmp_path."""
+    monkeypatch.setenv("CREW_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("METRICS_LOG", raising=False)
+    monkeypatch.delenv("METRICS_PROM_FILE", raising=False)
+    get_metrics_recorder.cache_clear()
+    yield monkeypatch
+    get_metrics_recorder.cache_clear()
+
+def test_per_query_log_is_off_by_default(recorder_env, tmp_path):
+    recorder = get_metrics_recorder()
+    recorder.record(QueryMetrics(query="fusion"))
+    assert recorder.log_path is None
+    assert list(tmp_path.iterdir()) == []
+    assert "llama_search_queries_total 1" in recorder.prometheus_text()
+
+def test_per_query_log_is_appended_when_set(recorder_env, tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    recorder_env.setenv("METRICS_LOG", str(path))
+    recorder = get_metrics_recorder()
+    recorder.record(QueryMetrics(query="fusion"))
+    recorder.record(QueryMetrics(query="rust"))
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)['query'] for line in lines] == ["fusion", "rust"]
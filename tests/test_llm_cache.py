@@ -0,0 +1,44 @@
+"""
+Tests of the LLM completion cache.
+"""
+
+from llama_search.llm_cache import LLMCache, completion_key
+
+PARAMS = {'temperature': 0.7}
+
+def store(cache: LLMCache, stage: str, query: str, value: str, model: str = "m"):
+    key = completion_key(model, f"{stage}: {query}", PARAMS)
+    cache.put(key, stage, model, query, value)
+
+def lookup(cache: LLMCache, stage: str, query: str, model: str = "m"):
+    key = completion_key(model, f"{stage}: {query}", PARAMS)
+    return cache.get(key, stage, model, query)
+
+def test_exact_key_hits_in_any_stage(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite3")
+    store(cache, "summarize", "fusion energy", "summary")
+    assert lookup(cache, "summarize", "fusion energy") == "summary"
+    assert lookup(cache, "summarize", "fusion power") is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_reworded_query_reuses_a_near_match_stage_only(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite3", near_stages=["plan_queries"])
+    store(cache, "plan_queries", "latest fusion energy results", "plan")
+    store(cache, "summarize", "latest fusion energy results", "summary")
+
+    reworded = "What are the latest fusion energy results?"
+    assert lookup(cache, "plan_queries", reworded) == "plan"
+    assert lookup(cache, "summarize", reworded) is None
+    assert lookup(cache, "plan_queries", reworded, model="other") is None
+    assert lookup(cache, "plan_queries", "best hiking trails in colorado") is None
+    assert cache.stats()['near_hits'] == 1
+
+def test_least_recently_used_completions_are_evicted(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite3", max_bytes=10)
+    store(cache, "summarize", "first", "aaaa")
+    store(cache, "summarize", "second", "bbbb")
+    assert lookup(cache, "summarize", "first") == "aaaa"
+    store(cache, "summarize", "third", "cccc")
+    assert lookup(cache, "summarize", "second") is None
+    assert lookup(cache, "summarize", "first") == "aaaa"
+    assert cache.stats()['bytes'] <= 10
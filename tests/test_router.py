@@ -0,0 +1,39 @@
+"""
+Tests of routing queries between the fast and full paths.
+"""
+
+import pytest
+
+from llama_search.router import classify_query
+
+@pytest.mark.parametrize("query", [
+    "who wrote Dune",
+    "capital of Peru",
+    "Python release date",
+    "what is a newsletter",
+    "what is a film preview",
+    "meaning of bestow",
+    "who is the lead analyst"
+])
+def test_simple_lookups_take_the_fast_path(query):
+    assert classify_query(query).fast
+
+@pytest.mark.parametrize("query, marker", [
+    ("Rust vs Go", "vs"),
+    ("compare Rust and Go", "compare"),
+    ("why is the sky blue", "why"),
+    ("latest fusion news", "latest"),
+    ("analysis of GPU prices", "analysis"),
+    ("who analyzed the data", "analyzed"),
+    ("best laptop for students", "best"),
+    ("Dune book reviews", "reviews")
+])
+def test_complex_queries_take_the_full_path(query, marker):
+    route = classify_query(query)
+    assert not route.fast
+    assert route.reason == f"contains '{marker}'"
+
+def test_long_and_multi_part_queries_take_the_full_path():
+    assert classify_query(" ".join(["word"] * 11)).reason == "11 words"
+    assert classify_query("who wrote Dune and when").reason == "several questions"
+    assert classify_query("what is zinc? what is iron?").reason == "several questions"
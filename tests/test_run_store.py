@@ -0,0 +1,64 @@
+"""
+Tests of the bounded, disk-backed run store.
+"""
+
+from llama_search.run_store import RunRecord, RunStore
+
+def add_runs(store: RunStore, queries, start: float = 1000.0):
+    for i, query in enumerate(queries):
+        store.add(RunRecord(kind='run', query=query, timestamp=start + i))
+
+def test_buffer_keeps_only_the_most_recent_records():
+    store = RunStore(capacity=3)
+    add_runs(store, ["a", "b", "c", "d", "e"])
+    assert len(store) == 3
+    assert [record.query for record in store.find()] == ["e", "d", "c"]
+
+def test_records_pushed_out_of_the_buffer_are_read_back_from_disk(tmp_path):
+    store = RunStore(tmp_path / "runs.sqlite3", capacity=2)
+    add_runs(store, ["a", "b", "c", "d", "e"])
+    assert len(store) == 2
+    assert [record.query for record in store.find()] == ["e", "d", "c", "b", "a"]
+    assert [record.query for record in store.find(limit=3)] == ["e", "d", "c"]
+    assert [record.query for record in store.find(since=1001, until=1003)] == ["c", "b"]
+
+def test_flushed_records_are_not_returned_twice(tmp_path):
+    path = tmp_path / "runs.sqlite3"
+    store = RunStore(path, capacity=10)
+    add_runs(store, ["a", "b"])
+    store.flush()
+    add_runs(store, ["c"], start=1002)
+    store.flush()
+    assert [record.query for record in store.find()] == ["c", "b", "a"]
+    assert [record.query for record in RunStore(path).find()] == ["c", "b", "a"]
+
+def test_records_of_other_processes_are_merged_by_time(tmp_path):
+    path = tmp_path / "runs.sqlite3"
+    first = RunStore(path, capacity=10)
+    second = RunStore(path, capacity=10)
+    add_runs(first, ["first-1"], start=1000)
+    first.flush()
+    add_runs(second, ["second-1", "second-2"], start=1001)
+    second.flush()
+    add_runs(first, ["first-2"], start=1003)
+    first.flush()
+    assert [record.query for record in first.find()] == [
+        "first-2", "second-2", "second-1", "first-1"
+    ]
+
+def test_query_filter_matches_wildcards_literally(tmp_path):
+    store = RunStore(tmp_path / "runs.sqlite3", capacity=1)
+    add_runs(store, [
+        "100% renewable grid",
+        "1000 renewable projects",
+        "snake_case names",
+        "snakecase names",
+        "latest"
+    ])
+    assert [record.query for record in store.find(query="100%")] == [
+        "100% renewable grid"
+    ]
+    assert [record.query for record in store.find(query="E_C")] == ["snake_case names"]
+    assert [record.query for record in store.find(query="RENEWABLE")] == [
+        "1000 renewable projects", "100% renewable grid"
+    ]
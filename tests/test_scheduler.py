@@ -0,0 +1,100 @@
+"""
+Tests of dependency-aware task scheduling.
+"""
+
+from typing import List, Tuple
+import threading
+import time
+
+import pytest
+
+from llama_search.config_registry import TaskConfig
+from llama_search.run_context import RunState
+from llama_search.scheduler import TaskScheduler, critical_path
+
+def task(task_id: str, *dependencies: str, **kwargs) -> TaskConfig:
+    return TaskConfig(
+        task_id=task_id,
+        description=f"Do {task_id}",
+        agent="researcher",
+        expected_output="Text",
+        dependencies=dependencies,
+        **kwargs
+    ).with_prompt()
+
+class Recorder:
+    """Stage runner recording when each stage starts and ends."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.events: List[Tuple[str, str, float]] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, run: RunState, config: TaskConfig) -> str:
+        with self.lock:
+            self.events.append(('start', config.label, time.monotonic()))
+        time.sleep(self.delay)
+        with self.lock:
+            self.events.append(('end', config.label, time.monotonic()))
+        if config.task_id == "plan":
+            return "1. first topic\n2. second topic"
+        return f"{config.label} output"
+
+    def time_of(self, kind: str, label: str) -> float:
+        return next(t for k, l, t in self.events if k == kind and l == label)
+
+def test_tasks_run_after_their_dependencies():
+    tasks = {t.task_id: t for t in (
+        task("a"), task("b", "a"), task("c", "a"), task("d", "b", "c")
+    )}
+    recorder = Recorder()
+    run = RunState(query="q")
+    outputs = TaskScheduler(recorder).run(run, tasks)
+
+    assert set(outputs) == set(tasks)
+    for task_id, config in tasks.items():
+        for dep in config.dependencies:
+            assert recorder.time_of('end', dep) <= recorder.time_of('start', task_id)
+    # Independent branches overlap
+    assert recorder.time_of('start', "c") < recorder.time_of('end', "b")
+    assert set(run.metrics.task_seconds) == set(tasks)
+
+def test_tasks_that_can_never_run_raise():
+    tasks = {t.task_id: t for t in (task("a", "b"), task("b", "a"))}
+    with pytest.raises(ValueError):
+        TaskScheduler(Recorder(0)).run(RunState(query="q"), tasks)
+
+def test_fan_out_runs_one_branch_per_item():
+    configs = (task("plan"), task("search", "plan", fan_out="plan"))
+    tasks = {config.task_id: config for config in configs}
+    recorder = Recorder()
+    outputs = TaskScheduler(recorder).run(RunState(query="q"), tasks)
+
+    assert outputs["search"] == (
+        "### first topic\nsearch[1] output\n\n### second topic\nsearch[2] output"
+    )
+    assert recorder.time_of('start', "search[2]") < recorder.time_of('end', "search[1]")
+
+def test_critical_path():
+    tasks = {t.task_id: t for t in (
+        task("a"), task("b", "a"), task("c", "a"), task("d", "b", "c")
+    )}
+    path, total = critical_path(tasks, {"a": 1.0, "b": 3.0, "c": 2.0, "d": 1.0})
+    assert path == ["a", "b", "d"]
+    assert total == 5.0
+
+def test_fan_out_is_capped_at_fan_out_max():
+    tasks = {t.task_id: t for t in (
+        task("plan"), task("search", "plan", fan_out="plan", fan_out_max=1)
+    )}
+    outputs = TaskScheduler(Recorder(0)).run(RunState(query="q"), tasks)
+    assert outputs["search"] == "search output"  # A single item runs as the plain task
+
+def test_fan_out_must_be_a_mapping_over_a_dependency():
+    data = {'description': "Search", 'agent': "researcher", 'expected_output': "Text"}
+    with pytest.raises(ValueError, match="invalid fan_out"):
+        TaskConfig.from_dict(
+            "search", dict(data, dependencies=["plan"], fan_out="plan")
+        )
+    with pytest.raises(ValueError, match="does not depend on"):
+        TaskConfig.from_dict("search", dict(data, fan_out={'from': "plan"}))
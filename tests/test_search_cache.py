@@ -0,0 +1,51 @@
+"""
+Tests of the persistent search result cache.
+"""
+
+import time
+
+from llama_search.search_cache import SearchCache
+
+def test_query_variants_share_an_entry(tmp_path):
+    cache = SearchCache(tmp_path / "search.sqlite3")
+    cache.put("Latest Fusion  results?", [{'title': "Fusion"}])
+    assert cache.get("latest fusion results") == [{'title': "Fusion"}]
+    assert cache.get("latest fusion results", namespace="other") is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_expired_entries_miss(tmp_path, monkeypatch):
+    cache = SearchCache(tmp_path / "search.sqlite3", ttl=60)
+    cache.put("fusion", ["fresh"])
+    cache.put("rust", ["short-lived"], ttl=5)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 30)
+    assert cache.get("fusion") == ["fresh"]
+    assert cache.get("rust") is None
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert cache.get("fusion") is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = SearchCache(tmp_path / "search.sqlite3", max_entries=2)
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(time, 'time', lambda: float(next(clock)))
+    cache.put("a", ["a"])
+    cache.put("b", ["b"])
+    cache.get("a")
+    cache.put("c", ["c"])
+    assert cache.get("b") is None
+    assert cache.get("a") == ["a"] and cache.get("c") == ["c"]
+
+def test_wrapped_search_reads_through_and_skips_empty_results(tmp_path):
+    cache = SearchCache(tmp_path / "search.sqlite3")
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        return [] if query == "nothing" else [{'title': query}]
+
+    cached = cache.wrap(search, namespace="results")
+    assert cached("fusion") == cached("Fusion") == [{'title': "fusion"}]
+    cached("nothing")
+    cached("nothing")
+    assert calls == ["fusion", "nothing", "nothing"]
+    assert SearchCache(tmp_path / "search.sqlite3").get("fusion", "results")
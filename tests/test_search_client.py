@@ -0,0 +1,114 @@
+"""
+Tests of the search client's rate limiting, retries and circuit breaking.
+"""
+
+import pytest
+
+from llama_search.search_client import (
+    CircuitBreaker,
+    SearchClient,
+    SearchUnavailableError,
+    TokenBucket
+)
+
+class FakeClock:
+    """Time that only moves when something sleeps or the test advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class FakeBackend:
+    """Search function that fails a given number of times before answering."""
+
+    def __init__(self, name: str, failures: int = 0):
+        self.name = name
+        self.failures = failures
+        self.queries = []
+
+    def __call__(self, query: str):
+        self.queries.append(query)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError(f"{self.name} is down")
+        return [{'title': f"{self.name}: {query}", 'link': "https://example.org"}]
+
+def make_client(clock: FakeClock, *backends: FakeBackend, **kwargs) -> SearchClient:
+    kwargs.setdefault('rate', 0)
+    return SearchClient(
+        [(backend.name, backend) for backend in backends],
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs
+    )
+
+def test_failed_call_is_retried_with_backoff():
+    clock = FakeClock()
+    primary = FakeBackend("primary", failures=2)
+    client = make_client(clock, primary, retries=2, backoff_base=0.5)
+    assert client("fusion")[0]['title'] == "primary: fusion"
+    assert len(primary.queries) == 3
+    assert len(clock.slept) == 2
+    assert 0 <= clock.slept[0] <= 0.5 and 0 <= clock.slept[1] <= 1.0
+    assert client.stats()['backends']['primary']['errors'] == 2
+
+def test_falls_back_to_the_next_backend():
+    clock = FakeClock()
+    primary = FakeBackend("primary", failures=10)
+    secondary = FakeBackend("secondary")
+    client = make_client(clock, primary, secondary, retries=1)
+    assert client("fusion")[0]['title'] == "secondary: fusion"
+    assert len(primary.queries) == 2
+    assert client.failures == 0
+
+def test_every_backend_failing_raises():
+    clock = FakeClock()
+    client = make_client(clock, FakeBackend("primary", failures=10), retries=0)
+    with pytest.raises(SearchUnavailableError, match="primary is down"):
+        client("fusion")
+    assert client.failures == 1
+
+def test_open_circuit_skips_the_backend_until_its_reset_time():
+    clock = FakeClock()
+    primary = FakeBackend("primary", failures=2)
+    secondary = FakeBackend("secondary")
+    client = make_client(
+        clock, primary, secondary, retries=1, breaker_threshold=2, breaker_reset=60
+    )
+    assert client("first")[0]['title'] == "secondary: first"
+    assert client.stats()['backends']['primary']['state'] == "open"
+
+    assert client("second")[0]['title'] == "secondary: second"
+    assert primary.queries == ["first", "first"]
+
+    clock.now += 60
+    assert client.stats()['backends']['primary']['state'] == "half-open"
+    assert client("third")[0]['title'] == "primary: third"
+    assert client.stats()['backends']['primary']['state'] == "closed"
+
+def test_failed_trial_call_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_after=10, clock=clock)
+    breaker.failure()
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one trial call at a time
+    breaker.failure()
+    assert breaker.state == "open"
+    clock.now += 9
+    assert not breaker.allow()
+
+def test_bucket_spaces_calls_beyond_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits == [0.0, 0.0, 0.5, 0.5]
+    assert clock.now == 1.0
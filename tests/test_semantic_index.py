@@ -0,0 +1,77 @@
+"""
+Tests of the semantic index of past searches and answers.
+"""
+
+import multiprocessing
+import time
+
+from llama_search.results import SearchResult
+from llama_search.semantic_index import SemanticIndex
+
+def add_entries(path, prefix: str, count: int):
+    """Add entries one by one, as a separate process would."""
+    index = SemanticIndex(path)
+    for i in range(count):
+        index.add([(f"{prefix} topic number {i}", {'writer': prefix, 'i': i})])
+
+def test_similar_queries_hit_and_unrelated_ones_miss(tmp_path):
+    index = SemanticIndex(tmp_path / "index")
+    index.add([
+        ("latest fusion energy results", "fusion"),
+        ("best hiking trails in colorado", "hiking"),
+        ("python asyncio tutorial", "asyncio")
+    ])
+    hits = index.search("fusion energy latest results", k=1, min_score=0.5)
+    assert [hit.payload for hit in hits] == ["fusion"]
+    assert hits[0].score > 0.8
+    assert index.search("chocolate cake recipe", min_score=0.5) == []
+
+def test_entries_older_than_max_age_are_skipped(tmp_path, monkeypatch):
+    index = SemanticIndex(tmp_path / "index")
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now - 3600)
+    index.add([("latest fusion energy results", "old")])
+    monkeypatch.setattr(time, 'time', lambda: now)
+    index.add([("latest fusion energy news", "new")])
+    found = index.search("latest fusion energy results", k=2)
+    assert [hit.payload for hit in found] == ["old", "new"]
+    recent = index.search("latest fusion energy results", k=2, max_age=60)
+    assert [hit.payload for hit in recent] == ["new"]
+
+def test_wrapped_search_reuses_results_of_similar_queries(tmp_path):
+    index = SemanticIndex(tmp_path / "index")
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        return [SearchResult(title=query, url="https://example.org", query=query)]
+
+    indexed = index.wrap_search(search, min_score=0.8, max_age=3600)
+    query = "latest fusion energy results"
+    assert indexed(query)[0].title == query
+    assert indexed("Latest fusion energy results!")[0].title == query
+    indexed("python asyncio tutorial")
+    assert calls == ["latest fusion energy results", "python asyncio tutorial"]
+
+def test_processes_sharing_an_index_do_not_overwrite_each_other(tmp_path):
+    path = tmp_path / "index"
+    reader = SemanticIndex(path)
+    context = multiprocessing.get_context("spawn")
+    writers = [
+        context.Process(target=add_entries, args=(path, prefix, 20))
+        for prefix in ("alpha", "beta")
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    # An index opened before the writers picks up their entries
+    hit = reader.search("alpha topic number 3", k=1)[0]
+    assert hit.payload == {'writer': 'alpha', 'i': 3}
+    assert len(reader) == 40
+    for prefix in ("alpha", "beta"):
+        for i in range(20):
+            hit = reader.search(f"{prefix} topic number {i}", k=1)[0]
+            assert hit.payload == {'writer': prefix, 'i': i}
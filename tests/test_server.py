@@ -0,0 +1,94 @@
+"""
+Tests of the HTTP service's admission and pool handling, driven over ASGI.
+"""
+
+import asyncio
+import json
+import queue
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("litellm")
+
+from llama_search.server import ResearchServer  # noqa: E402
+
+class FakePool:
+    """Stands in for AgentPool with one pipeline streaming a word every 10ms."""
+
+    size = 1
+
+    def __init__(self, words: int = 3):
+        self.words = words
+        self.timeouts = []
+        self._idle = queue.Queue()
+        self._idle.put("pipeline")
+
+    @property
+    def available(self) -> int:
+        return self._idle.qsize()
+
+    def run(self, query, timeout=None):
+        self.timeouts.append(timeout)
+        pipeline = self._idle.get(timeout=timeout)
+        self._idle.put(pipeline)
+        return f"answer to {query}"
+
+    def stream(self, query, timeout=None):
+        self.timeouts.append(timeout)
+        pipeline = self._idle.get(timeout=timeout)
+        try:
+            for i in range(self.words):
+                time.sleep(0.01)
+                yield f"word{i} "
+        finally:
+            self._idle.put(pipeline)
+
+async def request(app, body, disconnect_after=None):
+    """Send one POST /query and return the status and body sent back."""
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode()}
+
+    async def send(message):
+        if disconnect_after is not None and len(sent) >= disconnect_after:
+            raise OSError("client went away")
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/query'}
+    try:
+        await app(scope, receive, send)
+    except OSError:
+        pass
+    status = sent[0]['status'] if sent else None
+    return status, b"".join(message.get('body', b"") for message in sent[1:])
+
+def test_query_waits_for_the_pool_up_to_queue_timeout():
+    pool = FakePool()
+    app = ResearchServer(pool, queue_timeout=0.1)
+    status, body = asyncio.run(request(app, {'query': "fusion"}))
+    assert status == 200
+    assert json.loads(body)['result'] == "answer to fusion"
+    assert pool.timeouts == [0.1]
+
+def test_busy_pool_gets_503():
+    pool = FakePool()
+    pool._idle.get()  # A pipeline still held by an earlier request
+    app = ResearchServer(pool, queue_timeout=0.1)
+    status, _ = asyncio.run(request(app, {'query': "fusion", 'stream': True}))
+    assert status == 503
+
+def test_disconnected_stream_returns_its_pipeline_before_its_slot():
+    pool = FakePool(words=50)
+    app = ResearchServer(pool, queue_timeout=1)
+
+    async def both():
+        await request(app, {'query': "first", 'stream': True}, disconnect_after=2)
+        assert pool.available == 1
+        return await request(app, {'query': "second", 'stream': True})
+
+    status, body = asyncio.run(both())
+    assert status == 200
+    assert body.startswith(b"word0 word1")
@@ -0,0 +1,92 @@
+"""
+Tests of streaming answers through a worker thread.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("litellm")
+
+from llama_search.streaming import iterate_in_thread  # noqa: E402
+
+QUERY = "latest fusion energy results"
+
+async def first_item(chunks):
+    """Take one item from an async generator and close it."""
+    try:
+        return await chunks.__anext__()
+    finally:
+        await chunks.aclose()
+
+def test_closing_early_closes_the_iterator_in_its_thread():
+    closed = []
+
+    def numbers():
+        try:
+            for i in itertools.count():
+                yield str(i)
+        finally:
+            closed.append(threading.current_thread().name)
+
+    assert asyncio.run(first_item(iterate_in_thread(numbers))) == "0"
+    assert closed == ["stream"]
+
+def test_errors_are_raised_in_the_consumer():
+    def failing():
+        yield "partial"
+        raise RuntimeError("model went away")
+
+    async def consume():
+        return [chunk async for chunk in iterate_in_thread(failing)]
+
+    with pytest.raises(RuntimeError, match="model went away"):
+        asyncio.run(consume())
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Run pipelines against the search fixtures with stores under tmp_path."""
+    from llama_search.agents import set_search_backend
+    from llama_search.bench import OFFLINE_ENV
+    from llama_search.fixture_search import FixtureSearch
+    from llama_search.instrumentation import get_metrics_recorder
+    from llama_search.run_store import get_run_store
+
+    for name, value in OFFLINE_ENV.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setenv("CREW_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("METRICS_LOG", str(tmp_path / "metrics.jsonl"))
+    get_run_store.cache_clear()
+    get_metrics_recorder.cache_clear()
+    set_search_backend(FixtureSearch())
+    yield
+    set_search_backend(None)
+    get_run_store.cache_clear()
+    get_metrics_recorder.cache_clear()
+
+def test_abandoned_stream_is_still_recorded(offline, monkeypatch):
+    from llama_search.agents import init_agents
+    from llama_search.pipeline import ResearchPipeline
+    from llama_search.run_store import get_run_store
+    from llama_search.stub_llm import StubLLM
+
+    class SlowStub(StubLLM):
+        """Streams one word every 50ms, so the consumer leaves mid-answer."""
+
+        def stream(self, messages):
+            for word in super().stream(messages):
+                yield word
+                time.sleep(0.05)
+
+    pipeline = ResearchPipeline(init_agents(QUERY, llm=SlowStub()))
+    remembered = []
+    monkeypatch.setattr(pipeline, 'remember', lambda *args: remembered.append(args))
+
+    assert asyncio.run(first_item(pipeline.astream(QUERY)))
+    runs = get_run_store().find(kind='run')
+    assert [run.query for run in runs] == [QUERY]
+    assert not remembered  # Partial answers stay out of the semantic index